@@ -1,7 +1,9 @@
 from django.contrib import admin
 
-from .models import ClassificationModel, HistoryModel, ImageModel
+from .models import ClassificationModel, HistoryModel, ImageModel, SweepModel, WeightsModel
 
 admin.site.register(ImageModel)
 admin.site.register(ClassificationModel)
 admin.site.register(HistoryModel)
+admin.site.register(WeightsModel)
+admin.site.register(SweepModel)
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ClassificationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "classification"
+
+    def ready(self):
+        from . import signals  # NOQA
+        from .runtime import configure_runtime
+
+        configure_runtime(settings.TF_RUNTIME_ROLE)
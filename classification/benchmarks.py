@@ -0,0 +1,163 @@
+import io
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import keras
+import numpy as np
+from django.db import connection
+from PIL import Image
+
+from core.benchmarks import register
+from core.containers import RepositoryContainer, ServiceContainer
+from users.models import UserModel
+
+from .dto import CreateImageDTO, HyperParamsDTO, WeightsDTO
+from .services import ClassificationService
+
+IMAGE_SIZES = ((150, 150), (640, 480), (1920, 1080), (4000, 3000))
+IMAGE_FORMATS = ("JPEG", "PNG")
+HISTORY_ROWS = (1, 10, 100, 1000)
+DB_THREADS = (1, 4, 8)
+# Every thread runs this many operations per call, one write for three reads as in the prediction views.
+DB_OPERATIONS = 20
+INFERENCE_BATCH_SIZE = 16
+BENCHMARK_HYPER_PARAMS = HyperParamsDTO(
+    filters_1_layer=32, filters_2_layer=64, filters_3_layer=128, dense_neurons=512, epochs=1
+)
+
+
+def make_image(size: tuple, image_format: str) -> bytes:
+    """
+    Encode a deterministic synthetic photo-like image: smooth gradients with noise.
+
+    Args:
+        size (tuple): The width and the height of the image.
+        image_format (str): The PIL format of the image.
+
+    Returns:
+        bytes - The encoded image.
+    """
+
+    width, height = size
+    rng = np.random.default_rng(width * height)
+    gradient = np.add.outer(np.linspace(0, 160, height), np.linspace(0, 80, width))
+    pixels = np.stack([gradient, gradient[::-1], gradient[:, ::-1]], axis=-1) + rng.normal(0, 12, (height, width, 3))
+
+    encoded = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(encoded, image_format)
+
+    return encoded.getvalue()
+
+
+def _preprocess_case(size: tuple, image_format: str):
+    def factory():
+        image_bytes = make_image(size, image_format)
+
+        def preprocess():
+            image = ClassificationService._decode_image(io.BytesIO(image_bytes))
+            ClassificationService._normalize_image(ClassificationService._resize_image(image))
+
+        return preprocess
+
+    return factory
+
+
+def _inference_case(model_name: str, batch_size: int):
+    def factory():
+        classification_service = ServiceContainer.classification_service()
+        if model_name == "user_model":
+            model = ClassificationService._get_custom_user_model(BENCHMARK_HYPER_PARAMS)
+        else:
+            model = classification_service._load_model(model_name)
+        image_batch = np.random.default_rng(0).random((batch_size, 150, 150, 3), dtype=np.float32)
+
+        return lambda: classification_service._predict_batch(model, image_batch)
+
+    return factory
+
+
+def _repository_case(operation: str, rows: int):
+    def factory():
+        repository = RepositoryContainer.classification_model_repository()
+        user = UserModel.objects.create_user(email=f"benchmark-{uuid.uuid4().hex}@example.com", password=None)
+        history = keras.callbacks.History()
+        history.history = {name: [0.5] * rows for name in ClassificationService.HISTORY_METRICS}
+
+        def create():
+            weights_dto = WeightsDTO(path=f"benchmark/{uuid.uuid4().hex}.h5")
+            return repository.create_model(user, BENCHMARK_HYPER_PARAMS, weights_dto, history)
+
+        if operation == "create":
+            return create, user.delete
+
+        model_id = create().id
+        return lambda: repository.get_user_model(user, model_id), user.delete
+
+    return factory
+
+
+def _db_concurrency_case(threads: int):
+    def factory():
+        image_repository = RepositoryContainer.image_repository()
+        model_repository = RepositoryContainer.classification_model_repository()
+        history = keras.callbacks.History()
+        history.history = {name: [0.5] * 10 for name in ClassificationService.HISTORY_METRICS}
+        users = []
+        for _ in range(threads):
+            user = UserModel.objects.create_user(email=f"benchmark-{uuid.uuid4().hex}@example.com", password=None)
+            weights_dto = WeightsDTO(path=f"benchmark/{uuid.uuid4().hex}.h5")
+            users.append((user, model_repository.create_model(user, BENCHMARK_HYPER_PARAMS, weights_dto, history).id))
+
+        def work(user_model: tuple):
+            user, model_id = user_model
+            try:
+                for index in range(DB_OPERATIONS):
+                    if index % 4 == 0:
+                        image_dto = CreateImageDTO(user_id=user.pk, title="Benchmark", image="images/benchmark.jpg")
+                        image_repository.save_image(image_dto)
+                    elif index % 2:
+                        model_repository.get_user_model(user, model_id)
+                    else:
+                        model_repository.get_user_models(user)
+            finally:
+                connection.close()
+
+        def run():
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(work, users))
+
+        def cleanup():
+            for user, _ in users:
+                user.delete()
+
+        return run, cleanup
+
+    return factory
+
+
+for _size in IMAGE_SIZES:
+    for _image_format in IMAGE_FORMATS:
+        register(
+            f"classification.preprocess.{_image_format.lower()}.{_size[0]}x{_size[1]}",
+            _preprocess_case(_size, _image_format),
+        )
+
+for _model_name in (*ClassificationService.BUILT_IN_MODELS, "user_model"):
+    register(f"classification.inference.{_model_name}.single", _inference_case(_model_name, 1))
+    register(
+        f"classification.inference.{_model_name}.batch{INFERENCE_BATCH_SIZE}",
+        _inference_case(_model_name, INFERENCE_BATCH_SIZE),
+        items=INFERENCE_BATCH_SIZE,
+    )
+
+for _rows in HISTORY_ROWS:
+    register(f"classification.repository.create.history{_rows}", _repository_case("create", _rows), repeats=5)
+    register(f"classification.repository.read.history{_rows}", _repository_case("read", _rows))
+
+for _threads in DB_THREADS:
+    register(
+        f"classification.repository.concurrent.threads{_threads}",
+        _db_concurrency_case(_threads),
+        items=_threads * DB_OPERATIONS,
+        repeats=10,
+    )
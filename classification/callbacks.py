@@ -0,0 +1,150 @@
+import os
+import time
+
+import keras
+
+from core import metrics
+
+from .checkpoints import TrainingCheckpointStore
+from .dto import TrainingCheckpointDTO
+from .progress import ProgressChannel
+
+
+class ProgressCallback(keras.callbacks.Callback):
+    """
+    Keras callback publishing training metrics to a progress channel.
+
+    Attributes:
+        job_id (str): The identifier of the training job.
+        channel (ProgressChannel): The channel the metrics are published to.
+        steps_interval (int): Publish the running training metrics every N steps, 0 disables step events.
+        initial_history (dict): History of the epochs completed before a resumed training, published on start.
+    """
+
+    def __init__(self, job_id: str, channel: ProgressChannel, steps_interval: int = 0, initial_history=None):
+        super().__init__()
+        self.job_id = job_id
+        self.channel = channel
+        self.steps_interval = steps_interval
+        self.initial_history = dict(initial_history or {})
+        self._epoch = 0
+
+    def on_train_begin(self, logs=None):
+        epochs = len(next(iter(self.initial_history.values()), []))
+        for index in range(epochs):
+            logs = {name: values[index] for name, values in self.initial_history.items()}
+            self.channel.publish(self.job_id, "epoch", {"epoch": index + 1, **logs})
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch = epoch + 1
+
+    def on_train_batch_end(self, batch, logs=None):
+        if not self.steps_interval or (batch + 1) % self.steps_interval:
+            return
+
+        self.channel.publish(
+            self.job_id,
+            "step",
+            {"epoch": self._epoch, "step": batch + 1, **self._to_floats(logs)},
+        )
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.channel.publish(self.job_id, "epoch", {"epoch": epoch + 1, **self._to_floats(logs)})
+
+    @staticmethod
+    def _to_floats(logs) -> dict:
+        """
+        Convert the Keras logs to JSON serializable floats.
+
+        Args:
+            logs: The metrics passed to the callback by Keras.
+
+        Returns:
+            dict - Metric names mapped to their values.
+        """
+
+        return {name: float(value) for name, value in (logs or {}).items()}
+
+
+class EpochMetricsCallback(keras.callbacks.Callback):
+    """
+    Keras callback recording the duration of every training epoch in the metrics of the process.
+    """
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        metrics.training_epoch_duration.observe(time.perf_counter() - self._started)
+
+
+class CheckpointCallback(keras.callbacks.Callback):
+    """
+    Keras callback saving a resumable checkpoint after every epoch.
+
+    The callback accumulates the history of all epochs, including the ones completed before the training was
+    resumed, and exposes it in the same `history` attribute as keras.callbacks.History. It has to run after
+    the callbacks that may stop the training, so the checkpoint records whether the training was stopped.
+
+    Attributes:
+        store (TrainingCheckpointStore): The storage the checkpoints are written to.
+        checkpoint_dto (TrainingCheckpointDTO): The training state, updated after every epoch.
+        history (dict): Metric names mapped to their values for every completed epoch.
+    """
+
+    def __init__(self, store: TrainingCheckpointStore, checkpoint_dto: TrainingCheckpointDTO):
+        super().__init__()
+        self.store = store
+        self.checkpoint_dto = checkpoint_dto
+        self.history = checkpoint_dto.history
+
+    def on_epoch_end(self, epoch, logs=None):
+        for name, value in (logs or {}).items():
+            self.history.setdefault(name, []).append(float(value))
+
+        self.checkpoint_dto.epoch = epoch + 1
+        self.checkpoint_dto.stopped = bool(self.model.stop_training)
+        self.store.save(self.checkpoint_dto, self.model)
+
+
+class EarlyStoppingCallback(keras.callbacks.Callback):
+    """
+    Keras callback stopping the training when the validation loss stops improving.
+
+    Unlike keras.callbacks.EarlyStopping, the weights of the best epoch are restored at the end of every
+    training, not only a stopped one, and the state is derived from the history and a weights file,
+    so a training resumed from a checkpoint keeps counting the epochs without improvement.
+    The epochs of a base model a fine-tuning continues are part of the history but not of the tracking,
+    as their weights were never saved to the weights file.
+
+    Attributes:
+        patience (int): Number of epochs without improvement of val_loss after which the training is stopped.
+        best_weights_path (str): The file the weights of the best epoch are saved to.
+        best (float): The lowest validation loss so far.
+        best_epoch (int): The number of the epoch with the lowest validation loss, 0 before the first epoch.
+    """
+
+    def __init__(self, patience: int, best_weights_path: str, history: dict = None, start_epoch: int = 0):
+        super().__init__()
+        self.patience = patience
+        self.best_weights_path = best_weights_path
+
+        val_loss = (history or {}).get("val_loss", [])[start_epoch:]
+        self.best = min(val_loss, default=float("inf"))
+        self.best_epoch = start_epoch + val_loss.index(self.best) + 1 if val_loss else 0
+
+    def on_epoch_end(self, epoch, logs=None):
+        val_loss = (logs or {}).get("val_loss")
+        if val_loss is None:
+            return
+
+        if val_loss < self.best:
+            self.best = val_loss
+            self.best_epoch = epoch + 1
+            self.model.save_weights(self.best_weights_path)
+        elif epoch + 1 - self.best_epoch >= self.patience:
+            self.model.stop_training = True
+
+    def on_train_end(self, logs=None):
+        if self.best_epoch and os.path.exists(self.best_weights_path):
+            self.model.load_weights(self.best_weights_path)
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Select the points of a series keeping its visual shape with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and the last points are kept, the others are split into buckets of equal size and from every
+    bucket the point forming the largest triangle with the previously selected point and the average of the
+    next bucket is selected, so peaks and drops survive the downsampling.
+
+    Args:
+        x (np.ndarray): The x values of the series, in increasing order.
+        y (np.ndarray): The y values of the series.
+        points (int): The number of points to select.
+
+    Returns:
+        np.ndarray - The sorted indices of the selected points.
+    """
+
+    length = len(x)
+    if points >= length or points < 3:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, points - 1).astype(int)
+    selected = [0]
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_end = edges[bucket + 2]
+            average_x, average_y = x[end:next_end].mean(), y[end:next_end].mean()
+        else:
+            average_x, average_y = x[-1], y[-1]
+
+        previous = selected[-1]
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        selected.append(start + int(np.argmax(areas)))
+    selected.append(length - 1)
+
+    return np.array(selected)
+
+
+def downsample_series(x: list, series: dict, points: int) -> tuple[list, dict]:
+    """
+    Downsample series sharing their x values, each series choosing an equal share of the points.
+
+    The union of the points selected for every series is kept, so all series stay aligned on the same x values.
+
+    Args:
+        x (list): The shared x values, in increasing order.
+        series (dict): Names of the series mapped to their y values.
+        points (int): The maximum number of points kept.
+
+    Returns:
+        tuple[list, dict] - The kept x values and the series with their kept y values.
+    """
+
+    if len(x) <= points or not series:
+        return x, series
+
+    x_values = np.asarray(x, dtype=float)
+    share = max(points // len(series), 3)
+    indices = np.unique(
+        np.concatenate([downsample_lttb(x_values, np.asarray(y, dtype=float), share) for y in series.values()])
+    )
+
+    return [x[index] for index in indices], {name: [y[index] for index in indices] for name, y in series.items()}
@@ -0,0 +1,167 @@
+import os
+import shutil
+
+import keras
+from django.conf import settings
+
+from .dto import HyperParamsDTO, TrainingCheckpointDTO
+
+
+class TrainingCheckpointStore:
+    """
+    File storage for the checkpoints of unfinished trainings.
+
+    Every training job gets its own directory with the full model, including the optimizer state,
+    and a JSON state file with the hyperparameters and the history of the completed epochs.
+    Job directories are grouped by user, so a job identifier posted by another user never reaches them.
+
+    Methods:
+
+    - save(checkpoint_dto, model): Atomically replace the checkpoint of the job.
+    - load(user_id, job_id): Load the checkpoint state of the job.
+    - load_model(user_id, job_id): Load the model saved in the checkpoint of the job.
+    - list(): List the checkpoints of all unfinished trainings.
+    - delete(user_id, job_id): Remove the checkpoint of the job.
+    - find(job_id, user_id, hyper_params_dto): Find a checkpoint the given training can be resumed from.
+    - get_best_weights_path(user_id, job_id): Get the path of the weights of the best epoch of the job.
+    """
+
+    MODEL_FILE = "model.keras"
+    STATE_FILE = "state.json"
+    BEST_WEIGHTS_FILE = "best.weights.h5"
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or settings.TRAINING_CHECKPOINT_DIR
+
+    def save(self, checkpoint_dto: TrainingCheckpointDTO, model) -> None:
+        """
+        Save the model and the training state of the job.
+
+        Both files are written next to the current ones and renamed over them, the state file last,
+        so an interrupted write leaves the previous checkpoint usable.
+
+        Args:
+            checkpoint_dto (TrainingCheckpointDTO): The training state after the last completed epoch.
+            model: The trained Keras model.
+        """
+
+        job_directory = self._get_job_directory(checkpoint_dto.user_id, checkpoint_dto.job_id)
+        os.makedirs(job_directory, exist_ok=True)
+
+        model_path = os.path.join(job_directory, self.MODEL_FILE)
+        model.save(model_path + ".tmp.keras")
+        os.replace(model_path + ".tmp.keras", model_path)
+
+        state_path = os.path.join(job_directory, self.STATE_FILE)
+        with open(state_path + ".tmp", "w") as state_file:
+            state_file.write(checkpoint_dto.model_dump_json())
+        os.replace(state_path + ".tmp", state_path)
+
+    def load(self, user_id: int, job_id: str) -> TrainingCheckpointDTO | None:
+        """
+        Load the training state of the job.
+
+        Args:
+            user_id (int): The ID of the user who started the training.
+            job_id (str): The identifier of the training job.
+
+        Returns:
+            TrainingCheckpointDTO | None - The saved state, or None if the job has no checkpoint.
+        """
+
+        state_path = os.path.join(self._get_job_directory(user_id, job_id), self.STATE_FILE)
+        if not os.path.exists(state_path):
+            return None
+
+        with open(state_path) as state_file:
+            return TrainingCheckpointDTO.model_validate_json(state_file.read())
+
+    def load_model(self, user_id: int, job_id: str):
+        """
+        Load the compiled model, with its optimizer state, saved in the checkpoint of the job.
+
+        Args:
+            user_id (int): The ID of the user who started the training.
+            job_id (str): The identifier of the training job.
+
+        Returns:
+            keras.Model - The restored model.
+        """
+
+        return keras.models.load_model(os.path.join(self._get_job_directory(user_id, job_id), self.MODEL_FILE))
+
+    def list(self) -> list[TrainingCheckpointDTO]:
+        """
+        List the checkpoints of all unfinished trainings.
+
+        Returns:
+            list[TrainingCheckpointDTO] - The saved states of the unfinished trainings.
+        """
+
+        if not os.path.isdir(self.directory):
+            return []
+
+        checkpoints = [
+            self.load(int(user_id), job_id)
+            for user_id in sorted(os.listdir(self.directory))
+            if user_id.isdigit()
+            for job_id in sorted(os.listdir(os.path.join(self.directory, user_id)))
+        ]
+        return [checkpoint for checkpoint in checkpoints if checkpoint]
+
+    def delete(self, user_id: int, job_id: str) -> None:
+        """
+        Remove the checkpoint of the job.
+
+        Args:
+            user_id (int): The ID of the user who started the training.
+            job_id (str): The identifier of the training job.
+        """
+
+        shutil.rmtree(self._get_job_directory(user_id, job_id), ignore_errors=True)
+
+    def find(self, job_id: str, user_id: int, hyper_params_dto: HyperParamsDTO) -> TrainingCheckpointDTO | None:
+        """
+        Find a checkpoint the given training can be resumed from.
+
+        A checkpoint is only reused with the same hyperparameters, a checkpoint with other hyperparameters
+        is discarded. Only the checkpoints of the user are searched.
+
+        Args:
+            job_id (str): The identifier of the training job.
+            user_id (int): The ID of the user who started the training.
+            hyper_params_dto (HyperParamsDTO): Hyperparameters of the training.
+
+        Returns:
+            TrainingCheckpointDTO | None - The matching checkpoint, or None if the training starts from scratch.
+        """
+
+        checkpoint_dto = self.load(user_id, job_id)
+        if not checkpoint_dto:
+            return None
+
+        if checkpoint_dto.hyper_params != hyper_params_dto:
+            self.delete(user_id, job_id)
+            return None
+
+        return checkpoint_dto
+
+    def get_best_weights_path(self, user_id: int, job_id: str) -> str:
+        """
+        Get the path of the weights of the best epoch of the job, creating the job directory if needed.
+
+        Args:
+            user_id (int): The ID of the user who started the training.
+            job_id (str): The identifier of the training job.
+
+        Returns:
+            str - The path of the weights file.
+        """
+
+        job_directory = self._get_job_directory(user_id, job_id)
+        os.makedirs(job_directory, exist_ok=True)
+
+        return os.path.join(job_directory, self.BEST_WEIGHTS_FILE)
+
+    def _get_job_directory(self, user_id: int, job_id: str) -> str:
+        return os.path.join(self.directory, str(user_id), job_id)
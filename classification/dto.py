@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 from django.core.files.uploadedfile import UploadedFile
@@ -26,6 +27,27 @@ class HyperParamsDTO(BaseModel):
     filters_3_layer: int
     dense_neurons: int
     epochs: int
+    early_stopping: bool = False
+    patience: int = 3
+
+
+class TrainingCheckpointDTO(BaseModel):
+    job_id: str
+    user_id: int
+    hyper_params: HyperParamsDTO
+    epoch: int
+    history: dict[str, list[float]]
+    stopped: bool = False
+    base_model_id: Optional[int] = None
+    base_epochs: int = 0
+
+
+class WeightsDTO(BaseModel):
+    id: Optional[int] = None
+    path: str
+    size: Optional[int] = None
+    sha256: str = ""
+    compressed: bool = False
 
 
 class ModelDTO(BaseModel):
@@ -36,7 +58,11 @@ class ModelDTO(BaseModel):
     filters_3_layer: int
     dense_neurons: int
     epochs: int
+    epochs_trained: Optional[int] = None
     weights_path: str
+    weights: Optional[WeightsDTO] = None
+    base_model_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
     history: list
 
 
@@ -58,3 +84,91 @@ class ModelListDTO(BaseModel):
     filters_3_layer: int
     dense_neurons: int
     epochs: int
+    epochs_trained: Optional[int] = None
+
+
+class PredictionTimingsDTO(BaseModel):
+    decode: float = 0.0
+    resize: float = 0.0
+    save: float = 0.0
+    normalize: float = 0.0
+    model: float = 0.0
+    inference: float = 0.0
+
+
+class PredictionDTO(BaseModel):
+    probability: float
+    spread: float = 0.0
+    variants: int = 1
+    threshold: float
+    result: str
+    model_name: str = ""
+    model_id: Optional[int] = None
+    model_version: str = ""
+    timings: PredictionTimingsDTO = PredictionTimingsDTO()
+
+
+class ModelPredictionDTO(BaseModel):
+    model_name: str
+    model_id: Optional[int] = None
+    prediction: Optional[PredictionDTO] = None
+    error: str = ""
+
+
+class ChartDataDTO(BaseModel):
+    epochs: list[int]
+    series: dict[str, list[float]]
+
+
+class ComparisonDTO(BaseModel):
+    image: ImageDTO
+    timings: PredictionTimingsDTO
+    predictions: list[ModelPredictionDTO]
+
+
+class RuntimeProfileDTO(BaseModel):
+    role: str
+    intra_op_threads: int
+    inter_op_threads: int
+    cpu_affinity: Optional[list[int]] = None
+
+
+class TrainingCostDTO(BaseModel):
+    parameters: int
+    flops_per_image: int
+    activation_bytes_per_image: int
+    peak_memory_bytes: int
+    cpu_seconds: float
+
+
+class TrainingQueueMetricsDTO(BaseModel):
+    queue_depth: dict[str, int]
+    running: int
+    started: int
+    rejected: int
+    wait_p50: float
+    wait_p95: float
+    wait_max: float
+
+
+class SweepParamsDTO(BaseModel):
+    filters_1_layer: list[int]
+    filters_2_layer: list[int]
+    filters_3_layer: list[int]
+    dense_neurons: list[int]
+    epochs: int
+
+
+class SweepResultDTO(BaseModel):
+    model: ModelListDTO
+    accuracy: float
+    val_accuracy: float
+
+
+class SweepDTO(BaseModel):
+    id: int
+    user_id: int
+    status: str
+    configurations: int
+    created_at: datetime
+    results: list[SweepResultDTO] = []
@@ -0,0 +1,71 @@
+from django.conf import settings
+
+from .dto import HyperParamsDTO, TrainingCostDTO
+
+INPUT_SHAPE = (150, 150, 3)
+KERNEL_SIZE = 3
+POOL_SIZE = 2
+BYTES_PER_VALUE = 4
+BATCH_SIZE = 20
+STEPS_PER_EPOCH = 100
+VALIDATION_STEPS = 50
+
+
+def estimate_training_cost(hyper_params_dto: HyperParamsDTO) -> TrainingCostDTO:
+    """
+    Estimate the size and the training cost of a custom user model without building it.
+
+    The estimate follows the architecture of ClassificationService._get_custom_user_model: three valid 3x3
+    convolutions, each followed by 2x2 max pooling, a dense layer and a sigmoid output.
+    A training step is counted as three forward passes (forward, backward for activations and for weights),
+    and its peak memory holds the weights, their gradients and the RMSprop state, plus the activations
+    of a whole batch and their gradients.
+
+    Args:
+        hyper_params_dto (HyperParamsDTO): Data transfer object containing hyperparameters for model creation.
+
+    Returns:
+        TrainingCostDTO - Parameter count, FLOPs and activation memory per image, peak memory and CPU time.
+    """
+
+    height, width, channels = INPUT_SHAPE
+    parameters = 0
+    flops = 0
+    activations = height * width * channels
+
+    for filters in (
+        hyper_params_dto.filters_1_layer,
+        hyper_params_dto.filters_2_layer,
+        hyper_params_dto.filters_3_layer,
+    ):
+        height, width = height - KERNEL_SIZE + 1, width - KERNEL_SIZE + 1
+        parameters += (KERNEL_SIZE * KERNEL_SIZE * channels + 1) * filters
+        flops += 2 * height * width * KERNEL_SIZE * KERNEL_SIZE * channels * filters
+        activations += height * width * filters
+
+        height, width, channels = height // POOL_SIZE, width // POOL_SIZE, filters
+        activations += height * width * channels
+
+    for inputs, outputs in (
+        (height * width * channels, hyper_params_dto.dense_neurons),
+        (hyper_params_dto.dense_neurons, 1),
+    ):
+        parameters += (inputs + 1) * outputs
+        flops += 2 * inputs * outputs
+        activations += outputs
+
+    activation_bytes = activations * BYTES_PER_VALUE
+    peak_memory_bytes = 3 * parameters * BYTES_PER_VALUE + 2 * BATCH_SIZE * activation_bytes
+
+    images_per_epoch = STEPS_PER_EPOCH * BATCH_SIZE
+    validation_images_per_epoch = VALIDATION_STEPS * BATCH_SIZE
+    epoch_flops = 3 * flops * images_per_epoch + flops * validation_images_per_epoch
+    cpu_seconds = epoch_flops * hyper_params_dto.epochs / (settings.TRAINING_CORE_GFLOPS * 1e9)
+
+    return TrainingCostDTO(
+        parameters=parameters,
+        flops_per_image=flops,
+        activation_bytes_per_image=activation_bytes,
+        peak_memory_bytes=peak_memory_bytes,
+        cpu_seconds=cpu_seconds,
+    )
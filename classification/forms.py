@@ -1,4 +1,7 @@
 from django import forms
+from django.conf import settings
+
+from core.uploads import ImageUploadField
 
 
 class ImageUploadForm(forms.Form):
@@ -7,7 +10,7 @@ class ImageUploadForm(forms.Form):
         label="Введіть назву фото:",
         widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Назва фото"}),
     )
-    image = forms.ImageField(
+    image = ImageUploadField(
         label="Завантажте фото:",
         widget=forms.FileInput(
             attrs={
@@ -17,6 +20,11 @@ class ImageUploadForm(forms.Form):
             }
         ),
     )
+    tta = forms.BooleanField(
+        required=False,
+        label="Усереднити прогноз за віддзеркаленим та зсунутими варіантами фото:",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
 
 
 class HyperParamsForm(forms.Form):
@@ -50,3 +58,157 @@ class HyperParamsForm(forms.Form):
         label="Кількість епох навчання:",
         widget=forms.NumberInput(attrs={"class": "form-control"}),
     )
+    early_stopping = forms.BooleanField(
+        required=False,
+        label="Зупинити навчання, коли похибка на валідаційних даних перестане зменшуватись:",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+    patience = forms.IntegerField(
+        min_value=1,
+        max_value=10,
+        initial=3,
+        label="Кількість епох без покращення до зупинки:",
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    fresh_training = forms.BooleanField(
+        required=False,
+        label="Навчити модель заново, навіть якщо модель з такими гіперпараметрами вже навчена:",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+    base_model = forms.TypedChoiceField(
+        required=False,
+        coerce=int,
+        empty_value=None,
+        label="Дотренувати власну модель з такими ж розмірами шарів (кількість епох — додаткові епохи):",
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    freeze_conv = forms.BooleanField(
+        required=False,
+        label="Не змінювати ваги згорткових шарів під час дотренування:",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+    job_id = forms.UUIDField(required=False, widget=forms.HiddenInput())
+
+    LAYER_FIELDS = ("filters_1_layer", "filters_2_layer", "filters_3_layer", "dense_neurons")
+
+    def __init__(self, *args, base_models=(), **kwargs):
+        """
+        Args:
+            base_models (Iterable[ModelListDTO]): Models of the user that can be fine-tuned.
+        """
+
+        super().__init__(*args, **kwargs)
+        self.base_models = {model_dto.id: model_dto for model_dto in base_models}
+        self.fields["base_model"].choices = [("", "Навчити нову модель")] + [
+            (
+                model_dto.id,
+                f"Модель {model_dto.id}: {model_dto.filters_1_layer}/{model_dto.filters_2_layer}/"
+                f"{model_dto.filters_3_layer} фільтрів, {model_dto.dense_neurons} нейронів",
+            )
+            for model_dto in self.base_models.values()
+        ]
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        base_model_dto = self.base_models.get(cleaned_data.get("base_model"))
+        if base_model_dto and any(
+            getattr(base_model_dto, field) != cleaned_data.get(field) for field in self.LAYER_FIELDS
+        ):
+            self.add_error("base_model", "Обрана модель має інші розміри шарів.")
+
+        return cleaned_data
+
+
+class SweepForm(forms.Form):
+    """
+    Form with the values of every hyperparameter of a sweep.
+
+    Values are given as a comma-separated list of numbers and ranges, e.g. "16, 32" or "16-64:16",
+    where a range "start-stop:step" includes both ends.
+    """
+
+    filters_1_layer = forms.CharField(
+        label="Кількість фільтрів на першому згортковому шарі:",
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "16, 32"}),
+    )
+    filters_2_layer = forms.CharField(
+        label="Кількість фільтрів на другому згортковому шарі:",
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "32-64:32"}),
+    )
+    filters_3_layer = forms.CharField(
+        label="Кількість фільтрів на третьому згортковому шарі:",
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "64"}),
+    )
+    dense_neurons = forms.CharField(
+        label="Кількість нейронів на повнозв'язаному шарі:",
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "128, 512"}),
+    )
+    epochs = forms.IntegerField(
+        min_value=1,
+        max_value=20,
+        label="Кількість епох навчання найкращих моделей:",
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+
+    def clean_filters_1_layer(self):
+        return self._parse_values(self.cleaned_data["filters_1_layer"], max_value=128)
+
+    def clean_filters_2_layer(self):
+        return self._parse_values(self.cleaned_data["filters_2_layer"], max_value=128)
+
+    def clean_filters_3_layer(self):
+        return self._parse_values(self.cleaned_data["filters_3_layer"], max_value=128)
+
+    def clean_dense_neurons(self):
+        return self._parse_values(self.cleaned_data["dense_neurons"], max_value=1024)
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        configurations = 1
+        for field in ("filters_1_layer", "filters_2_layer", "filters_3_layer", "dense_neurons"):
+            configurations *= len(cleaned_data.get(field) or [])
+
+        if configurations > settings.SWEEP_MAX_CONFIGURATIONS:
+            raise forms.ValidationError(
+                f"Забагато комбінацій гіперпараметрів: {configurations}, максимум {settings.SWEEP_MAX_CONFIGURATIONS}."
+            )
+
+        return cleaned_data
+
+    @staticmethod
+    def _parse_values(value: str, max_value: int) -> list[int]:
+        """
+        Parse a comma-separated list of numbers and ranges into sorted unique values.
+
+        Args:
+            value (str): The entered values, e.g. "16, 32-64:16".
+            max_value (int): The largest allowed value.
+
+        Returns:
+            list[int] - The sorted unique values.
+
+        Raises:
+            ValidationError: If the values can not be parsed or are out of bounds.
+        """
+
+        ranges = []
+        try:
+            for part in value.replace(" ", "").split(","):
+                start, _, stop_and_step = part.partition("-")
+                stop, _, step = stop_and_step.partition(":")
+                ranges.append((int(start), int(stop or start), int(step or 1)))
+        except ValueError:
+            raise forms.ValidationError("Введіть числа або діапазони через кому, наприклад: 16, 32-64:16.")
+
+        # Bounds are checked before the ranges are expanded, so a huge range is rejected without building it.
+        values = set()
+        for start, stop, step in ranges:
+            if step < 1:
+                raise forms.ValidationError("Крок діапазону має бути додатним.")
+            if not 1 <= start <= stop <= max_value:
+                raise forms.ValidationError(f"Значення мають бути від 1 до {max_value}.")
+            values.update(range(start, stop + 1, step))
+
+        return sorted(values)
@@ -1,6 +1,7 @@
 from abc import ABCMeta, abstractmethod
+from datetime import datetime
 
-from .dto import CreateImageDTO, ModelDTO, ModelListDTO
+from .dto import ChartDataDTO, CreateImageDTO, ModelDTO, ModelListDTO, SweepDTO, WeightsDTO
 
 
 class ImageRepositoryInterface(metaclass=ABCMeta):
@@ -35,20 +36,52 @@ class ClassificationModelRepositoryInterface(metaclass=ABCMeta):
 
     Methods:
 
-    - create_model(self, user, hyper_params_dto, weights_path, history): Abstract method
-      to save created model information.
+    - create_model(self, user, hyper_params_dto, weights_dto, history, training_key, sweep_id, base_model_id):
+      Abstract method to save created model information.
     """
 
     @abstractmethod
-    def create_model(self, user, hyper_params_dto, weights_path, history) -> ModelDTO:
+    def create_model(
+        self, user, hyper_params_dto, weights_dto, history, training_key=None, sweep_id=None, base_model_id=None
+    ) -> ModelDTO:
         """
         Abstract method to save created model information to the repository.
 
         Args:
             user: The user associated with the model.
             hyper_params_dto: Data transfer object containing hyperparameters for model creation.
-            weights_path: The path to the pre-trained weights for the model.
+            weights_dto: The path, the size and the hash of the trained weights of the model.
             history: The training history of the model.
+            training_key: The key of the training result, used to reuse the weights for identical trainings.
+            sweep_id: The ID of the hyperparameter sweep the model was trained in.
+            base_model_id: The ID of the model the training was started from.
+        """
+        pass
+
+    @abstractmethod
+    def get_model_by_training_key(self, training_key: str) -> ModelDTO | None:
+        """
+        Retrieve a model whose weights were trained with the given training key.
+
+        Args:
+            training_key (str): The key of the training result.
+
+        Returns:
+            ModelDTO | None: Data transfer object of the model, or None if no model was trained with this key.
+        """
+        pass
+
+    @abstractmethod
+    def copy_model(self, user, model_id: int) -> ModelDTO:
+        """
+        Create a new model for the user, sharing the weights and copying the history of the given one.
+
+        Args:
+            user: The user associated with the new model.
+            model_id (int): The unique identifier of the model to copy.
+
+        Returns:
+            ModelDTO: Data transfer object containing information about the created model.
         """
         pass
 
@@ -66,6 +99,48 @@ class ClassificationModelRepositoryInterface(metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def get_user_model_metrics(self, user, model_id: int, metrics: tuple) -> ChartDataDTO:
+        """
+        Retrieve the metric series of the training history of a classification model owned by the user.
+
+        Args:
+            user: The user associated with the model.
+            model_id (int): The unique identifier of the model.
+            metrics (tuple): The names of the history metrics.
+
+        Returns:
+            ChartDataDTO: The epoch numbers and the values of every metric per epoch.
+        """
+        pass
+
+    @abstractmethod
+    def get_user_model_updated_at(self, user, model_id: int) -> datetime | None:
+        """
+        Retrieve when a classification model owned by the user was last saved.
+
+        Args:
+            user: The user associated with the model.
+            model_id (int): The unique identifier of the model.
+
+        Returns:
+            datetime | None: The time of the last save, or None if the model does not exist.
+        """
+        pass
+
+    @abstractmethod
+    def get_user_models_version(self, user) -> str:
+        """
+        Retrieve a version of the list of classification models owned by the user.
+
+        Args:
+            user: The user associated with the models.
+
+        Returns:
+            str: A version changing whenever a model of the user is created, saved or deleted.
+        """
+        pass
+
     @abstractmethod
     def get_user_models(self, user) -> list[ModelListDTO]:
         """
@@ -78,3 +153,182 @@ class ClassificationModelRepositoryInterface(metaclass=ABCMeta):
             list[ModelListDTO]: List of data transfer objects containing information about the user's models.
         """
         pass
+
+    @abstractmethod
+    def get_user_models_with_weights(self, user) -> list[ModelDTO]:
+        """
+        Retrieve the classification models owned by the user with their weights, without their history.
+
+        Args:
+            user: The user associated with the models.
+
+        Returns:
+            list[ModelDTO]: Data transfer objects of the user's models, with an empty history.
+        """
+        pass
+
+
+class SweepRepositoryInterface(metaclass=ABCMeta):
+    """
+    An interface for managing hyperparameter sweeps in the application.
+
+    Methods:
+
+    - create_sweep(user, configurations): Abstract method to save a started sweep.
+    - finish_sweep(sweep_id, succeeded): Abstract method to mark a sweep as completed or failed.
+    - get_user_sweep(user, sweep_id): Abstract method to retrieve a sweep with its ranked results.
+    """
+
+    @abstractmethod
+    def create_sweep(self, user, configurations: int) -> SweepDTO:
+        """
+        Save a started sweep.
+
+        Args:
+            user: The user who started the sweep.
+            configurations (int): The number of trained hyperparameter configurations.
+
+        Returns:
+            SweepDTO: Data transfer object containing information about the sweep.
+        """
+        pass
+
+    @abstractmethod
+    def finish_sweep(self, sweep_id: int, succeeded: bool) -> None:
+        """
+        Mark a sweep as completed or failed.
+
+        Args:
+            sweep_id (int): The unique identifier of the sweep.
+            succeeded (bool): Whether all configurations of the sweep were trained.
+        """
+        pass
+
+    @abstractmethod
+    def get_user_sweep(self, user, sweep_id: int) -> SweepDTO:
+        """
+        Retrieve a sweep owned by the user with its models ranked by validation accuracy.
+
+        Args:
+            user: The user who started the sweep.
+            sweep_id (int): The unique identifier of the sweep.
+
+        Returns:
+            SweepDTO: Data transfer object containing the sweep and its ranked results.
+        """
+        pass
+
+
+class WeightsRepositoryInterface(metaclass=ABCMeta):
+    """
+    An interface for managing the records of the weights files in the application.
+
+    Methods:
+
+    - touch_weights(weights_ids, used_at): Abstract method to record that the weights were served.
+    - get_cold_weights(unused_since): Abstract method to retrieve uncompressed weights not served since a time.
+    - set_compressed(weights_id): Abstract method to record that the weights were moved to the compressed tier.
+    - get_unreferenced_weights(): Abstract method to retrieve weights no model refers to.
+    - delete_weights(weights_id): Abstract method to delete the record of weights.
+    - get_referenced_paths(): Abstract method to retrieve the paths of all weights files in use.
+    - get_untracked_paths(): Abstract method to retrieve weights paths of models without a weights record.
+    - track_weights(weights_dto): Abstract method to create the record of untracked weights.
+    - get_compressed_hashes(): Abstract method to retrieve the hashes of all compressed weights.
+    """
+
+    @abstractmethod
+    def touch_weights(self, weights_ids: list[int], used_at: datetime) -> None:
+        """
+        Record that the weights were served, at most once an hour.
+
+        Args:
+            weights_ids (list[int]): The unique identifiers of the weights.
+            used_at (datetime): The time the weights were served.
+        """
+        pass
+
+    @abstractmethod
+    def get_cold_weights(self, unused_since: datetime) -> list[WeightsDTO]:
+        """
+        Retrieve uncompressed weights that were not served since the given time.
+
+        Args:
+            unused_since (datetime): The time since which the weights were not served.
+
+        Returns:
+            list[WeightsDTO]: Data transfer objects of the cold weights.
+        """
+        pass
+
+    @abstractmethod
+    def set_compressed(self, weights_id: int) -> None:
+        """
+        Record that the weights were moved to the compressed tier.
+
+        Args:
+            weights_id (int): The unique identifier of the weights.
+        """
+        pass
+
+    @abstractmethod
+    def get_unreferenced_weights(self) -> list[WeightsDTO]:
+        """
+        Retrieve weights no model refers to.
+
+        Returns:
+            list[WeightsDTO]: Data transfer objects of the unreferenced weights.
+        """
+        pass
+
+    @abstractmethod
+    def delete_weights(self, weights_id: int) -> None:
+        """
+        Delete the record of weights.
+
+        Args:
+            weights_id (int): The unique identifier of the weights.
+        """
+        pass
+
+    @abstractmethod
+    def get_referenced_paths(self) -> set[str]:
+        """
+        Retrieve the paths of all weights files in use, tracked or not.
+
+        Returns:
+            set[str]: The paths of the weights files.
+        """
+        pass
+
+    @abstractmethod
+    def get_untracked_paths(self) -> list[str]:
+        """
+        Retrieve the weights paths of models stored before their weights were tracked.
+
+        Returns:
+            list[str]: The distinct paths of the untracked weights files.
+        """
+        pass
+
+    @abstractmethod
+    def track_weights(self, weights_dto: WeightsDTO) -> WeightsDTO:
+        """
+        Create the record of untracked weights and link the models using them.
+
+        Args:
+            weights_dto (WeightsDTO): The path, the size and the hash of the weights file.
+
+        Returns:
+            WeightsDTO: Data transfer object of the created record.
+        """
+        pass
+
+    @abstractmethod
+    def get_compressed_hashes(self) -> set[str]:
+        """
+        Retrieve the hashes of all compressed weights.
+
+        Returns:
+            set[str]: The SHA-256 hashes of the compressed weights.
+        """
+        pass
@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from classification.dto import HyperParamsDTO
+from classification.runtime import INFERENCE, configure_runtime
+from classification.services import ClassificationService
+from core.containers import ServiceContainer
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency of a prediction for one image, with test-time augmentation in one batch, "
+        "and with one forward pass per augmented variant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeats", type=int, default=50, help="Measured predictions per mode.")
+        parser.add_argument("--warmup", type=int, default=5, help="Predictions per mode before measuring.")
+        parser.add_argument(
+            "--filters", type=int, nargs=3, default=[32, 64, 128], help="Filters of the convolutional layers."
+        )
+        parser.add_argument("--dense-neurons", type=int, default=512, help="Neurons of the dense layer.")
+
+    def handle(self, *args, **options):
+        configure_runtime(INFERENCE)
+
+        classification_service = ServiceContainer.classification_service()
+        filters_1_layer, filters_2_layer, filters_3_layer = options["filters"]
+        model = ClassificationService._get_custom_user_model(
+            HyperParamsDTO(
+                filters_1_layer=filters_1_layer,
+                filters_2_layer=filters_2_layer,
+                filters_3_layer=filters_3_layer,
+                dense_neurons=options["dense_neurons"],
+                epochs=1,
+            )
+        )
+        image_array = np.random.default_rng(0).random((1, 150, 150, 3), dtype=np.float32)
+        variants = ClassificationService._get_tta_batch(image_array)
+
+        modes = {
+            "single": lambda: classification_service._predict_batch(model, image_array),
+            "tta batch": lambda: classification_service._predict_batch(model, variants),
+            "tta loop": lambda: [model.predict(variant[np.newaxis], verbose=0) for variant in variants],
+        }
+
+        self.stdout.write(f"{len(variants)} variants per image, {options['repeats']} repeats")
+        for mode, predict in modes.items():
+            for _ in range(options["warmup"]):
+                predict()
+
+            latencies = []
+            for _ in range(options["repeats"]):
+                started = time.perf_counter()
+                predict()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(
+                f"{mode:>10}: mean {np.mean(latencies):8.2f} ms, p50 {np.percentile(latencies, 50):8.2f} ms, "
+                f"p95 {np.percentile(latencies, 95):8.2f} ms"
+            )
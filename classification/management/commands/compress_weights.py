@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.containers import RepositoryContainer
+from core.exceptions import WeightsIntegrityError
+
+
+class Command(BaseCommand):
+    help = "Move the weights not used for predictions or fine-tuning for a while to the compressed tier."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=settings.WEIGHTS_COLD_DAYS,
+            help="Days since the weights were last used.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be compressed.")
+
+    def handle(self, *args, **options):
+        weights_store = RepositoryContainer.weights_store()
+        weights_repository = RepositoryContainer.weights_repository()
+
+        unused_since = timezone.now() - timedelta(days=options["days"])
+        for weights_dto in weights_repository.get_cold_weights(unused_since):
+            if options["dry_run"]:
+                self.stdout.write(f"Would compress {weights_dto.path}")
+                continue
+
+            try:
+                weights_store.compress(weights_dto)
+            except WeightsIntegrityError as error:
+                self.stdout.write(self.style.ERROR(f"Skipped {weights_dto.path}: {error}"))
+                continue
+
+            weights_repository.set_compressed(weights_dto.id)
+            weights_store.remove_uncompressed(weights_dto)
+            self.stdout.write(self.style.SUCCESS(f"Compressed {weights_dto.path}"))
@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from classification.dto import WeightsDTO
+from core.containers import RepositoryContainer
+
+
+class Command(BaseCommand):
+    help = "Remove the weights files and records no model refers to, and the stale cached copies of weights."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed.")
+        parser.add_argument(
+            "--min-age",
+            type=float,
+            default=24,
+            help="Hours an untracked file is kept, so the weights of running trainings are not removed.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        min_mtime = time.time() - options["min_age"] * 3600
+
+        weights_store = RepositoryContainer.weights_store()
+        weights_repository = RepositoryContainer.weights_repository()
+
+        for path in weights_repository.get_untracked_paths():
+            weights_dto = weights_store.describe(path) if os.path.exists(path) else WeightsDTO(path=path)
+            if not dry_run:
+                weights_repository.track_weights(weights_dto)
+            self.stdout.write(f"Tracked {path}")
+
+        for weights_dto in weights_repository.get_unreferenced_weights():
+            if not dry_run:
+                weights_repository.delete_weights(weights_dto.id)
+                weights_store.delete(weights_dto)
+            self.stdout.write(f"Removed unreferenced {weights_dto.path}")
+
+        referenced_paths = weights_repository.get_referenced_paths()
+        for path in weights_store.list_files():
+            logical_path = path.removesuffix(weights_store.COMPRESSED_SUFFIX)
+            if logical_path in referenced_paths or os.path.getmtime(path) > min_mtime:
+                continue
+            if not dry_run:
+                os.remove(path)
+            self.stdout.write(f"Removed orphan {path}")
+
+        compressed_hashes = weights_repository.get_compressed_hashes()
+        for path in weights_store.list_cache_files():
+            if os.path.splitext(os.path.basename(path))[0] in compressed_hashes:
+                continue
+            if not dry_run:
+                os.remove(path)
+            self.stdout.write(f"Removed cached {path}")
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from classification.runtime import TRAINING, configure_runtime
+from classification.scheduling import BATCH
+from core.containers import RepositoryContainer, ServiceContainer
+from core.exceptions import TrainingRejectedError
+from users.models import UserModel
+
+
+class Command(BaseCommand):
+    help = "Resume the trainings interrupted before their model was stored, from their last checkpoint."
+
+    def handle(self, *args, **options):
+        configure_runtime(TRAINING)
+
+        checkpoint_store = RepositoryContainer.checkpoint_store()
+        classification_service = ServiceContainer.classification_service()
+
+        for checkpoint_dto in checkpoint_store.list():
+            user = UserModel.objects.filter(pk=checkpoint_dto.user_id, is_active=True).first()
+            if not user:
+                checkpoint_store.delete(checkpoint_dto.user_id, checkpoint_dto.job_id)
+                self.stdout.write(f"Job {checkpoint_dto.job_id}: user does not exist, checkpoint removed")
+                continue
+
+            self.stdout.write(
+                f"Job {checkpoint_dto.job_id}: resuming after epoch {checkpoint_dto.epoch} "
+                f"of {checkpoint_dto.hyper_params.epochs}"
+            )
+            try:
+                model_dto = classification_service.create_model(
+                    user, checkpoint_dto.hyper_params, job_id=checkpoint_dto.job_id, lane=BATCH
+                )
+            except TrainingRejectedError as error:
+                self.stdout.write(self.style.WARNING(f"Job {checkpoint_dto.job_id}: rejected, {error}"))
+                continue
+
+            self.stdout.write(self.style.SUCCESS(f"Job {checkpoint_dto.job_id}: model {model_dto.id} created"))
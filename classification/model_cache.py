@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from django.conf import settings
+
+from core import metrics
+
+
+class ModelCache:
+    """
+    Per-process cache of the models loaded for predictions, evicting the least recently used model.
+
+    Building a model and loading its weights costs far more than a prediction, so loaded models are kept
+    between requests. A model is loaded once even when several threads ask for it at the same time.
+
+    Methods:
+
+    - get(key, loader): Get the cached model, loading it on a miss.
+    - clear(): Remove all cached models.
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or settings.PREDICTION_MODEL_CACHE_SIZE
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable):
+        """
+        Get the cached model, loading it on a miss.
+
+        Args:
+            key (str): Identifies the architecture and the weights of the model.
+            loader (Callable): Builds the model with its weights.
+
+        Returns:
+            The cached or the newly loaded model.
+        """
+
+        model = self._get_cached(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            model = self._get_cached(key)
+            if model is not None:
+                return model
+
+            metrics.model_cache_misses.inc()
+            try:
+                model = loader()
+            except Exception:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+
+            with self._lock:
+                self._models[key] = model
+                while len(self._models) > self.capacity:
+                    self._models.popitem(last=False)
+                self._loading.pop(key, None)
+
+        return model
+
+    def clear(self) -> None:
+        """
+        Remove all cached models.
+        """
+
+        with self._lock:
+            self._models.clear()
+
+    def _get_cached(self, key: str):
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+
+        if model is not None:
+            metrics.model_cache_hits.inc()
+
+        return model
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from users.models import UserModel
 
@@ -9,6 +10,27 @@ class ImageModel(models.Model):
     image = models.ImageField(upload_to="images/")
 
 
+class WeightsModel(models.Model):
+    path = models.CharField(max_length=255, unique=True)
+    training_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    references = models.PositiveIntegerField(default=0)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    compressed = models.BooleanField(default=False)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+
+class SweepModel(models.Model):
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+
+    user = models.ForeignKey(to=UserModel, on_delete=models.CASCADE, related_name="sweeps")
+    status = models.CharField(max_length=10, default=STATUS_RUNNING)
+    configurations = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class ClassificationModel(models.Model):
     user = models.ForeignKey(to=UserModel, on_delete=models.CASCADE, related_name="models")
     filters_1_layer = models.PositiveIntegerField()
@@ -16,7 +38,14 @@ class ClassificationModel(models.Model):
     filters_3_layer = models.PositiveIntegerField()
     dense_neurons = models.PositiveIntegerField()
     epochs = models.PositiveIntegerField()
-    weights_path = models.CharField(max_length=50)
+    epochs_trained = models.PositiveIntegerField(null=True, blank=True)
+    weights_path = models.CharField(max_length=255)
+    weights = models.ForeignKey(to=WeightsModel, on_delete=models.PROTECT, null=True, related_name="models")
+    sweep = models.ForeignKey(to=SweepModel, on_delete=models.SET_NULL, null=True, blank=True, related_name="models")
+    base_model = models.ForeignKey(
+        to="self", on_delete=models.SET_NULL, null=True, blank=True, related_name="fine_tuned_models"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class HistoryModel(models.Model):
@@ -0,0 +1,145 @@
+import threading
+import time
+
+
+class _TrainingJob:
+    """State of a single training job shared by its publisher and all of its watchers."""
+
+    def __init__(self):
+        self.owner_id = None
+        self.created_at = time.monotonic()
+        self.events = []
+        self.closed_at = None
+        self.condition = threading.Condition()
+
+    def is_expired(self, now: float, retention: float) -> bool:
+        """Check whether the job finished, or was never started, longer than the retention period ago."""
+        if self.closed_at is not None:
+            return now - self.closed_at > retention
+        return self.owner_id is None and now - self.created_at > retention
+
+
+class ProgressChannel:
+    """
+    In-process publish/subscribe channel for training progress events.
+
+    Events of a job are appended to one shared buffer and every watcher keeps only its own read position,
+    so publishing an event is a single append followed by one wake-up of all watchers, regardless of how
+    many of them follow the job. Late watchers replay the buffer from the beginning.
+
+    The channel lives in the memory of the worker process, so a watcher has to be served by the same
+    process that runs the training.
+    """
+
+    def __init__(self, retention: float = 300.0, keepalive: float = 15.0):
+        self.retention = retention
+        self.keepalive = keepalive
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def open(self, job_id: str, owner_id: int) -> None:
+        """
+        Register a training job before it starts publishing events.
+
+        Args:
+            job_id (str): The identifier of the training job.
+            owner_id (int): The ID of the user who started the training.
+        """
+
+        job = self._get_job(job_id)
+        with job.condition:
+            job.owner_id = owner_id
+            job.events.clear()
+            job.closed_at = None
+
+    def publish(self, job_id: str, event_type: str, data: dict) -> None:
+        """
+        Publish an event to all watchers of the job.
+
+        Args:
+            job_id (str): The identifier of the training job.
+            event_type (str): The type of the event, e.g. "epoch" or "step".
+            data (dict): JSON serializable payload of the event.
+        """
+
+        job = self._get_job(job_id)
+        with job.condition:
+            job.events.append((event_type, data))
+            job.condition.notify_all()
+
+    def close(self, job_id: str, event_type: str, data: dict) -> None:
+        """
+        Publish the final event of the job and stop its watchers.
+
+        Args:
+            job_id (str): The identifier of the training job.
+            event_type (str): The type of the final event, e.g. "completed" or "failed".
+            data (dict): JSON serializable payload of the event.
+        """
+
+        job = self._get_job(job_id)
+        with job.condition:
+            job.events.append((event_type, data))
+            job.closed_at = time.monotonic()
+            job.condition.notify_all()
+
+    def subscribe(self, job_id: str, user_id: int, last_event_id: int = -1):
+        """
+        Iterate over the events of the job as they are published.
+
+        The iterator yields (event_id, event_type, data) tuples and None when no event was published during
+        the keepalive interval. It stops after the final event of the job, when the job belongs to another user
+        or when the job is not started within the retention period.
+
+        Args:
+            job_id (str): The identifier of the training job.
+            user_id (int): The ID of the user watching the job.
+            last_event_id (int): The ID of the last event already received by the watcher.
+        """
+
+        job = self._get_job(job_id)
+        position = last_event_id + 1
+
+        while True:
+            with job.condition:
+                if position >= len(job.events) and job.closed_at is None:
+                    job.condition.wait(self.keepalive)
+                if job.owner_id is not None and job.owner_id != user_id:
+                    return
+                if job.is_expired(time.monotonic(), self.retention):
+                    return
+                events = job.events[position:] if job.owner_id is not None else []
+                closed = job.closed_at is not None and job.owner_id is not None
+
+            if not events and not closed:
+                yield None
+                continue
+
+            for event_type, data in events:
+                yield position, event_type, data
+                position += 1
+
+            if closed and position >= len(job.events):
+                return
+
+    def _get_job(self, job_id: str) -> _TrainingJob:
+        """
+        Get the job with the given identifier, creating it on first use and dropping expired jobs.
+
+        Args:
+            job_id (str): The identifier of the training job.
+
+        Returns:
+            _TrainingJob - The state of the job.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, job in self._jobs.items() if job.is_expired(now, self.retention)]
+            for key in expired:
+                del self._jobs[key]
+
+            return self._jobs.setdefault(job_id, _TrainingJob())
+
+
+progress_channel = ProgressChannel()
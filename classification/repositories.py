@@ -1,12 +1,24 @@
+from datetime import datetime, timedelta
+
 from annoying.functions import get_object_or_None
-from django.db.models import QuerySet
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, QuerySet
 
 from core.exceptions import InstanceNotExistError
-from users.models import UserModel
 
-from .dto import CreateImageDTO, HistoryDTO, ImageDTO, ModelDTO, ModelListDTO
-from .interfaces import ImageRepositoryInterface
-from .models import ClassificationModel, HistoryModel, ImageModel
+from .dto import (
+    ChartDataDTO,
+    CreateImageDTO,
+    HistoryDTO,
+    ImageDTO,
+    ModelDTO,
+    ModelListDTO,
+    SweepDTO,
+    SweepResultDTO,
+    WeightsDTO,
+)
+from .interfaces import ImageRepositoryInterface, SweepRepositoryInterface, WeightsRepositoryInterface
+from .models import ClassificationModel, HistoryModel, ImageModel, SweepModel, WeightsModel
 
 
 class ImageRepository(ImageRepositoryInterface):
@@ -33,9 +45,7 @@ class ImageRepository(ImageRepositoryInterface):
 
         """
 
-        user = get_object_or_None(UserModel, id=image_dto.user_id)
-
-        image = ImageModel.objects.create(user=user, title=image_dto.title, image=image_dto.image)
+        image = ImageModel.objects.create(user_id=image_dto.user_id, title=image_dto.title, image=image_dto.image)
 
         return self._image_to_dto(image)
 
@@ -51,7 +61,7 @@ class ImageRepository(ImageRepositoryInterface):
             ImageDTO - Data Transfer Object representing image data.
         """
 
-        return ImageDTO(id=image.pk, user_id=image.user.pk, title=image.title, image=image.image.url)
+        return ImageDTO(id=image.pk, user_id=image.user_id, title=image.title, image=image.image.url)
 
 
 class ClassificationModelRepository:
@@ -64,22 +74,32 @@ class ClassificationModelRepository:
     Methods:
 
     - create_model: Create a new Classification Model with specified hyperparameters, weights, and training history.
+    - get_model_by_training_key: Retrieve a model trained with the given training key.
+    - copy_model: Create a new Classification Model for a user, sharing the weights and history of an existing one.
     """
 
-    def create_model(self, user, hyper_params_dto, weights_path, history) -> ModelDTO:
+    @transaction.atomic
+    def create_model(
+        self, user, hyper_params_dto, weights_dto, history, training_key=None, sweep_id=None, base_model_id=None
+    ) -> ModelDTO:
         """
         Create a new Classification Model with the provided parameters.
 
         Args:
             user: The user associated with the model.
             hyper_params_dto: Data transfer object containing hyperparameters for model creation.
-            weights_path: The path to the pre-trained weights for the model.
+            weights_dto: The path, the size and the hash of the trained weights of the model.
             history: The training history of the model.
+            training_key: The key of the training result, used to reuse the weights for identical trainings.
+            sweep_id: The ID of the hyperparameter sweep the model was trained in.
+            base_model_id: The ID of the model the training was started from, for fine-tuned models.
 
         Returns:
             ModelDTO - Data transfer object containing information about the created model.
         """
 
+        weights = self._create_weights(weights_dto, training_key)
+
         model = ClassificationModel.objects.create(
             user=user,
             filters_1_layer=hyper_params_dto.filters_1_layer,
@@ -87,7 +107,11 @@ class ClassificationModelRepository:
             filters_3_layer=hyper_params_dto.filters_3_layer,
             dense_neurons=hyper_params_dto.dense_neurons,
             epochs=hyper_params_dto.epochs,
-            weights_path=weights_path,
+            epochs_trained=len(history.history["accuracy"]),
+            weights_path=weights_dto.path,
+            weights=weights,
+            sweep_id=sweep_id,
+            base_model_id=base_model_id,
         )
 
         accuracy = history.history["accuracy"]
@@ -95,21 +119,119 @@ class ClassificationModelRepository:
         loss = history.history["loss"]
         val_loss = history.history["val_loss"]
 
-        model_history = []
-        for index in range(len(accuracy)):
-            model_history.append(
-                HistoryModel.objects.create(
-                    model=model,
-                    epoch_number=index + 1,
-                    val_accuracy=val_accuracy[index],
-                    accuracy=accuracy[index],
-                    loss=loss[index],
-                    val_loss=val_loss[index],
-                )
+        model_history = HistoryModel.objects.bulk_create(
+            HistoryModel(
+                model=model,
+                epoch_number=index + 1,
+                val_accuracy=val_accuracy[index],
+                accuracy=accuracy[index],
+                loss=loss[index],
+                val_loss=val_loss[index],
             )
+            for index in range(len(accuracy))
+        )
         history_list_dto = self._history_to_list_dto(model_history)
         return self._model_to_dto(model, history_list_dto)
 
+    def get_model_by_training_key(self, training_key: str) -> ModelDTO | None:
+        """
+        Retrieve a model whose weights were trained with the given training key.
+
+        Args:
+            training_key (str): The key of the training result.
+
+        Returns:
+            ModelDTO | None - Data transfer object of the model, or None if no model was trained with this key.
+        """
+
+        model = ClassificationModel.objects.filter(weights__training_key=training_key).first()
+        if not model:
+            return None
+
+        history = HistoryModel.objects.filter(model=model)
+        history_list_dto = self._history_to_list_dto(history)
+
+        return self._model_to_dto(model, history_list_dto)
+
+    @transaction.atomic
+    def copy_model(self, user, model_id: int) -> ModelDTO:
+        """
+        Create a new Classification Model for the user, sharing the weights and copying the history of the given one.
+
+        Args:
+            user: The user associated with the new model.
+            model_id (int): The unique identifier of the model to copy.
+
+        Returns:
+            ModelDTO - Data transfer object containing information about the created model.
+
+        Raises:
+            InstanceNotExistError: If the specified model or its weights do not exist.
+        """
+
+        source = get_object_or_None(ClassificationModel, pk=model_id)
+        if not source:
+            raise InstanceNotExistError(message=f"Model with id {model_id} does not exist")
+
+        # Locked like in release_weights, so the weights are not deleted while the new reference is taken.
+        if source.weights_id and not WeightsModel.objects.select_for_update().filter(pk=source.weights_id).exists():
+            raise InstanceNotExistError(message=f"Weights of the model with id {model_id} do not exist")
+
+        model = ClassificationModel.objects.create(
+            user=user,
+            filters_1_layer=source.filters_1_layer,
+            filters_2_layer=source.filters_2_layer,
+            filters_3_layer=source.filters_3_layer,
+            dense_neurons=source.dense_neurons,
+            epochs=source.epochs,
+            epochs_trained=source.epochs_trained,
+            weights_path=source.weights_path,
+            weights_id=source.weights_id,
+        )
+        WeightsModel.objects.filter(pk=source.weights_id).update(references=F("references") + 1)
+
+        model_history = HistoryModel.objects.bulk_create(
+            HistoryModel(
+                model=model,
+                epoch_number=epoch.epoch_number,
+                accuracy=epoch.accuracy,
+                val_accuracy=epoch.val_accuracy,
+                loss=epoch.loss,
+                val_loss=epoch.val_loss,
+            )
+            for epoch in HistoryModel.objects.filter(model=source).order_by("epoch_number")
+        )
+        history_list_dto = self._history_to_list_dto(model_history)
+
+        return self._model_to_dto(model, history_list_dto)
+
+    @staticmethod
+    def _create_weights(weights_dto: WeightsDTO, training_key: str = None) -> WeightsModel:
+        """
+        Register a weights file referenced by one model.
+
+        The training key is only stored if no other weights were registered with it, so the first result of
+        identical trainings is the one that gets reused.
+
+        Args:
+            weights_dto (WeightsDTO): The path, the size and the hash of the weights file.
+            training_key (str): The key of the training result.
+
+        Returns:
+            WeightsModel - The created weights record.
+        """
+
+        fields = {"path": weights_dto.path, "size": weights_dto.size, "sha256": weights_dto.sha256, "references": 1}
+
+        if training_key:
+            try:
+                with transaction.atomic():
+                    return WeightsModel.objects.create(training_key=training_key, **fields)
+            except IntegrityError:
+                pass
+
+        return WeightsModel.objects.create(**fields)
+
     @staticmethod
     def _model_to_dto(model: ClassificationModel, history_list_dto) -> ModelDTO:
         """
@@ -125,13 +247,17 @@ class ClassificationModelRepository:
 
         return ModelDTO(
             id=model.pk,
-            user_id=model.user.pk,
+            user_id=model.user_id,
             filters_1_layer=model.filters_1_layer,
             filters_2_layer=model.filters_2_layer,
             filters_3_layer=model.filters_3_layer,
             dense_neurons=model.dense_neurons,
             epochs=model.epochs,
+            epochs_trained=model.epochs_trained,
             weights_path=model.weights_path,
+            weights=WeightsRepository._weights_to_dto(model.weights) if model.weights_id else None,
+            base_model_id=model.base_model_id,
+            updated_at=model.updated_at,
             history=history_list_dto,
         )
 
@@ -148,7 +274,7 @@ class ClassificationModelRepository:
         """
         return HistoryDTO(
             id=history.pk,
-            class_model_id=history.model.pk,
+            class_model_id=history.model_id,
             epoch_number=history.epoch_number,
             accuracy=history.accuracy,
             val_accuracy=history.val_accuracy,
@@ -185,7 +311,7 @@ class ClassificationModelRepository:
             InstanceNotExistError: If the specified model does not exist.
         """
 
-        model = get_object_or_None(ClassificationModel, pk=model_id, user=user)
+        model = get_object_or_None(ClassificationModel.objects.select_related("weights"), pk=model_id, user=user)
         if not model:
             raise InstanceNotExistError(message=f"Model with id {model_id} does not exist")
 
@@ -194,6 +320,67 @@ class ClassificationModelRepository:
 
         return self._model_to_dto(model, history_list_dto)
 
+    def get_user_model_metrics(self, user, model_id: int, metrics: tuple) -> ChartDataDTO:
+        """
+        Retrieve the metric series of the training history of a classification model owned by the user.
+
+        Only the requested columns are read, without building an object per epoch.
+
+        Args:
+            user: The user associated with the model.
+            model_id (int): The unique identifier of the model.
+            metrics (tuple): The names of the history metrics.
+
+        Returns:
+            ChartDataDTO: The epoch numbers and the values of every metric per epoch.
+
+        Raises:
+            InstanceNotExistError: If the specified model does not exist.
+        """
+
+        if not ClassificationModel.objects.filter(pk=model_id, user=user).exists():
+            raise InstanceNotExistError(message=f"Model with id {model_id} does not exist")
+
+        rows = HistoryModel.objects.filter(model_id=model_id).order_by("epoch_number")
+        columns = list(zip(*rows.values_list("epoch_number", *metrics))) or [[] for _ in range(len(metrics) + 1)]
+
+        return ChartDataDTO(
+            epochs=list(columns[0]), series={name: list(values) for name, values in zip(metrics, columns[1:])}
+        )
+
+    def get_user_model_updated_at(self, user, model_id: int) -> datetime | None:
+        """
+        Retrieve when a classification model owned by the user was last saved, without loading the model.
+
+        Args:
+            user: The user associated with the model.
+            model_id (int): The unique identifier of the model.
+
+        Returns:
+            datetime | None: The time of the last save, or None if the model does not exist.
+        """
+
+        return ClassificationModel.objects.filter(pk=model_id, user=user).values_list("updated_at", flat=True).first()
+
+    def get_user_models_version(self, user) -> str:
+        """
+        Retrieve a version of the list of classification models owned by the user, in one aggregate query.
+
+        Args:
+            user: The user associated with the models.
+
+        Returns:
+            str: The number of models and the time of the last save, changing whenever a model of the user is
+            created, saved or deleted.
+        """
+
+        aggregate = ClassificationModel.objects.filter(user=user).aggregate(
+            count=Count("pk"), updated_at=Max("updated_at")
+        )
+        updated_at = aggregate["updated_at"].timestamp() if aggregate["updated_at"] else 0
+
+        return f"{aggregate['count']}-{updated_at}"
+
     def get_user_models(self, user) -> list[ModelListDTO]:
         """
         Retrieve a list of classification models owned by the user.
@@ -209,6 +396,21 @@ class ClassificationModelRepository:
 
         return self._models_to_list_dto(models)
 
+    def get_user_models_with_weights(self, user) -> list[ModelDTO]:
+        """
+        Retrieve the classification models owned by the user with their weights, without their history.
+
+        Args:
+            user: The user associated with the models.
+
+        Returns:
+            list[ModelDTO]: Data transfer objects of the user's models, with an empty history.
+        """
+
+        models = ClassificationModel.objects.filter(user=user).select_related("weights").order_by("pk")
+
+        return [self._model_to_dto(model, []) for model in models]
+
     @staticmethod
     def _model_list_to_dto(model: ClassificationModel) -> ModelListDTO:
         """
@@ -223,12 +425,13 @@ class ClassificationModelRepository:
 
         return ModelListDTO(
             id=model.pk,
-            user_id=model.user.pk,
+            user_id=model.user_id,
             filters_1_layer=model.filters_1_layer,
             filters_2_layer=model.filters_2_layer,
             filters_3_layer=model.filters_3_layer,
             dense_neurons=model.dense_neurons,
             epochs=model.epochs,
+            epochs_trained=model.epochs_trained,
         )
 
     def _models_to_list_dto(self, models: QuerySet[ClassificationModel]) -> list[ModelListDTO]:
@@ -244,3 +447,259 @@ class ClassificationModelRepository:
         model_list_dto = [self._model_list_to_dto(model) for model in models]
 
         return model_list_dto
+
+
+class SweepRepository(SweepRepositoryInterface):
+    """
+    Repository for managing hyperparameter sweeps.
+
+    Methods:
+
+    - create_sweep: Save a started sweep.
+    - finish_sweep: Mark a sweep as completed or failed.
+    - get_user_sweep: Retrieve a sweep owned by the user with its models ranked by validation accuracy.
+    """
+
+    def create_sweep(self, user, configurations: int) -> SweepDTO:
+        """
+        Save a started sweep.
+
+        Args:
+            user: The user who started the sweep.
+            configurations (int): The number of trained hyperparameter configurations.
+
+        Returns:
+            SweepDTO - Data transfer object containing information about the sweep.
+        """
+
+        sweep = SweepModel.objects.create(user=user, configurations=configurations)
+
+        return self._sweep_to_dto(sweep, results=[])
+
+    def finish_sweep(self, sweep_id: int, succeeded: bool) -> None:
+        """
+        Mark a sweep as completed or failed.
+
+        Args:
+            sweep_id (int): The unique identifier of the sweep.
+            succeeded (bool): Whether all configurations of the sweep were trained.
+        """
+
+        status = SweepModel.STATUS_COMPLETED if succeeded else SweepModel.STATUS_FAILED
+        SweepModel.objects.filter(pk=sweep_id).update(status=status)
+
+    def get_user_sweep(self, user, sweep_id: int) -> SweepDTO:
+        """
+        Retrieve a sweep owned by the user with its models ranked by the validation accuracy of their last epoch.
+
+        Args:
+            user: The user who started the sweep.
+            sweep_id (int): The unique identifier of the sweep.
+
+        Returns:
+            SweepDTO - Data transfer object containing the sweep and its ranked results.
+
+        Raises:
+            InstanceNotExistError: If the specified sweep does not exist.
+        """
+
+        sweep = get_object_or_None(SweepModel, pk=sweep_id, user=user)
+        if not sweep:
+            raise InstanceNotExistError(message=f"Sweep with id {sweep_id} does not exist")
+
+        results = []
+        for model in ClassificationModel.objects.filter(sweep=sweep).prefetch_related("history"):
+            last_epoch = max(model.history.all(), key=lambda epoch: epoch.epoch_number, default=None)
+            if not last_epoch:
+                continue
+
+            results.append(
+                SweepResultDTO(
+                    model=ClassificationModelRepository._model_list_to_dto(model),
+                    accuracy=last_epoch.accuracy,
+                    val_accuracy=last_epoch.val_accuracy,
+                )
+            )
+        results.sort(key=lambda result: result.val_accuracy, reverse=True)
+
+        return self._sweep_to_dto(sweep, results)
+
+    @staticmethod
+    def _sweep_to_dto(sweep: SweepModel, results: list[SweepResultDTO]) -> SweepDTO:
+        """
+        Convert a SweepModel instance to a SweepDTO.
+
+        Args:
+            sweep (SweepModel): The sweep instance.
+            results (list[SweepResultDTO]): The ranked results of the sweep.
+
+        Returns:
+            SweepDTO - Data Transfer Object representing sweep data.
+        """
+
+        return SweepDTO(
+            id=sweep.pk,
+            user_id=sweep.user_id,
+            status=sweep.status,
+            configurations=sweep.configurations,
+            created_at=sweep.created_at,
+            results=results,
+        )
+
+
+class WeightsRepository(WeightsRepositoryInterface):
+    """
+    Repository for managing the records of the weights files.
+
+    Methods:
+
+    - touch_weights: Record that the weights were served.
+    - get_cold_weights: Retrieve uncompressed weights not served since a given time.
+    - set_compressed: Record that the weights were moved to the compressed tier.
+    - get_unreferenced_weights: Retrieve weights no model refers to.
+    - delete_weights: Delete the record of weights.
+    - get_referenced_paths: Retrieve the paths of all weights files in use.
+    - get_untracked_paths: Retrieve weights paths of models without a weights record.
+    - track_weights: Create the record of untracked weights.
+    - get_compressed_hashes: Retrieve the hashes of all compressed weights.
+    """
+
+    TOUCH_INTERVAL = timedelta(hours=1)
+
+    def touch_weights(self, weights_ids: list[int], used_at: datetime) -> None:
+        """
+        Record that the weights were served, at most once per TOUCH_INTERVAL to spare writes on every prediction.
+
+        Args:
+            weights_ids (list[int]): The unique identifiers of the weights.
+            used_at (datetime): The time the weights were served.
+        """
+
+        WeightsModel.objects.filter(pk__in=weights_ids, last_used_at__lt=used_at - self.TOUCH_INTERVAL).update(
+            last_used_at=used_at
+        )
+
+    def get_cold_weights(self, unused_since: datetime) -> list[WeightsDTO]:
+        """
+        Retrieve uncompressed weights that were not served since the given time.
+
+        Args:
+            unused_since (datetime): The time since which the weights were not served.
+
+        Returns:
+            list[WeightsDTO] - Data transfer objects of the cold weights.
+        """
+
+        weights = WeightsModel.objects.filter(compressed=False, last_used_at__lt=unused_since).exclude(sha256="")
+
+        return [self._weights_to_dto(record) for record in weights]
+
+    def set_compressed(self, weights_id: int) -> None:
+        """
+        Record that the weights were moved to the compressed tier.
+
+        Args:
+            weights_id (int): The unique identifier of the weights.
+        """
+
+        WeightsModel.objects.filter(pk=weights_id).update(compressed=True)
+
+    def get_unreferenced_weights(self) -> list[WeightsDTO]:
+        """
+        Retrieve weights no model refers to.
+
+        Returns:
+            list[WeightsDTO] - Data transfer objects of the unreferenced weights.
+        """
+
+        weights = WeightsModel.objects.filter(Q(references=0) | Q(models__isnull=True)).distinct()
+
+        return [self._weights_to_dto(record) for record in weights]
+
+    def delete_weights(self, weights_id: int) -> None:
+        """
+        Delete the record of weights.
+
+        Args:
+            weights_id (int): The unique identifier of the weights.
+        """
+
+        WeightsModel.objects.filter(pk=weights_id).delete()
+
+    def get_referenced_paths(self) -> set[str]:
+        """
+        Retrieve the paths of all weights files in use, tracked or not.
+
+        Returns:
+            set[str] - The paths of the weights files.
+        """
+
+        paths = set(WeightsModel.objects.values_list("path", flat=True))
+        paths.update(ClassificationModel.objects.values_list("weights_path", flat=True))
+
+        return paths
+
+    def get_untracked_paths(self) -> list[str]:
+        """
+        Retrieve the weights paths of models stored before their weights were tracked.
+
+        Returns:
+            list[str] - The distinct paths of the untracked weights files.
+        """
+
+        return list(
+            ClassificationModel.objects.filter(weights__isnull=True)
+            .order_by("weights_path")
+            .values_list("weights_path", flat=True)
+            .distinct()
+        )
+
+    @transaction.atomic
+    def track_weights(self, weights_dto: WeightsDTO) -> WeightsDTO:
+        """
+        Create the record of untracked weights and link the models using them.
+
+        Args:
+            weights_dto (WeightsDTO): The path, the size and the hash of the weights file.
+
+        Returns:
+            WeightsDTO - Data transfer object of the created record.
+        """
+
+        models = ClassificationModel.objects.filter(weights__isnull=True, weights_path=weights_dto.path)
+        weights = WeightsModel.objects.create(
+            path=weights_dto.path, size=weights_dto.size, sha256=weights_dto.sha256, references=models.count()
+        )
+        models.update(weights=weights)
+
+        return self._weights_to_dto(weights)
+
+    def get_compressed_hashes(self) -> set[str]:
+        """
+        Retrieve the hashes of all compressed weights.
+
+        Returns:
+            set[str] - The SHA-256 hashes of the compressed weights.
+        """
+
+        return set(WeightsModel.objects.filter(compressed=True).values_list("sha256", flat=True))
+
+    @staticmethod
+    def _weights_to_dto(weights: WeightsModel) -> WeightsDTO:
+        """
+        Convert a WeightsModel instance to a WeightsDTO.
+
+        Args:
+            weights (WeightsModel): The weights instance.
+
+        Returns:
+            WeightsDTO - Data Transfer Object representing weights data.
+        """
+
+        return WeightsDTO(
+            id=weights.pk,
+            path=weights.path,
+            size=weights.size,
+            sha256=weights.sha256,
+            compressed=weights.compressed,
+        )
@@ -0,0 +1,108 @@
+import logging
+import os
+
+import tensorflow as tf
+from django.conf import settings
+
+from .dto import RuntimeProfileDTO
+
+logger = logging.getLogger(__name__)
+
+INFERENCE = "inference"
+TRAINING = "training"
+
+
+def get_runtime_profile(role: str) -> RuntimeProfileDTO:
+    """
+    Build the TensorFlow runtime profile for the given process role.
+
+    The available CPUs are split into a training share and an inference share. Inference threads are
+    divided between the web workers of the host, so that several workers do not oversubscribe the cores,
+    while training uses its whole share with a small inter-op pool.
+
+    Args:
+        role (str): The process role, either "inference" or "training".
+
+    Returns:
+        RuntimeProfileDTO - Thread pool sizes and the optional CPU set for the role.
+
+    Raises:
+        ValueError: If the role is unknown.
+    """
+
+    if role not in (INFERENCE, TRAINING):
+        raise ValueError(f"Unknown TensorFlow runtime role: {role}")
+
+    config = settings.TF_RUNTIME
+    cpus = _get_available_cpus()
+
+    training_count = min(len(cpus) - 1, round(len(cpus) * config["training_cpu_share"])) if len(cpus) > 1 else 0
+    training_cpus = cpus[len(cpus) - training_count :] or cpus
+    inference_cpus = cpus[: len(cpus) - training_count]
+
+    if role == TRAINING:
+        intra_op_threads = len(training_cpus)
+        inter_op_threads = min(2, len(training_cpus))
+        role_cpus = training_cpus
+    else:
+        intra_op_threads = max(1, len(inference_cpus) // max(1, config["web_workers"]))
+        inter_op_threads = 1
+        role_cpus = inference_cpus
+
+    role_config = config[role]
+
+    return RuntimeProfileDTO(
+        role=role,
+        intra_op_threads=role_config["intra_op_threads"] or intra_op_threads,
+        inter_op_threads=role_config["inter_op_threads"] or inter_op_threads,
+        cpu_affinity=role_cpus if config["cpu_pinning"] else None,
+    )
+
+
+def configure_runtime(role: str) -> RuntimeProfileDTO:
+    """
+    Apply the runtime profile of the given role to the current process.
+
+    Thread pool sizes can only be changed before TensorFlow executes its first operation, so this
+    should be called on process startup.
+
+    Args:
+        role (str): The process role, either "inference" or "training".
+
+    Returns:
+        RuntimeProfileDTO - The applied profile.
+    """
+
+    profile = get_runtime_profile(role)
+
+    if profile.cpu_affinity and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, profile.cpu_affinity)
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(profile.intra_op_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(profile.inter_op_threads)
+    except RuntimeError:
+        logger.warning("TensorFlow is already initialized, the %s runtime profile is not applied", role)
+        return profile
+
+    logger.info(
+        "TensorFlow %s profile: intra_op_threads=%s, inter_op_threads=%s, cpu_affinity=%s",
+        role,
+        profile.intra_op_threads,
+        profile.inter_op_threads,
+        profile.cpu_affinity,
+    )
+    return profile
+
+
+def _get_available_cpus() -> list[int]:
+    """
+    Get the CPUs the current process is allowed to run on.
+
+    Returns:
+        list[int] - Sorted CPU ids, falling back to os.cpu_count() where affinity is not supported.
+    """
+
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
@@ -0,0 +1,413 @@
+import collections
+import contextlib
+import fcntl
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from core.exceptions import TrainingRejectedError
+
+from .dto import TrainingCostDTO, TrainingQueueMetricsDTO
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Priority lanes in the order they are served, a lane is only served while the lanes before it are empty.
+LANES = (INTERACTIVE, BATCH)
+
+
+class TrainingAdmissionController:
+    """
+    Admission control of trainings against the CPU and memory budgets of the host.
+
+    Every running training holds a claim of CPU cores and of its estimated peak memory in a ledger file
+    shared by all processes of the host, so web workers and sweep threads draw from the same budgets.
+    Claims of processes that exited without releasing them are dropped.
+
+    Attributes:
+        ledger_path (str): The JSON file with the claims of the running trainings.
+        cpu_budget (int): CPU cores available to trainings on the host.
+        memory_budget (int): Memory in bytes available to trainings on the host.
+        max_cpu_seconds (float): The longest estimated CPU time of an admitted training.
+
+    Methods:
+
+    - check(cost_dto): Reject a training that can never be admitted.
+    - try_claim(cost_dto, cpus): Claim the resources of a training if they are available.
+    - release(claim_id): Release the resources of a finished training.
+    - get_usage(): Get the CPU cores and the memory claimed by the running trainings.
+    """
+
+    def __init__(
+        self,
+        ledger_path: str = None,
+        cpu_budget: int = None,
+        memory_budget: int = None,
+        max_cpu_seconds: float = None,
+    ):
+        self.ledger_path = ledger_path or settings.TRAINING_LEDGER_PATH
+        self.cpu_budget = cpu_budget or settings.TRAINING_CPU_BUDGET
+        self.memory_budget = memory_budget or settings.TRAINING_MEMORY_BUDGET_MB * 1024 * 1024
+        self.max_cpu_seconds = max_cpu_seconds or settings.TRAINING_MAX_CPU_SECONDS
+
+    def check(self, cost_dto: TrainingCostDTO) -> None:
+        """
+        Reject a training that exceeds the budgets on its own, even on an idle host.
+
+        Args:
+            cost_dto (TrainingCostDTO): The estimated cost of the training.
+
+        Raises:
+            TrainingRejectedError: If the training exceeds the memory budget or the CPU time limit.
+        """
+
+        if cost_dto.peak_memory_bytes > self.memory_budget:
+            raise TrainingRejectedError(
+                f"Estimated peak memory of {cost_dto.peak_memory_bytes} bytes exceeds the budget of "
+                f"{self.memory_budget} bytes"
+            )
+
+        if cost_dto.cpu_seconds > self.max_cpu_seconds:
+            raise TrainingRejectedError(
+                f"Estimated CPU time of {cost_dto.cpu_seconds:.0f} s exceeds the limit of {self.max_cpu_seconds} s"
+            )
+
+    def try_claim(self, cost_dto: TrainingCostDTO, cpus: int) -> str | None:
+        """
+        Claim the resources of a training if they fit next to the claims of the running trainings.
+
+        Args:
+            cost_dto (TrainingCostDTO): The estimated cost of the training.
+            cpus (int): CPU cores used by the training, capped at the CPU budget.
+
+        Returns:
+            str | None - The identifier of the claim, or None if the resources are not available.
+        """
+
+        claim = {"pid": os.getpid(), "cpus": min(cpus, self.cpu_budget), "memory": cost_dto.peak_memory_bytes}
+
+        with self._open_ledger() as claims:
+            claimed_cpus, claimed_memory = self._sum_claims(claims)
+            if claimed_cpus + claim["cpus"] > self.cpu_budget or claimed_memory + claim["memory"] > self.memory_budget:
+                return None
+
+            claim_id = uuid.uuid4().hex
+            claims[claim_id] = claim
+            return claim_id
+
+    def release(self, claim_id: str) -> None:
+        """
+        Release the resources of a finished training.
+
+        Args:
+            claim_id (str): The identifier returned by try_claim.
+        """
+
+        with self._open_ledger() as claims:
+            claims.pop(claim_id, None)
+
+    def get_usage(self) -> tuple[int, int]:
+        """
+        Get the resources claimed by the running trainings of the host.
+
+        Returns:
+            tuple[int, int] - The claimed CPU cores and the claimed memory in bytes.
+        """
+
+        with self._open_ledger() as claims:
+            return self._sum_claims(claims)
+
+    @contextlib.contextmanager
+    def _open_ledger(self):
+        """
+        Lock the ledger file exclusively and yield its claims, writing them back when the block exits.
+
+        Claims of processes that no longer exist are dropped.
+        """
+
+        os.makedirs(os.path.dirname(self.ledger_path) or ".", exist_ok=True)
+        with open(self.ledger_path, "a+") as ledger_file:
+            fcntl.flock(ledger_file, fcntl.LOCK_EX)
+            try:
+                ledger_file.seek(0)
+                content = ledger_file.read()
+                claims = json.loads(content) if content else {}
+                claims = {claim_id: claim for claim_id, claim in claims.items() if self._is_alive(claim["pid"])}
+
+                yield claims
+
+                ledger_file.seek(0)
+                ledger_file.truncate()
+                ledger_file.write(json.dumps(claims))
+                ledger_file.flush()
+            finally:
+                fcntl.flock(ledger_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _sum_claims(claims: dict) -> tuple[int, int]:
+        return sum(claim["cpus"] for claim in claims.values()), sum(claim["memory"] for claim in claims.values())
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+
+class _QueuedTraining:
+    """A training waiting in the queue of the scheduler."""
+
+    def __init__(self, user_id: int, cost_dto: TrainingCostDTO, cpus: int, lane: str, start_tag: float, sequence: int):
+        self.user_id = user_id
+        self.cost_dto = cost_dto
+        self.cpus = cpus
+        self.lane = lane
+        self.start_tag = start_tag
+        self.sequence = sequence
+        self.enqueued_at = time.monotonic()
+
+    def get_order(self) -> tuple:
+        return LANES.index(self.lane), self.start_tag, self.sequence
+
+
+class FairShareScheduler:
+    """
+    Fair-share scheduler deciding which waiting training is admitted next.
+
+    Waiting trainings are served by priority lane and, within a lane, by start-time fair queuing across
+    users: every training is tagged with the virtual time the previous trainings of its user finish at,
+    which then advances by its estimated CPU time divided by the weight of the user, and the lowest tag
+    is served first. A user submitting many trainings therefore only delays their own trainings.
+    Only the first eligible training tries to claim resources from the admission controller, so a large
+    training at the head of the queue is not overtaken indefinitely by smaller ones.
+
+    Per-user quotas limit the number of running trainings, which only delays further trainings of the user,
+    and the CPU time started within the quota window, including the waiting trainings, beyond which new
+    trainings are rejected.
+
+    The queue and the metrics live in the memory of the process, like the progress channel, while the
+    resources are claimed from the host-wide admission controller.
+
+    Attributes:
+        admission_controller (TrainingAdmissionController): Claims the resources of the admitted trainings.
+        max_concurrent (int): Running trainings per user.
+        cpu_seconds_quota (float): Estimated CPU time a user may start within the quota window.
+        quota_window (float): Seconds the CPU time quota applies to.
+        queue_timeout (float): Seconds a training waits before it is rejected.
+        poll_interval (float): Seconds between attempts to claim the resources of the first waiting training.
+
+    Methods:
+
+    - check(user_id, cost_dto): Reject a training that exceeds the budgets or the quota of the user.
+    - schedule(user_id, cost_dto, cpus, lane, weight): Context manager waiting for the turn of a training
+      and holding its resources while it runs.
+    - get_metrics(): Get the queue depth and the waiting times.
+    """
+
+    def __init__(
+        self,
+        admission_controller: TrainingAdmissionController,
+        max_concurrent: int = None,
+        cpu_seconds_quota: float = None,
+        quota_window: float = None,
+        queue_timeout: float = None,
+        poll_interval: float = 1.0,
+        wait_samples: int = 1000,
+    ):
+        self.admission_controller = admission_controller
+        self.max_concurrent = max_concurrent or settings.TRAINING_USER_MAX_CONCURRENT
+        self.cpu_seconds_quota = cpu_seconds_quota or settings.TRAINING_USER_CPU_SECONDS
+        self.quota_window = quota_window or settings.TRAINING_USER_QUOTA_WINDOW
+        self.queue_timeout = settings.TRAINING_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.poll_interval = poll_interval
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._finish_tags = {}
+        self._running = collections.Counter()
+        self._started = collections.defaultdict(collections.deque)
+        self._waits = collections.deque(maxlen=wait_samples)
+        self._rejected = 0
+
+    def check(self, user_id: int, cost_dto: TrainingCostDTO) -> None:
+        """
+        Reject a training that exceeds the budgets of the host or the CPU time quota of the user.
+
+        Args:
+            user_id (int): The ID of the user who starts the training.
+            cost_dto (TrainingCostDTO): The estimated cost of the training.
+
+        Raises:
+            TrainingRejectedError: If the training can never be admitted, or the quota of the user is used up;
+              the latter is retryable.
+        """
+
+        with self._condition:
+            try:
+                self.admission_controller.check(cost_dto)
+                self._check_quota(user_id, cost_dto)
+            except TrainingRejectedError:
+                self._rejected += 1
+                raise
+
+    @contextlib.contextmanager
+    def schedule(self, user_id: int, cost_dto: TrainingCostDTO, cpus: int, lane: str = INTERACTIVE, weight=1.0):
+        """
+        Wait for the turn of a training and hold its resources for the duration of the with block.
+
+        Args:
+            user_id (int): The ID of the user who starts the training.
+            cost_dto (TrainingCostDTO): The estimated cost of the training.
+            cpus (int): CPU cores used by the training.
+            lane (str): The priority lane of the training, one of LANES.
+            weight (float): The share of the user relative to other users.
+
+        Raises:
+            TrainingRejectedError: If the training is rejected by check(), or is not admitted within the queue
+              timeout; the latter is retryable.
+        """
+
+        if lane not in LANES:
+            raise ValueError(f"Unknown training lane: {lane}")
+
+        with self._condition:
+            self.check(user_id, cost_dto)
+
+            start_tag = max(self._virtual_time, self._finish_tags.get(user_id, 0.0))
+            self._finish_tags[user_id] = start_tag + cost_dto.cpu_seconds / weight
+            queued_training = _QueuedTraining(user_id, cost_dto, cpus, lane, start_tag, next(self._sequence))
+            self._queue.append(queued_training)
+
+        claim_id = self._wait_for_turn(queued_training)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running[user_id] -= 1
+                self.admission_controller.release(claim_id)
+                self._condition.notify_all()
+
+    def get_metrics(self) -> TrainingQueueMetricsDTO:
+        """
+        Get the depth of the queue and the waiting times of the recently started trainings.
+
+        Returns:
+            TrainingQueueMetricsDTO - Waiting trainings per lane, running trainings and waiting time percentiles.
+        """
+
+        with self._condition:
+            waits = sorted(self._waits)
+            queue_depth = collections.Counter(queued_training.lane for queued_training in self._queue)
+
+            return TrainingQueueMetricsDTO(
+                queue_depth={lane: queue_depth[lane] for lane in LANES},
+                running=sum(self._running.values()),
+                started=len(waits),
+                rejected=self._rejected,
+                wait_p50=self._get_percentile(waits, 0.5),
+                wait_p95=self._get_percentile(waits, 0.95),
+                wait_max=waits[-1] if waits else 0.0,
+            )
+
+    def _wait_for_turn(self, queued_training: _QueuedTraining) -> str:
+        """
+        Wait until the training is the first eligible one in the queue and its resources are claimed.
+
+        Args:
+            queued_training (_QueuedTraining): The waiting training.
+
+        Returns:
+            str - The identifier of the resource claim.
+
+        Raises:
+            TrainingRejectedError: If the training is not admitted within the queue timeout.
+        """
+
+        deadline = queued_training.enqueued_at + self.queue_timeout
+
+        with self._condition:
+            while True:
+                if self._get_next() is queued_training:
+                    claim_id = self.admission_controller.try_claim(queued_training.cost_dto, queued_training.cpus)
+                    if claim_id:
+                        self._start(queued_training)
+                        return claim_id
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(queued_training)
+                    self._rejected += 1
+                    self._condition.notify_all()
+                    raise TrainingRejectedError(
+                        f"Training was not admitted within {self.queue_timeout} s", retryable=True
+                    )
+
+                self._condition.wait(min(self.poll_interval, remaining))
+
+    def _get_next(self) -> _QueuedTraining | None:
+        """Get the waiting training to be served next, skipping users at their concurrency quota."""
+
+        eligible = [
+            queued_training
+            for queued_training in self._queue
+            if self._running[queued_training.user_id] < self.max_concurrent
+        ]
+        return min(eligible, key=_QueuedTraining.get_order, default=None)
+
+    def _start(self, queued_training: _QueuedTraining) -> None:
+        """Move an admitted training from the queue to the running trainings of its user."""
+
+        now = time.monotonic()
+        self._queue.remove(queued_training)
+        self._running[queued_training.user_id] += 1
+        self._started[queued_training.user_id].append((now, queued_training.cost_dto.cpu_seconds))
+        self._virtual_time = max(self._virtual_time, queued_training.start_tag)
+        self._waits.append(now - queued_training.enqueued_at)
+        self._condition.notify_all()
+
+    def _check_quota(self, user_id: int, cost_dto: TrainingCostDTO) -> None:
+        """
+        Reject the training if the CPU time of the user within the quota window would exceed the quota.
+
+        Args:
+            user_id (int): The ID of the user who starts the training.
+            cost_dto (TrainingCostDTO): The estimated cost of the training.
+
+        Raises:
+            TrainingRejectedError: If the quota is used up.
+        """
+
+        started = self._started[user_id]
+        while started and time.monotonic() - started[0][0] > self.quota_window:
+            started.popleft()
+
+        used = sum(cpu_seconds for _, cpu_seconds in started)
+        used += sum(
+            queued_training.cost_dto.cpu_seconds
+            for queued_training in self._queue
+            if queued_training.user_id == user_id
+        )
+
+        if used + cost_dto.cpu_seconds > self.cpu_seconds_quota:
+            raise TrainingRejectedError(
+                f"CPU time quota of {self.cpu_seconds_quota} s per {self.quota_window} s is used up",
+                retryable=True,
+            )
+
+    @staticmethod
+    def _get_percentile(values: list[float], percentile: float) -> float:
+        if not values:
+            return 0.0
+        return values[max(0, math.ceil(percentile * len(values)) - 1)]
@@ -1,14 +1,59 @@
+import functools
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
 import os
-import random
-import string
+import shutil
+import threading
+import time
+import uuid
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import keras
 import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
 from PIL import Image
 
-from .dto import CreateImageDTO, HyperParamsDTO, ImageDTO
-from .interfaces import ClassificationModelRepositoryInterface, ImageRepositoryInterface
+from core import metrics
+from core.exceptions import InstanceNotExistError, TrainingRejectedError, WeightsIntegrityError
+from core.files import save_image
+
+from .callbacks import CheckpointCallback, EarlyStoppingCallback, EpochMetricsCallback, ProgressCallback
+from .charts import downsample_series
+from .checkpoints import TrainingCheckpointStore
+from .dto import (
+    ChartDataDTO,
+    ComparisonDTO,
+    CreateImageDTO,
+    HyperParamsDTO,
+    ImageDTO,
+    ModelPredictionDTO,
+    PredictionDTO,
+    PredictionTimingsDTO,
+    SweepDTO,
+    SweepParamsDTO,
+    TrainingCheckpointDTO,
+    TrainingCostDTO,
+    TrainingQueueMetricsDTO,
+)
+from .estimator import estimate_training_cost
+from .interfaces import (
+    ClassificationModelRepositoryInterface,
+    ImageRepositoryInterface,
+    SweepRepositoryInterface,
+    WeightsRepositoryInterface,
+)
+from .model_cache import ModelCache
+from .progress import progress_channel
+from .runtime import TRAINING, get_runtime_profile
+from .scheduling import BATCH, INTERACTIVE, FairShareScheduler
+from .sweep import SharedDataset, get_rung_budgets, init_worker, train_configuration
+from .weights import WeightsStore
 
 
 class ClassificationService:
@@ -21,26 +66,59 @@ class ClassificationService:
         image_repository (ImageRepositoryInterface): An instance of the image repository.
         classification_model_repository (ClassificationModelRepositoryInterface):
           An instance of the classification model repository.
+        checkpoint_store (TrainingCheckpointStore): Storage for the checkpoints of unfinished trainings.
+        training_scheduler (FairShareScheduler): Admits trainings fairly against the budgets of the host.
+        weights_store (WeightsStore): Storage for the weights files of the trained models.
+        weights_repository (WeightsRepositoryInterface): Tracks the usage and the tier of the weights.
+        model_cache (ModelCache): The models loaded for predictions in this process.
 
     Methods:
 
-    - get_prediction(image_dto, model_name): Get a prediction for the provided image.
-    - create_model(self, user, hyper_params_dto: HyperParamsDTO): Create a custom classification model based on
-      the provided hyperparameters, train the model, save its weights,
-      and store the model information in the repository.
+    - get_prediction(image_dto, model_name, tta=False): Get a prediction for the provided image.
+    - compare_models(user, image_dto, tta=False): Get the predictions of the built-in models and all models of the user
+      for the provided image.
+    - create_model(self, user, hyper_params_dto: HyperParamsDTO, job_id=None, reuse_results=True,
+      lane=INTERACTIVE, base_model_id=None, freeze_conv=False): Create a custom classification model based on
+      the provided hyperparameters, train the model or fine-tune an existing one, save its weights, and store
+      the model information in the repository.
     - get_user_model(self, user, model_id): Retrieve details of a specific classification model owned by the user.
     - get_user_models(self, user): Retrieve a list of classification models owned by the user.
+    - get_training_queue_metrics(self): Get the queue depth and the waiting times of the training scheduler.
     """
 
+    # Part of the training key, bump it whenever the model architecture, the data pipeline
+    # or the training loop change, so results of the previous code are no longer reused.
+    TRAINING_CODE_VERSION = 1
+    DATASET_PATH = "cats_and_dogs_filtered.zip"
+    BUILT_IN_WEIGHTS = {
+        "cats_or_dogs_model": "./classification/weights.h5",
+        "cats_or_dogs_transfer_learned_model": "./classification/transfer_learned_model_weights.h5",
+    }
+    BUILT_IN_MODELS = tuple(BUILT_IN_WEIGHTS)
+    LAYER_FIELDS = ("filters_1_layer", "filters_2_layer", "filters_3_layer", "dense_neurons")
+    HISTORY_METRICS = ("accuracy", "val_accuracy", "loss", "val_loss")
+
     def __init__(
         self,
         image_repository: ImageRepositoryInterface,
         classification_model_repository: ClassificationModelRepositoryInterface,
+        checkpoint_store: TrainingCheckpointStore,
+        training_scheduler: FairShareScheduler,
+        weights_store: WeightsStore,
+        weights_repository: WeightsRepositoryInterface,
+        model_cache: ModelCache,
     ):
         self.image_repository = image_repository
         self.classification_model_repository = classification_model_repository
-
-    def get_prediction(self, image_dto: CreateImageDTO, model_name: str, model_dto=None) -> tuple[ImageDTO, str]:
+        self.checkpoint_store = checkpoint_store
+        self.training_scheduler = training_scheduler
+        self.weights_store = weights_store
+        self.weights_repository = weights_repository
+        self.model_cache = model_cache
+
+    def get_prediction(
+        self, image_dto: CreateImageDTO, model_name: str, model_dto=None, tta: bool = False
+    ) -> tuple[ImageDTO, PredictionDTO]:
         """
         Get a prediction for an image using a classification model.
 
@@ -48,27 +126,238 @@ class ClassificationService:
             image_dto (CreateImageDTO): Data transfer object containing image information.
             model_name (str): Name of classification model
             model_dto: Data transfer object containing information about the requested model
+            tta (bool): Average the prediction over flipped and shifted variants of the image.
 
         Returns:
-            Tuple[ImageDTO, str] - A tuple containing the DTO of the saved image and the prediction result.
+            Tuple[ImageDTO, PredictionDTO] - A tuple containing the DTO of the saved image and the prediction.
                 - The first element is a CreateImageDTO object with information about the saved image.
-                - The second element is a string indicating the prediction result,
+                - The second element contains the probability of a dog, the threshold it is compared with,
+                the model and the version of its weights, the duration of every stage and the prediction result,
                 either "Image contains a dog." or "Image contains a cat."
         """
 
-        resized_image = self._resize_image(image_dto.image)
-        created_image_dto = self._save_image(image_dto, image=resized_image)
-        image_array = self._normalize_image(resized_image)
+        created_image_dto, image_batch, timings_dto = self._prepare_image(image_dto, tta)
 
+        started = time.perf_counter()
         classification_model = self._get_model(model_name, model_dto)
-        prediction = classification_model.predict(image_array)
+        model_duration = time.perf_counter() - started
 
-        if prediction[0] > 0.5:
-            result = "Зображення містить собаку."
-        else:
-            result = "Зображення містить кота."
+        prediction_dto = self._predict_batch(classification_model, image_batch)
+        timings_dto = timings_dto.model_copy(
+            update={"model": model_duration, "inference": prediction_dto.timings.inference}
+        )
+
+        return created_image_dto, prediction_dto.model_copy(
+            update={
+                "model_name": model_name,
+                "model_id": model_dto.id if model_dto else None,
+                "model_version": self._get_model_version(model_name, model_dto),
+                "timings": timings_dto,
+            }
+        )
+
+    def compare_models(self, user, image_dto: CreateImageDTO, tta: bool = False) -> ComparisonDTO:
+        """
+        Get the predictions of the built-in models and all models of the user for an image.
+
+        The image is decoded, resized, saved and normalized once, and the same array is classified by the models
+        in parallel threads, so the comparison takes about as long as the slowest model.
+
+        Args:
+            user: The user whose models are compared.
+            image_dto (CreateImageDTO): Data transfer object containing image information.
+            tta (bool): Average the predictions over flipped and shifted variants of the image.
+
+        Returns:
+            ComparisonDTO - The saved image, the durations of the shared stages and the prediction of every model,
+            with the durations of its own stages. A model with damaged weights has an error instead of a prediction.
+        """
+
+        created_image_dto, image_batch, timings_dto = self._prepare_image(image_dto, tta)
+
+        user_model_dtos = self.classification_model_repository.get_user_models_with_weights(user)
+        self._touch_weights(user_model_dtos)
+
+        jobs = [(model_name, None) for model_name in self.BUILT_IN_MODELS]
+        jobs.extend(("user_model", model_dto) for model_dto in user_model_dtos)
+
+        with ThreadPoolExecutor(max_workers=min(len(jobs), settings.PREDICTION_COMPARE_WORKERS)) as executor:
+            predictions = list(executor.map(lambda job: self._predict_with_model(image_batch, *job), jobs))
+
+        return ComparisonDTO(image=created_image_dto, timings=timings_dto, predictions=predictions)
+
+    def _prepare_image(self, image_dto: CreateImageDTO, tta: bool) -> tuple[ImageDTO, np.ndarray, PredictionTimingsDTO]:
+        """
+        Decode, resize, save and normalize an uploaded image, timing every stage.
+
+        Args:
+            image_dto (CreateImageDTO): Data transfer object containing image information.
+            tta (bool): Stack the flipped and shifted variants of the normalized image.
+
+        Returns:
+            Tuple[ImageDTO, numpy.ndarray, PredictionTimingsDTO] - The saved image, the batch to classify
+            and the durations of the stages in seconds.
+        """
+
+        started = time.perf_counter()
+        image = self._decode_image(image_dto.image)
+        decoded = time.perf_counter()
+        resized_image = self._resize_image(image)
+        resized = time.perf_counter()
+        created_image_dto = self._save_image(image_dto, image=resized_image)
+        saved = time.perf_counter()
+        image_batch = self._normalize_image(resized_image)
+        if tta:
+            image_batch = self._get_tta_batch(image_batch)
+        normalized = time.perf_counter()
+
+        timings_dto = PredictionTimingsDTO(
+            decode=decoded - started, resize=resized - decoded, save=saved - resized, normalize=normalized - saved
+        )
+
+        return created_image_dto, image_batch, timings_dto
+
+    def _predict_with_model(self, image_batch, model_name: str, model_dto=None) -> ModelPredictionDTO:
+        """
+        Classify a normalized image with one model of a comparison, without accessing the database.
+
+        Args:
+            image_batch (numpy.ndarray): The normalized image, or the batch of its variants.
+            model_name (str): Name of classification model.
+            model_dto: Data transfer object containing information about the user model.
+
+        Returns:
+            ModelPredictionDTO - The prediction of the model, or the integrity error.
+        """
+
+        model_prediction_dto = ModelPredictionDTO(model_name=model_name, model_id=model_dto.id if model_dto else None)
+        started = time.perf_counter()
+        try:
+            classification_model = self._load_model(model_name, model_dto)
+        except WeightsIntegrityError as error:
+            return model_prediction_dto.model_copy(update={"error": str(error)})
+        model_duration = time.perf_counter() - started
+
+        prediction_dto = self._predict_batch(classification_model, image_batch)
+        prediction_dto = prediction_dto.model_copy(
+            update={
+                "model_name": model_name,
+                "model_id": model_prediction_dto.model_id,
+                "model_version": self._get_model_version(model_name, model_dto),
+                "timings": prediction_dto.timings.model_copy(update={"model": model_duration}),
+            }
+        )
+
+        return model_prediction_dto.model_copy(update={"prediction": prediction_dto})
+
+    def _predict_batch(self, classification_model, image_batch) -> PredictionDTO:
+        """
+        Classify a batch of variants of one image with a single forward pass and average the probabilities.
+
+        Args:
+            classification_model: The classification model.
+            image_batch (numpy.ndarray): The normalized variants of the image.
+
+        Returns:
+            PredictionDTO - The mean probability of a dog, its standard deviation over the variants,
+            the threshold, the prediction result and the duration of the inference.
+        """
+
+        started = time.perf_counter()
+        probabilities = classification_model.predict(image_batch, verbose=0)[:, 0]
+        inference_duration = time.perf_counter() - started
+        metrics.inference_batch_size.observe(len(image_batch))
+
+        probability = float(np.mean(probabilities))
+        threshold = settings.PREDICTION_THRESHOLD
+
+        return PredictionDTO(
+            probability=probability,
+            spread=float(np.std(probabilities)),
+            variants=len(probabilities),
+            threshold=threshold,
+            result=self._get_result(probability, threshold),
+            timings=PredictionTimingsDTO(inference=inference_duration),
+        )
+
+    @staticmethod
+    def _get_tta_batch(image_array):
+        """
+        Stack deterministic variants of a normalized image: the image, its mirror and the image shifted
+        by PREDICTION_TTA_SHIFT pixels in each direction, with the edge pixels repeated into the gap.
+
+        Args:
+            image_array (numpy.ndarray): The normalized image, with a batch dimension of 1.
+
+        Returns:
+            numpy.ndarray - The batch of the variants.
+        """
+
+        shift = settings.PREDICTION_TTA_SHIFT
+        height, width = image_array.shape[1:3]
+        padded = np.pad(image_array, ((0, 0), (shift, shift), (shift, shift), (0, 0)), mode="edge")
+
+        variants = [image_array, image_array[:, :, ::-1]]
+        for dy, dx in ((shift, 0), (-shift, 0), (0, shift), (0, -shift)):
+            variants.append(padded[:, shift - dy : shift - dy + height, shift - dx : shift - dx + width])
+
+        return np.concatenate(variants)
+
+    @staticmethod
+    def _get_result(probability: float, threshold: float) -> str:
+        """
+        Get the prediction result for the probability of a dog.
+
+        Returns:
+            str - "Зображення містить собаку." above the threshold, otherwise "Зображення містить кота."
+        """
+
+        if probability > threshold:
+            return "Зображення містить собаку."
+        return "Зображення містить кота."
+
+    def _get_model_version(self, model_name: str, model_dto=None) -> str:
+        """
+        Get the version of the weights of a classification model.
+
+        Returns:
+            str - The SHA-256 of the weights, empty for weights stored before they were tracked.
+        """
+
+        if model_name == "user_model":
+            return model_dto.weights.sha256 if model_dto.weights else ""
+
+        return self._get_file_version(self.BUILT_IN_WEIGHTS[model_name])
+
+    @staticmethod
+    @functools.cache
+    def _get_file_version(path: str) -> str:
+        """
+        Get the SHA-256 of a weights file of a built-in model, computed once per process.
+        """
+
+        return WeightsStore._hash_file(path)
 
-        return created_image_dto, result
+    @staticmethod
+    def _decode_image(image):
+        """
+        Decode the given image.
+
+        JPEG images are decoded at the smallest power-of-two reduction still covering the input size of the models,
+        so the full resolution bitmap of a photo is never allocated.
+
+        Args:
+            image: The image file.
+
+        Returns:
+            Image - The decoded image.
+        """
+
+        decoded_image = Image.open(image)
+        decoded_image.draft("RGB", (150, 150))
+        decoded_image.load()
+
+        return decoded_image
 
     @staticmethod
     def _resize_image(image):
@@ -76,16 +365,13 @@ class ClassificationService:
         Resize the given image.
 
         Args:
-            image: The image file.
+            image: The decoded image.
 
         Returns:
             Image - The resized image.
         """
 
-        resized_image = Image.open(image)
-        resized_image = resized_image.resize((150, 150))
-
-        return resized_image
+        return image.resize((150, 150))
 
     def _save_image(self, image_dto: CreateImageDTO, image: Image) -> ImageDTO:
         """
@@ -100,8 +386,7 @@ class ClassificationService:
 
         """
 
-        image_dto.image = "images/" + image_dto.image.name
-        image.save("media/" + image_dto.image)
+        image_dto.image = save_image(image, "images", image_dto.image.name)
 
         image = self.image_repository.save_image(image_dto)
 
@@ -139,12 +424,45 @@ class ClassificationService:
             Any: The requested classification model. The specific type of the model depends on the provided model_name.
         """
 
+        if model_name == "user_model":
+            self._touch_weights([model_dto])
+
+        return self._load_model(model_name, model_dto)
+
+    def _load_model(self, model_name: str, model_dto=None):
+        """
+        Get a classification model from the model cache of the process, building it and loading its weights
+        on a miss. User models are cached by their weights, so copies of a model share one loaded model.
+
+        Args:
+            model_name (str): The name of the model to retrieve.
+            model_dto: Data transfer object containing information about the user model.
+
+        Returns:
+            Any: The requested classification model.
+        """
+
         if model_name == "cats_or_dogs_model":
-            return self._get_cats_or_dogs_model()
+            return self.model_cache.get(model_name, self._get_cats_or_dogs_model)
         elif model_name == "cats_or_dogs_transfer_learned_model":
-            return self._get_cats_or_dogs_transfer_learned_model()
+            return self.model_cache.get(model_name, self._get_cats_or_dogs_transfer_learned_model)
         elif model_name == "user_model":
-            return self._get_custom_user_model(model_dto)
+            weights_dto = model_dto.weights
+            key = f"user_model:{weights_dto.sha256 if weights_dto and weights_dto.sha256 else model_dto.weights_path}"
+            return self.model_cache.get(key, lambda: self._get_custom_user_model_with_weights(model_dto))
+
+    def _get_custom_user_model_with_weights(self, model_dto):
+        """
+        Build a custom model of the user and load its verified weights.
+
+        Raises:
+            WeightsIntegrityError: If the weights file is missing or damaged.
+        """
+
+        model = self._get_custom_user_model(model_dto)
+        model.load_weights(self._open_weights(model_dto))
+
+        return model
 
     @staticmethod
     def _get_cats_or_dogs_model():
@@ -173,7 +491,7 @@ class ClassificationService:
             ]
         )
 
-        model.load_weights("./classification/weights.h5")
+        model.load_weights(ClassificationService.BUILT_IN_WEIGHTS["cats_or_dogs_model"])
 
         return model
 
@@ -198,24 +516,162 @@ class ClassificationService:
 
         model = keras.Model(model.input, x)
 
-        model.load_weights("./classification/transfer_learned_model_weights.h5")
+        model.load_weights(ClassificationService.BUILT_IN_WEIGHTS["cats_or_dogs_transfer_learned_model"])
 
         return model
 
-    def create_model(self, user, hyper_params_dto: HyperParamsDTO):
+    def create_model(
+        self,
+        user,
+        hyper_params_dto: HyperParamsDTO,
+        job_id: str = None,
+        reuse_results: bool = True,
+        lane: str = INTERACTIVE,
+        base_model_id: int = None,
+        freeze_conv: bool = False,
+    ):
         """
         Create a custom classification model based on the provided hyperparameters, train the model,
         save its weights, and store the model information in the repository.
 
+        The training metrics are published to the progress channel under the job identifier, and every
+        completed epoch is checkpointed, so a training interrupted by a failure of the worker is resumed
+        from the last completed epoch when it is started again with the same job identifier.
+        With early stopping enabled, the training stops once the validation loss has not improved for
+        `patience` epochs and the weights of the best epoch are kept.
+
+        With a base model, the training is warm-started from the weights of that model of the user, which must
+        have the same layer shapes, and continues its history for `epochs` more epochs.
+
+        If a model was already trained with the same hyperparameters on the same dataset by the same
+        training code, its weights and history are reused instead of training a new model.
+        Otherwise the training waits for its fair share of the CPU and memory budgets of the host,
+        based on the cost estimated from the hyperparameters.
+
         Args:
             user: The user associated with the model.
             hyper_params_dto (HyperParamsDTO): Data transfer object containing hyperparameters for model creation.
+            job_id (str): The identifier of the training job, a new one is generated if omitted.
+            reuse_results (bool): Reuse the result of an identical training, False trains with a fresh random seed.
+            lane (str): The priority lane the training waits in for admission.
+            base_model_id (int): The ID of the model to fine-tune, None trains from random initialization.
+            freeze_conv (bool): Keep the weights of the convolutional layers of the base model fixed.
 
         Returns:
             ModelDTO: Data transfer object containing information about the created model.
+
+        Raises:
+            InstanceNotExistError: If the base model does not exist.
+            ValueError: If the layer shapes of the base model differ from the hyperparameters.
+            TrainingRejectedError: If the training exceeds the budgets of the host or the quota of the user,
+              or is not admitted in time.
+        """
+
+        job_id = job_id or uuid.uuid4().hex
+
+        progress_channel.open(job_id, owner_id=user.pk)
+
+        try:
+            if base_model_id is not None:
+                checkpoint_dto = self._start_fine_tuning(user, hyper_params_dto, job_id, base_model_id, freeze_conv)
+            else:
+                checkpoint_dto = self.checkpoint_store.find(job_id, user.pk, hyper_params_dto)
+        except Exception:
+            progress_channel.close(job_id, "failed", {})
+            raise
+
+        # Fine-tuned weights depend on the base model, so they are never reused for other trainings.
+        training_key = None
+        if not checkpoint_dto or checkpoint_dto.base_model_id is None:
+            training_key = self._get_training_key(hyper_params_dto)
+
+        if reuse_results and training_key and not checkpoint_dto:
+            cached_model_dto = self.classification_model_repository.get_model_by_training_key(training_key)
+            if cached_model_dto:
+                try:
+                    model_dto = self.classification_model_repository.copy_model(user, cached_model_dto.id)
+                except InstanceNotExistError:
+                    # The model was deleted after it was found, the training runs instead.
+                    pass
+                else:
+                    progress_channel.close(job_id, "completed", {"model_id": model_dto.id})
+                    return model_dto
+
+        if checkpoint_dto:
+            hyper_params_dto = checkpoint_dto.hyper_params
+
+        progress_callback = ProgressCallback(
+            job_id,
+            progress_channel,
+            steps_interval=settings.TRAINING_PROGRESS_STEPS,
+            initial_history=checkpoint_dto.history if checkpoint_dto else None,
+        )
+        initial_epoch = checkpoint_dto.epoch if checkpoint_dto else 0
+        cost_dto = estimate_training_cost(
+            hyper_params_dto.model_copy(update={"epochs": max(0, hyper_params_dto.epochs - initial_epoch)})
+        )
+        # The claim counts the cores of the training profile, also for trainings started by a web worker.
+        cpus = get_runtime_profile(TRAINING).intra_op_threads
+        try:
+            with self.training_scheduler.schedule(user.pk, cost_dto, cpus, lane=lane):
+                model_dto = self._train_model(
+                    user, hyper_params_dto, job_id, training_key, checkpoint_dto, callbacks=[progress_callback]
+                )
+        except TrainingRejectedError:
+            progress_channel.close(job_id, "rejected", {})
+            raise
+        except Exception:
+            progress_channel.close(job_id, "failed", {})
+            raise
+
+        progress_channel.close(job_id, "completed", {"model_id": model_dto.id})
+        return model_dto
+
+    def _start_fine_tuning(
+        self, user, hyper_params_dto: HyperParamsDTO, job_id: str, base_model_id: int, freeze_conv: bool
+    ) -> TrainingCheckpointDTO:
+        """
+        Prepare the checkpoint a fine-tuning of a model of the user starts from.
+
+        The model is built with the weights of the base model, its convolutional layers optionally frozen,
+        and saved as a checkpoint after the last epoch of the base model, with the history of the base model.
+        The training then proceeds like a resumed one, with continuous epoch numbering, except that early
+        stopping tracks the best epoch from the first epoch of the fine-tuning.
+        An existing checkpoint of the job is resumed instead.
+
+        Args:
+            user: The user associated with the model.
+            hyper_params_dto (HyperParamsDTO): Hyperparameters of the training, `epochs` counts the additional epochs.
+            job_id (str): The identifier of the training job.
+            base_model_id (int): The ID of the model to fine-tune.
+            freeze_conv (bool): Keep the weights of the convolutional layers fixed.
+
+        Returns:
+            TrainingCheckpointDTO - The checkpoint to train from.
+
+        Raises:
+            InstanceNotExistError: If the base model does not exist.
+            ValueError: If the layer shapes of the base model differ from the hyperparameters.
         """
 
+        base_model_dto = self.classification_model_repository.get_user_model(user, base_model_id)
+        if any(getattr(base_model_dto, field) != getattr(hyper_params_dto, field) for field in self.LAYER_FIELDS):
+            raise ValueError(f"Model {base_model_id} has different layer shapes")
+
+        base_history = sorted(base_model_dto.history, key=lambda epoch: epoch.epoch_number)
+        hyper_params_dto = hyper_params_dto.model_copy(update={"epochs": len(base_history) + hyper_params_dto.epochs})
+
+        checkpoint_dto = self.checkpoint_store.find(job_id, user.pk, hyper_params_dto)
+        if checkpoint_dto:
+            return checkpoint_dto
+
         model = self._get_custom_user_model(hyper_params_dto)
+        model.load_weights(self._open_weights(base_model_dto))
+        self._touch_weights([base_model_dto])
+        if freeze_conv:
+            for layer in model.layers:
+                if isinstance(layer, keras.layers.Conv2D):
+                    layer.trainable = False
 
         model.compile(
             loss="binary_crossentropy",
@@ -223,21 +679,138 @@ class ClassificationService:
             metrics=["accuracy"],
         )
 
+        checkpoint_dto = TrainingCheckpointDTO(
+            job_id=job_id,
+            user_id=user.pk,
+            hyper_params=hyper_params_dto,
+            epoch=len(base_history),
+            history={name: [getattr(epoch, name) for epoch in base_history] for name in self.HISTORY_METRICS},
+            base_model_id=base_model_id,
+            base_epochs=len(base_history),
+        )
+        self.checkpoint_store.save(checkpoint_dto, model)
+
+        return checkpoint_dto
+
+    def _train_model(
+        self,
+        user,
+        hyper_params_dto: HyperParamsDTO,
+        job_id: str,
+        training_key: str,
+        checkpoint_dto: TrainingCheckpointDTO | None,
+        callbacks: list,
+    ):
+        """
+        Build or restore a custom classification model, train it, save its weights and store it in the repository.
+
+        Args:
+            user: The user associated with the model.
+            hyper_params_dto (HyperParamsDTO): Data transfer object containing hyperparameters for model creation.
+            job_id (str): The identifier of the training job.
+            training_key (str | None): The key the training result is stored with, None if it is never reused.
+            checkpoint_dto (TrainingCheckpointDTO | None): The checkpoint to resume from, None to start from scratch.
+            callbacks (list): Keras callbacks attached to the training.
+
+        Returns:
+            ModelDTO: Data transfer object containing information about the created model.
+        """
+
+        if checkpoint_dto:
+            model = self.checkpoint_store.load_model(user.pk, job_id)
+        else:
+            model = self._get_custom_user_model(hyper_params_dto)
+            model.compile(
+                loss="binary_crossentropy",
+                optimizer=keras.optimizers.RMSprop(learning_rate=1e-4),
+                metrics=["accuracy"],
+            )
+            checkpoint_dto = TrainingCheckpointDTO(
+                job_id=job_id, user_id=user.pk, hyper_params=hyper_params_dto, epoch=0, history={}
+            )
+
+        if hyper_params_dto.early_stopping:
+            callbacks = [
+                *callbacks,
+                EarlyStoppingCallback(
+                    hyper_params_dto.patience,
+                    self.checkpoint_store.get_best_weights_path(user.pk, job_id),
+                    history=checkpoint_dto.history,
+                    start_epoch=checkpoint_dto.base_epochs,
+                ),
+            ]
+
         train_generator, validation_generator = self._get_data()
 
-        history = model.fit(
+        checkpoint_callback = CheckpointCallback(self.checkpoint_store, checkpoint_dto)
+        model.fit(
             train_generator,
             validation_data=validation_generator,
             steps_per_epoch=100,
-            epochs=hyper_params_dto.epochs,
+            epochs=checkpoint_dto.epoch if checkpoint_dto.stopped else hyper_params_dto.epochs,
+            initial_epoch=checkpoint_dto.epoch,
             validation_steps=50,
             verbose=2,
+            callbacks=[*callbacks, checkpoint_callback, EpochMetricsCallback()],
+        )
+
+        weights_dto = self.weights_store.save(model)
+
+        model_dto = self.classification_model_repository.create_model(
+            user,
+            hyper_params_dto,
+            weights_dto,
+            checkpoint_callback,
+            training_key=training_key,
+            base_model_id=checkpoint_dto.base_model_id,
+        )
+        self.checkpoint_store.delete(user.pk, job_id)
+
+        return model_dto
+
+    def _get_training_key(self, hyper_params_dto: HyperParamsDTO) -> str:
+        """
+        Compute the key identifying the result of a training.
+
+        Args:
+            hyper_params_dto (HyperParamsDTO): Data transfer object containing hyperparameters for model creation.
+
+        Returns:
+            str - SHA-256 of the canonical JSON of the hyperparameters, the dataset version and the code version.
+        """
+
+        payload = json.dumps(
+            {
+                "hyper_params": hyper_params_dto.model_dump(),
+                "dataset": self._get_dataset_version(self.DATASET_PATH),
+                "code": self.TRAINING_CODE_VERSION,
+            },
+            sort_keys=True,
         )
+        return hashlib.sha256(payload.encode()).hexdigest()
 
-        weights_path = "weights/custom_model_weights" + self._generate_random_string() + ".h5"
-        model.save_weights(weights_path)
+    @staticmethod
+    @functools.cache
+    def _get_dataset_version(dataset_path: str) -> str:
+        """
+        Get the version of the training dataset.
 
-        return self.classification_model_repository.create_model(user, hyper_params_dto, weights_path, history)
+        Args:
+            dataset_path (str): The path to the dataset archive.
+
+        Returns:
+            str - The TRAINING_DATASET_VERSION setting, or the SHA-256 of the archive, computed once per process.
+        """
+
+        if settings.TRAINING_DATASET_VERSION:
+            return settings.TRAINING_DATASET_VERSION
+
+        digest = hashlib.sha256()
+        with open(dataset_path, "rb") as dataset_file:
+            for chunk in iter(lambda: dataset_file.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
 
     @staticmethod
     def _get_custom_user_model(hyper_params_dto: HyperParamsDTO):
@@ -272,6 +845,21 @@ class ClassificationService:
         )
         return model
 
+    @staticmethod
+    def _extract_dataset() -> str:
+        """
+        Extract the training dataset archive.
+
+        Returns:
+            str: The directory of the dataset, containing the train and validation subdirectories.
+        """
+
+        zip_ref = zipfile.ZipFile(ClassificationService.DATASET_PATH, "r")
+        zip_ref.extractall("tmp/")
+        zip_ref.close()
+
+        return "tmp/cats_and_dogs_filtered"
+
     @staticmethod
     def _get_data():
         """
@@ -281,11 +869,7 @@ class ClassificationService:
             Tuple[keras.preprocessing.image.DirectoryIterator, keras.preprocessing.image.DirectoryIterator]:
                 A tuple containing the training and validation data generators.
         """
-        zip_ref = zipfile.ZipFile("cats_and_dogs_filtered.zip", "r")
-        zip_ref.extractall("tmp/")
-        zip_ref.close()
-
-        base_dir = "tmp/cats_and_dogs_filtered"
+        base_dir = ClassificationService._extract_dataset()
 
         train_dir = os.path.join(base_dir, "train")
         validation_dir = os.path.join(base_dir, "validation")
@@ -312,17 +896,36 @@ class ClassificationService:
 
         return train_generator, validation_generator
 
-    @staticmethod
-    def _generate_random_string():
+    def _open_weights(self, model_dto) -> str:
         """
-        Generate a random string with a sequence of 10 characters.
+        Get a verified local file of the weights of a custom model.
+
+        Args:
+            model_dto: Data transfer object containing information about the model.
 
         Returns:
-            str: A string containing a random sequence of 10 characters.
+            str - The path of a file the weights can be loaded from.
+
+        Raises:
+            WeightsIntegrityError: If the weights file is missing or damaged.
+        """
+
+        if not model_dto.weights:
+            return model_dto.weights_path
+
+        return self.weights_store.open(model_dto.weights)
+
+    def _touch_weights(self, model_dtos) -> None:
         """
+        Record that the weights of custom models were used, so they are not moved to the compressed tier.
 
-        random_chars = "".join(random.choice(string.ascii_letters + string.digits) for _ in range(10))
-        return random_chars
+        Args:
+            model_dtos: Data transfer objects of the used models.
+        """
+
+        weights_ids = [model_dto.weights.id for model_dto in model_dtos if model_dto.weights]
+        if weights_ids:
+            self.weights_repository.touch_weights(weights_ids, timezone.now())
 
     def get_user_model(self, user, model_id):
         """
@@ -339,6 +942,58 @@ class ClassificationService:
         """
         return self.classification_model_repository.get_user_model(user, model_id)
 
+    def get_model_chart_data(self, user, model_id, metrics, points):
+        """
+        Retrieve the metric series of the training history of a model owned by the user for charts.
+
+        Long histories are downsampled with LTTB, so the size of the chart data does not grow with the training.
+
+        Args:
+            user: The user associated with the model.
+            model_id: The unique identifier of the model.
+            metrics (tuple): The names of the history metrics, all of HISTORY_METRICS if empty.
+            points (int): The maximum number of epochs returned.
+
+        Returns:
+            ChartDataDTO: The kept epoch numbers and the values of every metric at these epochs.
+
+        Raises:
+            InstanceNotExistError: If the specified model does not exist.
+        """
+        chart_data_dto = self.classification_model_repository.get_user_model_metrics(
+            user, model_id, tuple(metrics) or self.HISTORY_METRICS
+        )
+        epochs, series = downsample_series(chart_data_dto.epochs, chart_data_dto.series, points)
+
+        return ChartDataDTO(epochs=epochs, series=series)
+
+    def get_user_model_updated_at(self, user, model_id):
+        """
+        Retrieve when a classification model owned by the user was last saved.
+
+        This method delegates the call to the associated classification model repository.
+
+        Args:
+            user: The user associated with the model.
+            model_id: The unique identifier of the model.
+
+        Returns:
+            datetime | None: The time of the last save, or None if the model does not exist.
+        """
+        return self.classification_model_repository.get_user_model_updated_at(user, model_id)
+
+    def get_user_models_version(self, user) -> str:
+        """
+        Retrieve a version of the list of classification models owned by the user, for the cached list.
+
+        Args:
+            user: The user associated with the models.
+
+        Returns:
+            str: A version changing whenever a model of the user is created, saved or deleted.
+        """
+        return self.classification_model_repository.get_user_models_version(user)
+
     def get_user_models(self, user):
         """
         Retrieve a list of classification models owned by the user.
@@ -352,3 +1007,300 @@ class ClassificationService:
             list[ModelListDTO]: List of data transfer objects containing information about the user's models.
         """
         return self.classification_model_repository.get_user_models(user)
+
+    def get_training_queue_metrics(self) -> TrainingQueueMetricsDTO:
+        """
+        Get the queue depth and the waiting times of the training scheduler of this process.
+
+        Returns:
+            TrainingQueueMetricsDTO: Waiting trainings per lane, running trainings and waiting time percentiles.
+        """
+        return self.training_scheduler.get_metrics()
+
+
+class SweepService:
+    """
+    A service class for hyperparameter sweeps.
+
+    A sweep trains every combination of the given hyperparameter values in a local process pool. The decoded
+    dataset is shared between the workers, and successive halving stops the worst configurations early:
+    after every rung only the best part of the configurations, by validation accuracy, keeps training.
+
+    Attributes:
+        classification_model_repository (ClassificationModelRepositoryInterface): Stores the trained models.
+        sweep_repository (SweepRepositoryInterface): Stores the sweeps.
+        training_scheduler (FairShareScheduler): Admits sweeps fairly against the budgets of the host.
+        weights_store (WeightsStore): Storage for the weights files of the trained models.
+
+    Methods:
+
+    - start_sweep(user, sweep_params_dto): Start a sweep in the background.
+    - run_sweep(user, sweep_id, sweep_params_dto): Train all configurations of a sweep and store the results.
+    - get_user_sweep(user, sweep_id): Retrieve a sweep with its models ranked by validation accuracy.
+    """
+
+    def __init__(
+        self,
+        classification_model_repository: ClassificationModelRepositoryInterface,
+        sweep_repository: SweepRepositoryInterface,
+        training_scheduler: FairShareScheduler,
+        weights_store: WeightsStore,
+    ):
+        self.classification_model_repository = classification_model_repository
+        self.sweep_repository = sweep_repository
+        self.training_scheduler = training_scheduler
+        self.weights_store = weights_store
+
+    def start_sweep(self, user, sweep_params_dto: SweepParamsDTO) -> SweepDTO:
+        """
+        Start a sweep in a background thread of the current process.
+
+        Args:
+            user: The user who starts the sweep.
+            sweep_params_dto (SweepParamsDTO): The values of every hyperparameter and the number of epochs.
+
+        Returns:
+            SweepDTO: Data transfer object containing information about the started sweep.
+
+        Raises:
+            TrainingRejectedError: If the sweep exceeds the budgets of the host or the quota of the user.
+        """
+
+        configurations = self.get_configurations(sweep_params_dto)
+        self.training_scheduler.check(user.pk, self._get_sweep_cost(configurations))
+
+        sweep_dto = self.sweep_repository.create_sweep(user, len(configurations))
+
+        threading.Thread(target=self.run_sweep, args=(user, sweep_dto.id, sweep_params_dto), daemon=True).start()
+
+        return sweep_dto
+
+    @staticmethod
+    def get_configurations(sweep_params_dto: SweepParamsDTO) -> list[HyperParamsDTO]:
+        """
+        Build every combination of the hyperparameter values of a sweep.
+
+        Args:
+            sweep_params_dto (SweepParamsDTO): The values of every hyperparameter and the number of epochs.
+
+        Returns:
+            list[HyperParamsDTO]: The hyperparameters of every configuration.
+        """
+
+        return [
+            HyperParamsDTO(
+                filters_1_layer=filters_1_layer,
+                filters_2_layer=filters_2_layer,
+                filters_3_layer=filters_3_layer,
+                dense_neurons=dense_neurons,
+                epochs=sweep_params_dto.epochs,
+            )
+            for filters_1_layer, filters_2_layer, filters_3_layer, dense_neurons in itertools.product(
+                sweep_params_dto.filters_1_layer,
+                sweep_params_dto.filters_2_layer,
+                sweep_params_dto.filters_3_layer,
+                sweep_params_dto.dense_neurons,
+            )
+        ]
+
+    def run_sweep(self, user, sweep_id: int, sweep_params_dto: SweepParamsDTO) -> None:
+        """
+        Train all configurations of a sweep by successive halving and store every trained model.
+
+        A configuration is stored as soon as it is eliminated, with the epochs it was trained for,
+        and the configurations of the last rung are stored after training for all epochs.
+        The sweep waits for admission in the batch lane of the scheduler before its workers are started.
+
+        Args:
+            user: The user who started the sweep.
+            sweep_id (int): The unique identifier of the sweep.
+            sweep_params_dto (SweepParamsDTO): The values of every hyperparameter and the number of epochs.
+        """
+
+        sweep_directory = os.path.join(settings.SWEEP_DIR, str(sweep_id))
+        datasets = []
+        try:
+            configurations = self.get_configurations(sweep_params_dto)
+            workers = settings.SWEEP_WORKERS
+            cpus = workers * max(1, get_runtime_profile(TRAINING).intra_op_threads // workers)
+            with self.training_scheduler.schedule(user.pk, self._get_sweep_cost(configurations), cpus, lane=BATCH):
+                # The decoded dataset takes hundreds of megabytes, so it is only decoded once the sweep is admitted.
+                os.makedirs(sweep_directory, exist_ok=True)
+                base_dir = ClassificationService._extract_dataset()
+                for subdirectory in ("train", "validation"):
+                    datasets.append(SharedDataset.from_directory(os.path.join(base_dir, subdirectory)))
+
+                with self._get_pool(*datasets) as pool:
+                    self._run_successive_halving(user, sweep_id, configurations, sweep_directory, pool)
+        except Exception:
+            self.sweep_repository.finish_sweep(sweep_id, succeeded=False)
+            raise
+        else:
+            self.sweep_repository.finish_sweep(sweep_id, succeeded=True)
+        finally:
+            for dataset in datasets:
+                dataset.close()
+            shutil.rmtree(sweep_directory, ignore_errors=True)
+            connection.close()
+
+    def _run_successive_halving(self, user, sweep_id, configurations, sweep_directory, pool) -> None:
+        """
+        Train the configurations rung by rung, keeping the best 1/SWEEP_REDUCTION_FACTOR of them after each rung.
+
+        Args:
+            user: The user who started the sweep.
+            sweep_id (int): The unique identifier of the sweep.
+            configurations (list[HyperParamsDTO]): The hyperparameters of every configuration.
+            sweep_directory (str): The directory for the models continued between rungs.
+            pool (ProcessPoolExecutor): The pool training the configurations.
+        """
+
+        reduction_factor = settings.SWEEP_REDUCTION_FACTOR
+        epochs = configurations[0].epochs
+        budgets = get_rung_budgets(len(configurations), epochs, reduction_factor)
+
+        trials = []
+        for index, hyper_params_dto in enumerate(configurations):
+            trials.append(
+                {
+                    "hyper_params_dto": hyper_params_dto,
+                    "model_path": os.path.join(sweep_directory, f"{index}.keras"),
+                    "weights_path": self.weights_store.get_new_path(),
+                    "history": {},
+                }
+            )
+
+        initial_epoch = 0
+        for rung, budget in enumerate(budgets):
+            futures = [
+                pool.submit(
+                    train_configuration,
+                    trial["hyper_params_dto"],
+                    trial["model_path"],
+                    trial["weights_path"],
+                    initial_epoch,
+                    budget,
+                )
+                for trial in trials
+            ]
+            for trial, future in zip(trials, futures):
+                for name, values in future.result().items():
+                    trial["history"].setdefault(name, []).extend(values)
+            initial_epoch = budget
+
+            trials.sort(key=lambda trial: trial["history"]["val_accuracy"][-1], reverse=True)
+            survivors = len(trials) if rung == len(budgets) - 1 else math.ceil(len(trials) / reduction_factor)
+
+            for trial in trials[survivors:]:
+                self._store_trial(user, sweep_id, trial)
+            trials = trials[:survivors]
+
+        for trial in trials:
+            self._store_trial(user, sweep_id, trial)
+
+    @staticmethod
+    def _get_sweep_cost(configurations: list[HyperParamsDTO]) -> TrainingCostDTO:
+        """
+        Estimate the cost the admission of a sweep is based on.
+
+        The sweep claims the peak memory of the SWEEP_WORKERS configurations needing the most memory,
+        as they may be trained at the same time. Its CPU time assumes that the most expensive configurations
+        survive every rung of successive halving.
+
+        Args:
+            configurations (list[HyperParamsDTO]): The hyperparameters of every configuration.
+
+        Returns:
+            TrainingCostDTO - The cost of the most expensive configuration with the memory and the CPU time
+              of the whole sweep.
+        """
+
+        cost_dtos = [estimate_training_cost(hyper_params_dto) for hyper_params_dto in configurations]
+        peak_memories = sorted((cost_dto.peak_memory_bytes for cost_dto in cost_dtos), reverse=True)
+        epoch_cpu_seconds = sorted(
+            (
+                cost_dto.cpu_seconds / hyper_params_dto.epochs
+                for cost_dto, hyper_params_dto in zip(cost_dtos, configurations)
+            ),
+            reverse=True,
+        )
+
+        cpu_seconds = 0.0
+        trials = len(configurations)
+        initial_epoch = 0
+        for budget in get_rung_budgets(trials, configurations[0].epochs, settings.SWEEP_REDUCTION_FACTOR):
+            cpu_seconds += sum(epoch_cpu_seconds[:trials]) * (budget - initial_epoch)
+            trials = math.ceil(trials / settings.SWEEP_REDUCTION_FACTOR)
+            initial_epoch = budget
+
+        return max(cost_dtos, key=lambda cost_dto: cost_dto.cpu_seconds).model_copy(
+            update={"peak_memory_bytes": sum(peak_memories[: settings.SWEEP_WORKERS]), "cpu_seconds": cpu_seconds}
+        )
+
+    def _store_trial(self, user, sweep_id: int, trial: dict) -> None:
+        """
+        Store a trained configuration of a sweep.
+
+        Args:
+            user: The user who started the sweep.
+            sweep_id (int): The unique identifier of the sweep.
+            trial (dict): The hyperparameters, the weights path and the history of the configuration.
+        """
+
+        history = keras.callbacks.History()
+        history.history = trial["history"]
+
+        self.classification_model_repository.create_model(
+            user,
+            trial["hyper_params_dto"],
+            self.weights_store.describe(trial["weights_path"]),
+            history,
+            sweep_id=sweep_id,
+        )
+
+    @staticmethod
+    def _get_pool(train_dataset: SharedDataset, validation_dataset: SharedDataset) -> ProcessPoolExecutor:
+        """
+        Create the process pool training the configurations.
+
+        The training CPUs of the host are divided between SWEEP_WORKERS workers. Workers are spawned
+        rather than forked, so they do not inherit the TensorFlow runtime or the database connections.
+
+        Args:
+            train_dataset (SharedDataset): The shared training dataset.
+            validation_dataset (SharedDataset): The shared validation dataset.
+
+        Returns:
+            ProcessPoolExecutor - The pool of sweep workers.
+        """
+
+        workers = settings.SWEEP_WORKERS
+        profile = get_runtime_profile(TRAINING)
+
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(
+                train_dataset.describe(),
+                validation_dataset.describe(),
+                max(1, profile.intra_op_threads // workers),
+                profile.cpu_affinity,
+            ),
+        )
+
+    def get_user_sweep(self, user, sweep_id: int) -> SweepDTO:
+        """
+        Retrieve a sweep owned by the user with its models ranked by validation accuracy.
+
+        This method delegates the call to the associated sweep repository.
+
+        Args:
+            user: The user who started the sweep.
+            sweep_id (int): The unique identifier of the sweep.
+
+        Returns:
+            SweepDTO: Data transfer object containing the sweep and its ranked results.
+        """
+
+        return self.sweep_repository.get_user_sweep(user, sweep_id)
@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ClassificationModel, WeightsModel
+from .repositories import WeightsRepository
+from .weights import WeightsStore
+
+
+@receiver(post_delete, sender=ClassificationModel)
+def release_weights(sender, instance, **kwargs):
+    """
+    Release the reference of a deleted model to its weights, also when the model is deleted by a cascade.
+
+    The weights file, in either tier, is removed together with its record and its cached copy once the last
+    model referencing it is gone.
+    """
+
+    if not instance.weights_id:
+        return
+
+    # The row stays locked until the deletion commits, so copy_model cannot take a reference in between.
+    with transaction.atomic():
+        weights = WeightsModel.objects.select_for_update().filter(pk=instance.weights_id).first()
+        if not weights:
+            return
+
+        if weights.references > 1:
+            WeightsModel.objects.filter(pk=weights.pk).update(references=F("references") - 1)
+            return
+
+        weights_dto = WeightsRepository._weights_to_dto(weights)
+        weights.delete()
+        transaction.on_commit(lambda: WeightsStore().delete(weights_dto))
+
+
+@receiver(pre_delete, sender=ClassificationModel)
+def touch_fine_tuned_models(sender, instance, **kwargs):
+    """
+    Mark the models fine-tuned from a deleted model as changed, so their pages and cached blocks stop linking to it.
+
+    The base model of these models is set to NULL by a queryset update, which neither updates their updated_at
+    nor sends post_save. They are found before the deletion, while they still refer to the deleted model.
+    """
+
+    instance.fine_tuned_models.update(updated_at=timezone.now())
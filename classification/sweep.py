@@ -0,0 +1,227 @@
+import math
+import os
+from multiprocessing import shared_memory
+
+import keras
+import numpy as np
+import tensorflow as tf
+
+from .dto import HyperParamsDTO
+
+IMAGE_SHAPE = (150, 150, 3)
+BATCH_SIZE = 20
+
+
+class SharedDataset:
+    """
+    A decoded image dataset placed in shared memory, so every sweep worker reads the same copy.
+
+    Images are kept as uint8 and converted to floats one batch at a time by SharedImageSequence.
+
+    Attributes:
+        images (numpy.ndarray): Images of shape (count, 150, 150, 3), backed by the shared memory block.
+        labels (numpy.ndarray): Binary labels of the images.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, count: int, labels: np.ndarray, owner: bool):
+        self._memory = memory
+        self._owner = owner
+        self.images = np.ndarray((count, *IMAGE_SHAPE), dtype=np.uint8, buffer=memory.buf)
+        self.labels = labels
+
+    @classmethod
+    def from_directory(cls, directory: str) -> "SharedDataset":
+        """
+        Decode all images of a class-per-subdirectory dataset into a new shared memory block.
+
+        Classes are labeled in alphabetical order and images are resized like flow_from_directory does.
+
+        Args:
+            directory (str): The dataset directory, e.g. tmp/cats_and_dogs_filtered/train.
+
+        Returns:
+            SharedDataset - The dataset owning the shared memory block.
+        """
+
+        paths, labels = [], []
+        for label, class_name in enumerate(sorted(os.listdir(directory))):
+            class_directory = os.path.join(directory, class_name)
+            for file_name in sorted(os.listdir(class_directory)):
+                paths.append(os.path.join(class_directory, file_name))
+                labels.append(label)
+
+        memory = shared_memory.SharedMemory(create=True, size=max(1, len(paths) * math.prod(IMAGE_SHAPE)))
+        dataset = cls(memory, len(paths), np.array(labels, dtype=np.float32), owner=True)
+        for index, path in enumerate(paths):
+            image = keras.utils.load_img(path, target_size=IMAGE_SHAPE[:2])
+            dataset.images[index] = keras.utils.img_to_array(image, dtype=np.uint8)
+
+        return dataset
+
+    @classmethod
+    def attach(cls, descriptor: dict) -> "SharedDataset":
+        """
+        Attach to a dataset created by another process.
+
+        Args:
+            descriptor (dict): The descriptor returned by describe().
+
+        Returns:
+            SharedDataset - A view of the shared dataset.
+        """
+
+        memory = shared_memory.SharedMemory(name=descriptor["name"])
+        return cls(memory, descriptor["count"], np.array(descriptor["labels"], dtype=np.float32), owner=False)
+
+    def describe(self) -> dict:
+        """
+        Describe the dataset, so another process can attach to it.
+
+        Returns:
+            dict - The name of the shared memory block, the image count and the labels.
+        """
+
+        return {"name": self._memory.name, "count": len(self.labels), "labels": self.labels.tolist()}
+
+    def close(self) -> None:
+        """Detach from the shared memory block, releasing it if this process created it."""
+
+        self.images = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class SharedImageSequence(keras.utils.Sequence):
+    """
+    Batches of a shared dataset, rescaled and optionally augmented like the generators of ClassificationService.
+
+    Attributes:
+        dataset (SharedDataset): The shared dataset.
+        augment (bool): Whether random augmentations are applied to the images.
+    """
+
+    def __init__(self, dataset: SharedDataset, augment: bool, batch_size: int = BATCH_SIZE):
+        super().__init__()
+        self.dataset = dataset
+        self.augment = augment
+        self.batch_size = batch_size
+        self.datagen = keras.preprocessing.image.ImageDataGenerator(
+            rotation_range=40,
+            width_shift_range=0.2,
+            height_shift_range=0.2,
+            shear_range=0.2,
+            zoom_range=0.2,
+            horizontal_flip=True,
+        )
+        self.order = np.random.permutation(len(dataset.labels))
+
+    def __len__(self):
+        return math.ceil(len(self.order) / self.batch_size)
+
+    def __getitem__(self, index):
+        indexes = self.order[index * self.batch_size : (index + 1) * self.batch_size]
+        images = self.dataset.images[indexes].astype(np.float32)
+        if self.augment:
+            images = np.stack([self.datagen.random_transform(image) for image in images])
+
+        return images / 255.0, self.dataset.labels[indexes]
+
+    def on_epoch_end(self):
+        np.random.shuffle(self.order)
+
+
+def get_rung_budgets(configurations: int, epochs: int, reduction_factor: int) -> list[int]:
+    """
+    Compute the epoch budgets of the rungs of successive halving.
+
+    Every rung keeps 1/reduction_factor of the configurations and multiplies their budget by reduction_factor,
+    so the last rung trains the best configurations for the full number of epochs.
+
+    Args:
+        configurations (int): The number of configurations in the first rung.
+        epochs (int): The full number of epochs.
+        reduction_factor (int): The factor by which the configurations are reduced per rung.
+
+    Returns:
+        list[int] - Increasing cumulative epoch budgets, the last one equal to epochs.
+    """
+
+    rungs = 1
+    while reduction_factor**rungs < configurations:
+        rungs += 1
+
+    budgets = {max(1, epochs // reduction_factor ** (rungs - rung)) for rung in range(rungs)}
+    return sorted(budgets | {epochs})
+
+
+_worker_state = {}
+
+
+def init_worker(train_descriptor: dict, validation_descriptor: dict, intra_op_threads: int, cpu_affinity=None):
+    """
+    Initialize a sweep worker process: attach to the shared datasets and size its TensorFlow thread pools.
+
+    Args:
+        train_descriptor (dict): Descriptor of the shared training dataset.
+        validation_descriptor (dict): Descriptor of the shared validation dataset.
+        intra_op_threads (int): Intra-op threads of the worker, its share of the training CPUs.
+        cpu_affinity (list[int]): CPUs the worker is pinned to.
+    """
+
+    if cpu_affinity and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpu_affinity)
+
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    _worker_state["train"] = SharedDataset.attach(train_descriptor)
+    _worker_state["validation"] = SharedDataset.attach(validation_descriptor)
+
+
+def train_configuration(
+    hyper_params_dto: HyperParamsDTO, model_path: str, weights_path: str, initial_epoch: int, epochs: int
+) -> dict:
+    """
+    Train one configuration of a sweep from initial_epoch up to epochs in a worker process.
+
+    The full model is saved to model_path, so the next rung continues with the optimizer state,
+    and the weights are saved to weights_path, so the result can be stored after any rung.
+
+    Args:
+        hyper_params_dto (HyperParamsDTO): The hyperparameters of the configuration.
+        model_path (str): The file the model is continued from and saved to.
+        weights_path (str): The file the weights of the model are saved to.
+        initial_epoch (int): The number of epochs already trained.
+        epochs (int): The number of epochs to train up to.
+
+    Returns:
+        dict - Metric names mapped to their values for the newly trained epochs.
+    """
+
+    from .services import ClassificationService
+
+    if initial_epoch:
+        model = keras.models.load_model(model_path)
+    else:
+        model = ClassificationService._get_custom_user_model(hyper_params_dto)
+        model.compile(
+            loss="binary_crossentropy",
+            optimizer=keras.optimizers.RMSprop(learning_rate=1e-4),
+            metrics=["accuracy"],
+        )
+
+    history = model.fit(
+        SharedImageSequence(_worker_state["train"], augment=True),
+        validation_data=SharedImageSequence(_worker_state["validation"], augment=False),
+        steps_per_epoch=100,
+        epochs=epochs,
+        initial_epoch=initial_epoch,
+        validation_steps=50,
+        verbose=0,
+    )
+
+    model.save(model_path)
+    model.save_weights(weights_path)
+
+    return {name: [float(value) for value in values] for name, values in history.history.items()}
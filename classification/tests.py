@@ -1,3 +1,708 @@
-from django.test import TestCase  # NOQA
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import keras
+import numpy as np
+import tensorflow as tf
+from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.containers import RepositoryContainer, ServiceContainer
+from core.exceptions import TrainingRejectedError
+from core.queries import assert_max_queries
+from core.testing import TEST_HYPER_PARAMS, IsolatedFilesMixin, create_user_model
+from users.models import UserModel
+
+from .benchmarks import make_image
+from .callbacks import EarlyStoppingCallback
+from .charts import downsample_lttb, downsample_series
+from .dto import HyperParamsDTO, SweepParamsDTO, TrainingCheckpointDTO, TrainingCostDTO
+from .estimator import estimate_training_cost
+from .forms import SweepForm
+from .models import ClassificationModel, SweepModel, WeightsModel
+from .runtime import INFERENCE
+from .scheduling import FairShareScheduler, TrainingAdmissionController
+from .services import ClassificationService, SweepService
+from .sweep import SharedDataset
+
+
+class SweepFormTests(SimpleTestCase):
+    def test_parse_values(self):
+        self.assertEqual(SweepForm._parse_values("16, 32-64:16", max_value=128), [16, 32, 48, 64])
+
+    def test_huge_range_is_rejected_before_expanding(self):
+        with self.assertRaises(forms.ValidationError):
+            SweepForm._parse_values("1-999999999999", max_value=128)
+
+    def test_invalid_bounds_and_steps_are_rejected(self):
+        for value in ("0", "5-3", "1-8:0", "1-8:-1", "a"):
+            with self.subTest(value=value), self.assertRaises(forms.ValidationError):
+                SweepForm._parse_values(value, max_value=128)
+
+
+class EarlyStoppingCallbackTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.best_weights_path = os.path.join(directory.name, "best.weights.h5")
+
+        self.model = keras.Sequential([keras.layers.Dense(1, input_shape=(1,))])
+
+    def _train_epoch(self, callback, epoch, val_loss):
+        self.model.set_weights([np.full_like(weights, epoch) for weights in self.model.get_weights()])
+        callback.on_epoch_end(epoch, {"val_loss": val_loss})
+
+    def test_fine_tuning_tracks_the_best_epoch_from_its_first_epoch(self):
+        # The base model trained 10 epochs, its best was epoch 5.
+        history = {"val_loss": [0.9, 0.8, 0.7, 0.6, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]}
+        callback = EarlyStoppingCallback(3, self.best_weights_path, history=history, start_epoch=10)
+        callback.set_model(self.model)
+
+        self._train_epoch(callback, 10, 0.5)
+        self._train_epoch(callback, 11, 0.4)
+        self._train_epoch(callback, 12, 0.45)
+
+        self.assertFalse(self.model.stop_training)
+        self.assertEqual(callback.best_epoch, 12)
+
+        callback.on_train_end()
+
+        self.assertEqual(self.model.get_weights()[0][0][0], 11)
+
+    def test_resumed_fine_tuning_restores_the_best_fine_tuned_weights(self):
+        history = {"val_loss": [0.9, 0.1, 0.5, 0.4, 0.45]}
+        callback = EarlyStoppingCallback(2, self.best_weights_path, history=history, start_epoch=2)
+        callback.set_model(self.model)
+        self.model.set_weights([np.full_like(weights, 3) for weights in self.model.get_weights()])
+        self.model.save_weights(self.best_weights_path)
+
+        self.assertEqual((callback.best, callback.best_epoch), (0.4, 4))
+
+        self._train_epoch(callback, 5, 0.6)
+        callback.on_train_end()
+
+        self.assertTrue(self.model.stop_training)
+        self.assertEqual(self.model.get_weights()[0][0][0], 3)
+
+
+class FineTuningTests(IsolatedFilesMixin, TestCase):
+    @staticmethod
+    def _get_data():
+        images = tf.data.Dataset.from_tensors((tf.random.uniform((2, 150, 150, 3)), tf.constant([0.0, 1.0]))).repeat()
+        return images, images
+
+    def test_early_stopping_ignores_the_epochs_of_the_base_model(self):
+        user = UserModel.objects.create_user(email="user@example.com", password="password")
+        # The base model reached a validation loss the fine-tuning on random images never beats.
+        base_model_dto = create_user_model(user)
+        classification_service = ServiceContainer.classification_service()
+        hyper_params_dto = TEST_HYPER_PARAMS.model_copy(update={"epochs": 2, "early_stopping": True, "patience": 1})
+
+        checkpoint_dto = classification_service._start_fine_tuning(
+            user, hyper_params_dto, "fine-tuning", base_model_dto.id, freeze_conv=False
+        )
+        with mock.patch.object(ClassificationService, "_get_data", staticmethod(self._get_data)):
+            model_dto = classification_service._train_model(
+                user, checkpoint_dto.hyper_params, "fine-tuning", None, checkpoint_dto, callbacks=[]
+            )
+
+        self.assertEqual(checkpoint_dto.base_epochs, 1)
+        self.assertEqual(len(model_dto.history), 3)
+
+
+class TrainingCheckpointTests(IsolatedFilesMixin, TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(email="user@example.com", password="password")
+        self.classification_service = ServiceContainer.classification_service()
+        self.checkpoint_store = self.classification_service.checkpoint_store
+        self.hyper_params_dto = TEST_HYPER_PARAMS.model_copy(update={"epochs": 3})
+
+    def _save_checkpoint(self, user, epoch: int) -> TrainingCheckpointDTO:
+        model = ClassificationService._get_custom_user_model(self.hyper_params_dto)
+        model.compile(loss="binary_crossentropy", optimizer="rmsprop", metrics=["accuracy"])
+        checkpoint_dto = TrainingCheckpointDTO(
+            job_id="job",
+            user_id=user.pk,
+            hyper_params=self.hyper_params_dto,
+            epoch=epoch,
+            history={name: [0.25] * epoch for name in ClassificationService.HISTORY_METRICS},
+        )
+        self.checkpoint_store.save(checkpoint_dto, model)
+
+        return checkpoint_dto
+
+    def test_training_is_resumed_after_the_last_checkpointed_epoch(self):
+        self._save_checkpoint(self.user, epoch=2)
+
+        checkpoint_dto = self.checkpoint_store.find("job", self.user.pk, self.hyper_params_dto)
+        with mock.patch.object(ClassificationService, "_get_data", staticmethod(FineTuningTests._get_data)):
+            model_dto = self.classification_service._train_model(
+                self.user, self.hyper_params_dto, "job", "key", checkpoint_dto, callbacks=[]
+            )
+
+        history = sorted(model_dto.history, key=lambda epoch: epoch.epoch_number)
+        self.assertEqual([epoch.val_loss for epoch in history][:2], [0.25, 0.25])
+        self.assertEqual(len(history), 3)
+        self.assertIsNone(self.checkpoint_store.load(self.user.pk, "job"))
+
+    def test_checkpoint_with_other_hyperparameters_is_discarded(self):
+        self._save_checkpoint(self.user, epoch=2)
+
+        hyper_params_dto = self.hyper_params_dto.model_copy(update={"epochs": 4})
+
+        self.assertIsNone(self.checkpoint_store.find("job", self.user.pk, hyper_params_dto))
+        self.assertIsNone(self.checkpoint_store.load(self.user.pk, "job"))
+
+    def test_job_id_of_another_user_does_not_reach_their_checkpoint(self):
+        other_user = UserModel.objects.create_user(email="other@example.com", password="password")
+        self._save_checkpoint(self.user, epoch=2)
+
+        self.assertIsNone(self.checkpoint_store.find("job", other_user.pk, self.hyper_params_dto))
+        self._save_checkpoint(other_user, epoch=1)
+        self.checkpoint_store.delete(other_user.pk, "job")
+
+        self.assertEqual(self.checkpoint_store.find("job", self.user.pk, self.hyper_params_dto).epoch, 2)
+        self.assertEqual([checkpoint_dto.user_id for checkpoint_dto in self.checkpoint_store.list()], [self.user.pk])
+
+
+class WeightsReferenceTests(IsolatedFilesMixin, TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(email="user@example.com", password="password")
+        self.other_user = UserModel.objects.create_user(email="other@example.com", password="password")
+        self.classification_service = ServiceContainer.classification_service()
+
+        training_key = mock.patch.object(ClassificationService, "_get_training_key", return_value="key")
+        training_key.start()
+        self.addCleanup(training_key.stop)
+
+    def test_identical_training_reuses_the_weights(self):
+        model_dto = create_user_model(self.user, training_key="key")
+
+        with mock.patch.object(ClassificationService, "_train_model") as train_model:
+            copied_model_dto = self.classification_service.create_model(self.other_user, TEST_HYPER_PARAMS)
+
+        train_model.assert_not_called()
+        self.assertEqual(copied_model_dto.user_id, self.other_user.pk)
+        self.assertEqual(copied_model_dto.weights.id, model_dto.weights.id)
+        self.assertEqual(len(copied_model_dto.history), 1)
+        self.assertEqual(WeightsModel.objects.get(pk=model_dto.weights.id).references, 2)
+
+    def test_weights_are_deleted_with_the_last_reference(self):
+        model_dto = create_user_model(self.user, training_key="key")
+        copied_model_dto = self.classification_service.create_model(self.other_user, TEST_HYPER_PARAMS)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ClassificationModel.objects.get(pk=model_dto.id).delete()
+
+        self.assertEqual(WeightsModel.objects.get(pk=model_dto.weights.id).references, 1)
+        self.assertTrue(os.path.exists(model_dto.weights.path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ClassificationModel.objects.get(pk=copied_model_dto.id).delete()
+
+        self.assertFalse(WeightsModel.objects.filter(pk=model_dto.weights.id).exists())
+        self.assertFalse(os.path.exists(model_dto.weights.path))
+
+    def test_model_deleted_after_it_was_found_is_trained_instead(self):
+        model_dto = create_user_model(self.user, training_key="key")
+        with self.captureOnCommitCallbacks(execute=True):
+            ClassificationModel.objects.get(pk=model_dto.id).delete()
+
+        with (
+            mock.patch.object(
+                type(self.classification_service.classification_model_repository),
+                "get_model_by_training_key",
+                return_value=model_dto,
+            ),
+            mock.patch.object(ClassificationService, "_train_model") as train_model,
+        ):
+            self.classification_service.create_model(self.other_user, TEST_HYPER_PARAMS)
+
+        train_model.assert_called_once()
+
+
+class RunSweepTests(IsolatedFilesMixin, TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(email="user@example.com", password="password")
+        self.sweep = SweepModel.objects.create(user=self.user, configurations=1)
+        self.sweep_params_dto = SweepParamsDTO(
+            filters_1_layer=[1], filters_2_layer=[1], filters_3_layer=[1], dense_neurons=[1], epochs=1
+        )
+        self.training_scheduler = FairShareScheduler(TrainingAdmissionController(), queue_timeout=0)
+        self.sweep_service = SweepService(
+            RepositoryContainer.classification_model_repository(),
+            RepositoryContainer.sweep_repository(),
+            self.training_scheduler,
+            RepositoryContainer.weights_store(),
+        )
+
+        extract_dataset = mock.patch.object(ClassificationService, "_extract_dataset", return_value="dataset")
+        extract_dataset.start()
+        self.addCleanup(extract_dataset.stop)
+
+    def test_failed_setup_fails_the_sweep_and_closes_the_created_datasets(self):
+        train_dataset = mock.Mock()
+
+        with mock.patch.object(SharedDataset, "from_directory", side_effect=[train_dataset, OSError]):
+            with self.assertRaises(OSError):
+                self.sweep_service.run_sweep(self.user, self.sweep.id, self.sweep_params_dto)
+
+        self.sweep.refresh_from_db()
+        self.assertEqual(self.sweep.status, SweepModel.STATUS_FAILED)
+        train_dataset.close.assert_called_once_with()
+        self.assertFalse(os.path.exists(os.path.join(settings.SWEEP_DIR, str(self.sweep.id))))
+        self.assertEqual(self.training_scheduler.admission_controller.get_usage(), (0, 0))
+
+    def test_datasets_are_decoded_after_admission(self):
+        # A running training holds all the CPUs, so the sweep is not admitted within the queue timeout.
+        claim_id = self.training_scheduler.admission_controller.try_claim(
+            TrainingCostDTO(
+                parameters=0, flops_per_image=0, activation_bytes_per_image=0, peak_memory_bytes=0, cpu_seconds=0
+            ),
+            cpus=10**6,
+        )
+        self.addCleanup(self.training_scheduler.admission_controller.release, claim_id)
+
+        with mock.patch.object(SharedDataset, "from_directory") as from_directory:
+            with self.assertRaises(TrainingRejectedError):
+                self.sweep_service.run_sweep(self.user, self.sweep.id, self.sweep_params_dto)
+
+        from_directory.assert_not_called()
+        self.sweep.refresh_from_db()
+        self.assertEqual(self.sweep.status, SweepModel.STATUS_FAILED)
+
+
+class CreateModelViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(UserModel.objects.create_user(email="user@example.com", password="password"))
+        self.job_id = uuid.uuid4()
+
+    def _assert_new_job_id(self, response):
+        job_id = response.context["job_id"]
+        self.assertNotEqual(job_id, self.job_id)
+        self.assertContains(response, f'name="job_id" value="{job_id}"')
+
+    def test_invalid_form_is_shown_with_a_new_job_id(self):
+        response = self.client.post(reverse("classification:create_model"), {"job_id": self.job_id})
+
+        self.assertTrue(response.context["form"].errors)
+        self._assert_new_job_id(response)
+
+    def test_rejected_training_is_shown_with_a_new_job_id(self):
+        data = {**TEST_HYPER_PARAMS.model_dump(exclude={"early_stopping"}), "job_id": self.job_id}
+
+        with mock.patch.object(ClassificationService, "create_model", side_effect=TrainingRejectedError()):
+            response = self.client.post(reverse("classification:create_model"), data)
+
+        self.assertTrue(response.context["form"].non_field_errors())
+        self._assert_new_job_id(response)
+
+
+class DownsampleTests(SimpleTestCase):
+    def setUp(self):
+        self.x = np.arange(1, 1001, dtype=float)
+        self.y = np.sin(self.x / 50)
+
+    def test_endpoints_are_kept(self):
+        indices = downsample_lttb(self.x, self.y, 50)
+
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+
+    def test_at_most_points_indices_are_selected(self):
+        for points in (3, 50, 999):
+            with self.subTest(points=points):
+                indices = downsample_lttb(self.x, self.y, points)
+
+                self.assertLessEqual(len(indices), points)
+                self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_spike_survives(self):
+        y = np.zeros(1000)
+        y[537] = 1.0
+
+        self.assertIn(537, downsample_lttb(self.x, y, 20))
+
+    def test_short_history_passes_through(self):
+        x = list(range(1, 11))
+        series = {"loss": [1.0 / epoch for epoch in x], "accuracy": [epoch / 10 for epoch in x]}
+
+        np.testing.assert_array_equal(downsample_lttb(np.array(x), np.array(series["loss"]), 50), np.arange(10))
+        self.assertEqual(downsample_series(x, series, 50), (x, series))
+
+    def test_series_stay_aligned(self):
+        series = {"loss": list(self.y), "accuracy": list(np.cos(self.x / 30))}
+
+        x, downsampled = downsample_series(list(self.x), series, 100)
+
+        self.assertEqual(x[0], 1)
+        self.assertEqual(x[-1], 1000)
+        for name, y in downsampled.items():
+            self.assertEqual(y, [series[name][int(epoch) - 1] for epoch in x])
+
+
+class ChartDataViewTests(IsolatedFilesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user(email="user@example.com", password="password")
+        cls.model_dto = create_user_model(cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_too_few_points_are_rejected(self):
+        url = reverse("classification:model_chart_data", args=[self.model_dto.id])
+
+        for points in ("0", "2", "-1", "a"):
+            with self.subTest(points=points):
+                self.assertEqual(self.client.get(url, {"points": points}).status_code, 400)
+
+        response = self.client.get(url, {"points": "3", "metrics": "loss"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"epochs": [1], "series": {"loss": [0.5]}})
+
+
+class ConditionalModelPageTests(IsolatedFilesMixin, TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(email="user@example.com", password="password")
+        self.client.force_login(self.user)
+        self.model_dto = create_user_model(self.user)
+        self.url = reverse("classification:user_model", args=[self.model_dto.id])
+
+        # The first page sets the CSRF cookie, which is part of the entity tag of the following ones.
+        self.client.get(self.url)
+
+    def _get_validators(self) -> tuple[str, str]:
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        return response["ETag"], response["Last-Modified"]
+
+    def test_repeated_get_is_not_modified(self):
+        etag, last_modified = self._get_validators()
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_saved_model_is_modified(self):
+        etag, _ = self._get_validators()
+
+        ClassificationModel.objects.get(pk=self.model_dto.id).save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_fine_tuned_model_is_modified_by_the_deletion_of_its_base_model(self):
+        base_model_dto = create_user_model(self.user)
+        ClassificationModel.objects.filter(pk=self.model_dto.id).update(base_model_id=base_model_dto.id)
+        etag, _ = self._get_validators()
+
+        ClassificationModel.objects.get(pk=base_model_dto.id).delete()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class TrainingCostTests(IsolatedFilesMixin, SimpleTestCase):
+    def test_estimate_matches_the_built_model(self):
+        hyper_params_dto = HyperParamsDTO(
+            filters_1_layer=16, filters_2_layer=32, filters_3_layer=64, dense_neurons=512, epochs=15
+        )
+        model = ClassificationService._get_custom_user_model(hyper_params_dto)
+
+        flops = 0
+        for layer in model.layers:
+            if isinstance(layer, keras.layers.Conv2D):
+                _, height, width, filters = layer.output_shape
+                flops += 2 * height * width * np.prod(layer.kernel.shape[:3]) * filters
+            elif isinstance(layer, keras.layers.Dense):
+                flops += 2 * np.prod(layer.kernel.shape)
+
+        cost_dto = estimate_training_cost(hyper_params_dto)
+
+        self.assertEqual(cost_dto.parameters, model.count_params())
+        self.assertEqual(cost_dto.flops_per_image, flops)
+
+    @override_settings(
+        TF_RUNTIME_ROLE=INFERENCE,
+        TF_RUNTIME={
+            **settings.TF_RUNTIME,
+            "inference": {"intra_op_threads": 1, "inter_op_threads": 1},
+            "training": {"intra_op_threads": 3, "inter_op_threads": 2},
+        },
+    )
+    def test_training_claims_the_cores_of_the_training_profile(self):
+        classification_service = ServiceContainer.classification_service()
+        user = mock.Mock(pk=1)
+
+        with (
+            mock.patch.object(ClassificationService, "_get_training_key", return_value="key"),
+            mock.patch.object(ClassificationService, "_train_model"),
+            mock.patch.object(classification_service.checkpoint_store, "find", return_value=None),
+            mock.patch.object(classification_service.training_scheduler, "schedule") as schedule,
+        ):
+            classification_service.create_model(user, TEST_HYPER_PARAMS, reuse_results=False)
+
+        self.assertEqual(schedule.call_args.args[2], 3)
+
+
+class FairShareSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.admission_controller = TrainingAdmissionController(
+            ledger_path=os.path.join(directory.name, "ledger.json"),
+            cpu_budget=4,
+            memory_budget=1024,
+            max_cpu_seconds=1000,
+        )
+        self.started = []
+
+        self.now = 0.0
+        clock = mock.patch("classification.scheduling.time.monotonic", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def _get_scheduler(self, **kwargs) -> FairShareScheduler:
+        options = {"max_concurrent": 1, "cpu_seconds_quota": 1000, "quota_window": 60, "queue_timeout": 0}
+        return FairShareScheduler(self.admission_controller, poll_interval=0.01, **{**options, **kwargs})
+
+    @staticmethod
+    def _get_cost(cpu_seconds: float = 10, memory: int = 0) -> TrainingCostDTO:
+        return TrainingCostDTO(
+            parameters=0,
+            flops_per_image=0,
+            activation_bytes_per_image=0,
+            peak_memory_bytes=memory,
+            cpu_seconds=cpu_seconds,
+        )
+
+    def _start_waiting(self, scheduler: FairShareScheduler, name: str, user_id: int, cpus: int = 1) -> threading.Thread:
+        """Start a training of the user in a thread, returning once it waits in the queue."""
+
+        def train():
+            with scheduler.schedule(user_id, self._get_cost(), cpus):
+                self.started.append(name)
+
+        waiting = sum(scheduler.get_metrics().queue_depth.values())
+        thread = threading.Thread(target=train)
+        thread.start()
+        while sum(scheduler.get_metrics().queue_depth.values()) == waiting:
+            time.sleep(0.001)
+
+        return thread
+
+    def _claim_all_cpus(self) -> str:
+        return self.admission_controller.try_claim(self._get_cost(), cpus=self.admission_controller.cpu_budget)
+
+    def test_users_are_served_fairly(self):
+        scheduler = self._get_scheduler(queue_timeout=10, max_concurrent=4)
+        claim_id = self._claim_all_cpus()
+        threads = [
+            self._start_waiting(scheduler, name, user_id, cpus=4)
+            for name, user_id in (("a1", 1), ("a2", 1), ("a3", 1), ("b1", 2))
+        ]
+
+        self.admission_controller.release(claim_id)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.started, ["a1", "b1", "a2", "a3"])
+
+    def test_large_training_at_the_head_is_not_overtaken(self):
+        scheduler = self._get_scheduler(queue_timeout=10)
+        claim_id = self.admission_controller.try_claim(self._get_cost(), cpus=2)
+        threads = [self._start_waiting(scheduler, "large", 1, cpus=4), self._start_waiting(scheduler, "small", 2)]
+
+        # The small training fits next to the claim, but waits for the large one at the head of the queue.
+        time.sleep(0.1)
+        self.assertEqual(self.started, [])
+
+        self.admission_controller.release(claim_id)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.started, ["large", "small"])
+
+    def test_cpu_seconds_quota(self):
+        scheduler = self._get_scheduler(cpu_seconds_quota=100)
+
+        with scheduler.schedule(1, self._get_cost(60), 1):
+            pass
+        with self.assertRaises(TrainingRejectedError) as context:
+            scheduler.check(1, self._get_cost(60))
+        scheduler.check(2, self._get_cost(60))
+
+        self.assertTrue(context.exception.retryable)
+        self.assertEqual(scheduler.get_metrics().rejected, 1)
+
+        self.now += 61
+        with scheduler.schedule(1, self._get_cost(60), 1):
+            pass
+
+    def test_concurrent_trainings_of_a_user_are_limited(self):
+        scheduler = self._get_scheduler(max_concurrent=1)
+
+        with scheduler.schedule(1, self._get_cost(), 1):
+            with self.assertRaises(TrainingRejectedError):
+                with scheduler.schedule(1, self._get_cost(), 1):
+                    pass
+            with scheduler.schedule(2, self._get_cost(), 1):
+                self.assertEqual(scheduler.get_metrics().running, 2)
+
+        with scheduler.schedule(1, self._get_cost(), 1):
+            pass
+
+    def test_claims_are_released(self):
+        scheduler = self._get_scheduler()
+
+        with scheduler.schedule(1, self._get_cost(memory=100), 3):
+            self.assertEqual(self.admission_controller.get_usage(), (3, 100))
+
+        self.assertEqual(self.admission_controller.get_usage(), (0, 0))
+
+    def test_claim_of_an_exited_process_is_released(self):
+        process = subprocess.Popen(["true"])
+        process.wait()
+        with open(self.admission_controller.ledger_path, "w") as ledger_file:
+            json.dump({"stale": {"pid": process.pid, "cpus": 4, "memory": 1024}}, ledger_file)
+
+        self.assertEqual(self.admission_controller.get_usage(), (0, 0))
+        self.assertIsNotNone(self.admission_controller.try_claim(self._get_cost(memory=1024), cpus=4))
+
+    def test_training_beyond_the_budgets_is_rejected(self):
+        scheduler = self._get_scheduler()
+
+        for cost_dto in (self._get_cost(memory=1025), self._get_cost(cpu_seconds=1001)):
+            with self.subTest(cost_dto=cost_dto), self.assertRaises(TrainingRejectedError) as context:
+                scheduler.check(1, cost_dto)
+            self.assertFalse(context.exception.retryable)
+
+
+BUILT_IN_WEIGHTS_PRESENT = all(os.path.exists(path) for path in ClassificationService.BUILT_IN_WEIGHTS.values())
+
+
+class ViewQueryBudgetTests(IsolatedFilesMixin, TestCase):
+    """
+    Pin the number of database queries of every view, so a query added in a loop fails a test.
+
+    The budgets include the queries of the session and the user, and are counted with empty caches.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user(email="user@example.com", password="password")
+        cls.staff = UserModel.objects.create_user(email="staff@example.com", password="password", is_staff=True)
+        cls.model_dto = create_user_model(cls.user)
+        create_user_model(cls.user)
+        cls.sweep = SweepModel.objects.create(user=cls.user, configurations=1)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def _get_image(self) -> SimpleUploadedFile:
+        return SimpleUploadedFile("image.jpg", make_image((640, 480), "JPEG"), content_type="image/jpeg")
+
+    def test_cats_or_dogs(self):
+        with assert_max_queries(2):
+            response = self.client.get(reverse("classification:cats_or_dogs"))
+        self.assertEqual(response.status_code, 200)
+
+    @skipUnless(BUILT_IN_WEIGHTS_PRESENT, "the weights of the built-in models are not present")
+    def test_cats_or_dogs_prediction(self):
+        with assert_max_queries(3):
+            response = self.client.post(
+                reverse("classification:cats_or_dogs"), {"title": "Photo", "image": self._get_image()}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("prediction", response.context)
+
+    def test_cats_or_dogs_pre_trained_model(self):
+        with assert_max_queries(2):
+            response = self.client.get(reverse("classification:cats_or_dogs_pre_trained_model"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_model(self):
+        with assert_max_queries(3):
+            response = self.client.get(reverse("classification:create_model"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_model_invalid(self):
+        with assert_max_queries(3):
+            response = self.client.post(reverse("classification:create_model"), {"filters_1_layer": 0})
+        self.assertEqual(response.status_code, 200)
+
+    def test_training_events(self):
+        with assert_max_queries(2):
+            response = self.client.get(reverse("classification:training_events", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_training_queue(self):
+        self.client.force_login(self.staff)
+        with assert_max_queries(2):
+            response = self.client.get(reverse("classification:training_queue"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_model(self):
+        with assert_max_queries(5):
+            response = self.client.get(reverse("classification:user_model", args=[self.model_dto.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_model_prediction(self):
+        url = reverse("classification:user_model", args=[self.model_dto.id])
+        with assert_max_queries(7):
+            response = self.client.post(url, {"title": "Photo", "image": self._get_image()})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("prediction", response.context)
+
+    def test_model_chart_data(self):
+        with assert_max_queries(5):
+            response = self.client.get(reverse("classification:model_chart_data", args=[self.model_dto.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_models(self):
+        with assert_max_queries(4):
+            response = self.client.get(reverse("classification:user_models"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_models_cached(self):
+        self.client.get(reverse("classification:user_models"))
+        with assert_max_queries(3):
+            response = self.client.get(reverse("classification:user_models"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_compare_models(self):
+        with assert_max_queries(2):
+            response = self.client.get(reverse("classification:compare_models"))
+        self.assertEqual(response.status_code, 200)
+
+    @skipUnless(BUILT_IN_WEIGHTS_PRESENT, "the weights of the built-in models are not present")
+    def test_compare_models_prediction(self):
+        with assert_max_queries(5):
+            response = self.client.post(
+                reverse("classification:compare_models"), {"title": "Photo", "image": self._get_image()}
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_sweep(self):
+        with assert_max_queries(2):
+            response = self.client.get(reverse("classification:create_sweep"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_sweep(self):
+        with assert_max_queries(4):
+            response = self.client.get(reverse("classification:sweep", args=[self.sweep.pk]))
+        self.assertEqual(response.status_code, 200)
@@ -8,6 +8,12 @@ urlpatterns = [
     path("cats_or_dogs", views.cats_or_dogs, name="cats_or_dogs"),
     path("cats_or_dogs_pre_trained", views.cats_or_dogs_pre_trained_model, name="cats_or_dogs_pre_trained_model"),
     path("create_model", views.create_model, name="create_model"),
+    path("training/<uuid:job_id>/events", views.training_events, name="training_events"),
+    path("training/queue", views.training_queue, name="training_queue"),
     path("user_model/<int:model_id>", views.get_user_model, name="user_model"),
+    path("user_model/<int:model_id>/chart_data", views.get_model_chart_data, name="model_chart_data"),
     path("user_models", views.get_user_models, name="user_models"),
+    path("compare", views.compare_models, name="compare_models"),
+    path("sweeps/create", views.create_sweep, name="create_sweep"),
+    path("sweeps/<int:sweep_id>", views.get_sweep, name="sweep"),
 ]
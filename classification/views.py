@@ -1,14 +1,37 @@
+import functools
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 
+from core.conditional import LAYOUT_TEMPLATES, get_templates_modified, make_etag
 from core.containers import ServiceContainer
-from core.exceptions import InstanceNotExistError
+from core.exceptions import InstanceNotExistError, TrainingRejectedError, WeightsIntegrityError
+from core.uploads import image_uploads
+
+from .dto import CreateImageDTO, HyperParamsDTO, PredictionDTO, SweepParamsDTO
+from .forms import HyperParamsForm, ImageUploadForm, SweepForm
+from .progress import progress_channel
+
+logger = logging.getLogger(__name__)
+
+CHART_POINTS = 500
+CHART_MIN_POINTS = 3
+CHART_MAX_POINTS = 5000
 
-from .dto import CreateImageDTO, HyperParamsDTO
-from .forms import HyperParamsForm, ImageUploadForm
+WEIGHTS_DAMAGED_MESSAGE = "Файл ваг моделі пошкоджено, модель неможливо використати."
 
 
 @login_required()
+@image_uploads
 def cats_or_dogs(request):
     """
     Handle the Cats or Dogs classification view.
@@ -26,10 +49,13 @@ def cats_or_dogs(request):
     if request.method == "POST":
         form = ImageUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            image_dto = CreateImageDTO(user_id=request.user.id, **form.cleaned_data)
+            cleaned_data = dict(form.cleaned_data)
+            tta = cleaned_data.pop("tta")
+            image_dto = CreateImageDTO(user_id=request.user.id, **cleaned_data)
 
             classification_service = ServiceContainer.classification_service()
-            image, prediction = classification_service.get_prediction(image_dto, "cats_or_dogs_model")
+            image, prediction = classification_service.get_prediction(image_dto, "cats_or_dogs_model", tta=tta)
+            _log_prediction(prediction)
 
             form = ImageUploadForm()
 
@@ -38,12 +64,13 @@ def cats_or_dogs(request):
                 "classification/cats_or_dogs.html",
                 {"image": image, "prediction": prediction, "form": form},
             )
-
-    form = ImageUploadForm()
+    else:
+        form = ImageUploadForm()
     return render(request, "classification/cats_or_dogs.html", {"form": form})
 
 
 @login_required()
+@image_uploads
 def cats_or_dogs_pre_trained_model(request):
     """
     Handle the Cats or Dogs classification view.
@@ -61,10 +88,15 @@ def cats_or_dogs_pre_trained_model(request):
     if request.method == "POST":
         form = ImageUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            image_dto = CreateImageDTO(user_id=request.user.id, **form.cleaned_data)
+            cleaned_data = dict(form.cleaned_data)
+            tta = cleaned_data.pop("tta")
+            image_dto = CreateImageDTO(user_id=request.user.id, **cleaned_data)
 
             classification_service = ServiceContainer.classification_service()
-            image, prediction = classification_service.get_prediction(image_dto, "cats_or_dogs_transfer_learned_model")
+            image, prediction = classification_service.get_prediction(
+                image_dto, "cats_or_dogs_transfer_learned_model", tta=tta
+            )
+            _log_prediction(prediction)
 
             form = ImageUploadForm()
 
@@ -73,11 +105,15 @@ def cats_or_dogs_pre_trained_model(request):
                 "classification/cats_or_dogs_transfer_learned_model.html",
                 {"image": image, "prediction": prediction, "form": form},
             )
-
-    form = ImageUploadForm()
+    else:
+        form = ImageUploadForm()
     return render(request, "classification/cats_or_dogs_transfer_learned_model.html", {"form": form})
 
 
+def _log_prediction(prediction_dto: PredictionDTO) -> None:
+    logger.info("Prediction %s", prediction_dto.model_dump_json())
+
+
 @login_required
 def create_model(request):
     """
@@ -85,29 +121,164 @@ def create_model(request):
 
     This view expects a POST request with form data containing hyperparameters. Upon successful form validation,
     it uses the Classification Service to create a model, retrieves the training history, and renders a page
-    displaying model metrics over epochs.
+    displaying model metrics over epochs. The form carries a job identifier, so the page can follow
+    the training progress while the request is processed. A model of the user can be chosen to fine-tune,
+    the `base_model` query parameter preselects it together with its layer shapes.
     """
 
+    classification_service = ServiceContainer.classification_service()
+    base_models = classification_service.get_user_models(request.user)
+
     if request.method == "POST":
-        form = HyperParamsForm(request.POST)
+        form = HyperParamsForm(request.POST, base_models=base_models)
         if form.is_valid():
-            hyper_params_dto = HyperParamsDTO(**form.cleaned_data)
-            classification_service = ServiceContainer.classification_service()
-            model_dto = classification_service.create_model(request.user, hyper_params_dto)
+            cleaned_data = dict(form.cleaned_data)
+            job_id = cleaned_data.pop("job_id")
+            reuse_results = not cleaned_data.pop("fresh_training")
+            base_model_id = cleaned_data.pop("base_model")
+            freeze_conv = cleaned_data.pop("freeze_conv")
+            hyper_params_dto = HyperParamsDTO(**cleaned_data)
+            try:
+                model_dto = classification_service.create_model(
+                    request.user,
+                    hyper_params_dto,
+                    job_id=job_id.hex if job_id else None,
+                    reuse_results=reuse_results,
+                    base_model_id=base_model_id,
+                    freeze_conv=freeze_conv,
+                )
+            except TrainingRejectedError as error:
+                form.add_error(None, _get_rejection_message(error))
+            except WeightsIntegrityError:
+                form.add_error(None, WEIGHTS_DAMAGED_MESSAGE)
+            else:
+                context = get_model_context(model_dto)
+
+                return render(request, "classification/user_model.html", context)
+
+        # The submitted job may already be closed in the progress channel, so a resubmitted form starts a new job.
+        job_id = uuid.uuid4()
+        form.data = form.data.copy()
+        form.data["job_id"] = job_id
+        return render(request, "classification/create_model.html", {"form": form, "job_id": job_id})
+
+    job_id = uuid.uuid4()
+    initial = {"job_id": job_id}
+
+    base_model_id = request.GET.get("base_model", "")
+    base_model_dto = next((model_dto for model_dto in base_models if str(model_dto.id) == base_model_id), None)
+    if base_model_dto:
+        initial.update({field: getattr(base_model_dto, field) for field in HyperParamsForm.LAYER_FIELDS})
+        initial["base_model"] = base_model_dto.id
+
+    form = HyperParamsForm(initial=initial, base_models=base_models)
+    return render(request, "classification/create_model.html", {"form": form, "job_id": job_id})
+
+
+def _get_rejection_message(error: TrainingRejectedError) -> str:
+    if error.retryable:
+        return "Сервер зараз зайнятий навчанням інших моделей, спробуйте пізніше."
+    return "Модель з такими гіперпараметрами занадто велика, зменшіть кількість фільтрів, нейронів або епох."
 
-            context = get_model_context(model_dto)
 
-            return render(request, "classification/user_model.html", context)
+@login_required
+def training_events(request, job_id):
+    """
+    Stream the progress of a training job as Server-Sent Events.
+
+    Every event carries the metrics published by the training as JSON. A reconnecting client continues
+    after the event given in the Last-Event-ID header.
+
+    Args:
+        request (HttpRequest): The request object.
+        job_id (UUID): The identifier of the training job.
+
+    Returns:
+        StreamingHttpResponse - The stream of training events.
+    """
+
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    events = progress_channel.subscribe(
+        job_id.hex,
+        request.user.id,
+        last_event_id=int(last_event_id) if last_event_id.isdigit() else -1,
+    )
+
+    response = StreamingHttpResponse(_format_events(events), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@staff_member_required
+def training_queue(request):
+    """
+    Report the queue depth and the waiting times of the training scheduler of the serving process as JSON.
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        JsonResponse - Waiting trainings per lane, running trainings and waiting time percentiles in seconds.
+    """
+
+    classification_service = ServiceContainer.classification_service()
+    return JsonResponse(classification_service.get_training_queue_metrics().model_dump())
+
+
+def _format_events(events):
+    for event in events:
+        if event is None:
+            yield ": keepalive\n\n"
+            continue
+
+        event_id, event_type, data = event
+        yield f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+USER_MODEL_TEMPLATES = (
+    "classification/user_model.html",
+    "classification/prediction.html",
+    "classification/training_charts.html",
+    *LAYOUT_TEMPLATES,
+)
 
-    form = HyperParamsForm()
-    return render(request, "classification/create_model.html", {"form": form})
+
+def _get_model_updated_at(request, model_id):
+    if not hasattr(request, "_model_updated_at"):
+        classification_service = ServiceContainer.classification_service()
+        request._model_updated_at = classification_service.get_user_model_updated_at(request.user, model_id)
+
+    return request._model_updated_at
+
+
+def _get_model_last_modified(request, model_id):
+    updated_at = _get_model_updated_at(request, model_id)
+    if updated_at is None:
+        return None
+
+    return max(updated_at.replace(microsecond=0), get_templates_modified(USER_MODEL_TEMPLATES))
+
+
+def _get_model_etag(request, model_id):
+    updated_at = _get_model_updated_at(request, model_id)
+    if updated_at is None:
+        return None
+
+    return make_etag(
+        request, model_id, updated_at.timestamp(), get_templates_modified(USER_MODEL_TEMPLATES).timestamp()
+    )
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_get_model_etag, last_modified_func=_get_model_last_modified)
+@image_uploads
 def get_user_model(request, model_id):
     """
     View for displaying details of a specific classification model owned by the logged-in user.
     Retrieves the model information from the Classification Service and handles image uploads for classification.
+    Repeated GET requests of an unchanged model are answered by 304 Not Modified without loading the model.
     If the request method is POST, process the uploaded image using the classification service.
     Display the uploaded image and the classification result.
     """
@@ -117,10 +288,22 @@ def get_user_model(request, model_id):
     if request.method == "POST":
         form = ImageUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            image_dto = CreateImageDTO(user_id=request.user.id, **form.cleaned_data)
+            cleaned_data = dict(form.cleaned_data)
+            tta = cleaned_data.pop("tta")
+            image_dto = CreateImageDTO(user_id=request.user.id, **cleaned_data)
 
             model_dto = classification_service.get_user_model(request.user, model_id)
-            image, prediction = classification_service.get_prediction(image_dto, "user_model", model_dto=model_dto)
+            try:
+                image, prediction = classification_service.get_prediction(
+                    image_dto, "user_model", model_dto=model_dto, tta=tta
+                )
+            except WeightsIntegrityError:
+                form.add_error(None, WEIGHTS_DAMAGED_MESSAGE)
+                context = get_model_context(model_dto)
+                context["form"] = form
+
+                return render(request, "classification/user_model.html", context)
+            _log_prediction(prediction)
 
             form = ImageUploadForm()
 
@@ -128,8 +311,8 @@ def get_user_model(request, model_id):
             context.update({"form": form, "image": image, "prediction": prediction})
 
             return render(request, "classification/user_model.html", context)
-
-    form = ImageUploadForm()
+    else:
+        form = ImageUploadForm()
 
     try:
         model_dto = classification_service.get_user_model(request.user, model_id)
@@ -143,31 +326,142 @@ def get_user_model(request, model_id):
 
 
 def get_model_context(model_dto):
-    epochs, accuracy, val_accuracy, loss, val_loss = zip(
-        *[
-            (epoch.epoch_number, epoch.accuracy, epoch.val_accuracy, epoch.loss, epoch.val_loss)
-            for epoch in model_dto.history
-        ]
-    )
+    # The charts load the history from get_model_chart_data, so the page does not grow with the training.
     context = {
-        "accuracy": list(accuracy),
-        "val_accuracy": list(val_accuracy),
-        "epochs": list(epochs),
-        "loss": list(loss),
-        "val_loss": list(val_loss),
         "model_dto": model_dto,
+        "fragment_cache_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
     }
     return context
 
 
+@login_required
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(last_modified_func=lambda request, model_id: _get_model_updated_at(request, model_id))
+def get_model_chart_data(request, model_id):
+    """
+    Return the training history of a model owned by the logged-in user as JSON for the charts.
+
+    The "metrics" query parameter selects the comma-separated history metrics, all by default, and "points"
+    the maximum number of epochs, at least 3, downsampled with LTTB.
+
+    Args:
+        request (HttpRequest): The request object.
+        model_id (int): The unique identifier of the model.
+
+    Returns:
+        JsonResponse - The kept epoch numbers and the values of every metric at these epochs.
+    """
+
+    classification_service = ServiceContainer.classification_service()
+
+    metrics = [metric for metric in request.GET.get("metrics", "").split(",") if metric]
+    points = request.GET.get("points", "")
+    if any(metric not in classification_service.HISTORY_METRICS for metric in metrics) or (
+        points and (not points.isdigit() or int(points) < CHART_MIN_POINTS)
+    ):
+        return JsonResponse({"error": "Unknown metrics or invalid number of points"}, status=400)
+    points = min(int(points or CHART_POINTS), CHART_MAX_POINTS)
+
+    try:
+        chart_data_dto = classification_service.get_model_chart_data(request.user, model_id, metrics, points)
+    except InstanceNotExistError:
+        return JsonResponse({"error": f"Model with id {model_id} does not exist"}, status=404)
+
+    return JsonResponse(chart_data_dto.model_dump())
+
+
 @login_required
 def get_user_models(request):
     """
     View for displaying a list of classification models owned by the logged-in user.
     Retrieves the list of models from the Classification Service and renders a page displaying the user's models.
+    The cached list is versioned by the number of models and the time of the last save, so it is shared by the
+    processes of a shared cache and never outlives a change, and the models are only retrieved on a new version.
     """
 
     classification_service = ServiceContainer.classification_service()
-    models_dto = classification_service.get_user_models(request.user)
+    models_dto = functools.partial(classification_service.get_user_models, request.user)
+    context = {
+        "models_dto": models_dto,
+        "models_version": classification_service.get_user_models_version(request.user),
+        "fragment_cache_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
+    }
+
+    return render(request, "classification/user_models.html", context)
+
+
+@login_required
+@image_uploads
+def compare_models(request):
+    """
+    View for comparing how the built-in models and all models of the logged-in user classify the same image.
+
+    If the request method is POST, the uploaded image is classified by every model at once
+    and the probabilities of all models are displayed together.
+    """
+
+    if request.method == "POST":
+        form = ImageUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            cleaned_data = dict(form.cleaned_data)
+            tta = cleaned_data.pop("tta")
+            image_dto = CreateImageDTO(user_id=request.user.id, **cleaned_data)
+
+            classification_service = ServiceContainer.classification_service()
+            comparison_dto = classification_service.compare_models(request.user, image_dto, tta=tta)
+            for model_prediction_dto in comparison_dto.predictions:
+                if model_prediction_dto.prediction:
+                    _log_prediction(model_prediction_dto.prediction)
+
+            form = ImageUploadForm()
+
+            return render(
+                request,
+                "classification/compare_models.html",
+                {"form": form, "comparison_dto": comparison_dto, "weights_damaged_message": WEIGHTS_DAMAGED_MESSAGE},
+            )
+    else:
+        form = ImageUploadForm()
+    return render(request, "classification/compare_models.html", {"form": form})
+
+
+@login_required
+def create_sweep(request):
+    """
+    View for starting a hyperparameter sweep over the combinations of the entered values.
+
+    The sweep is trained in the background and the user is redirected to its summary page.
+    """
+
+    if request.method == "POST":
+        form = SweepForm(request.POST)
+        if form.is_valid():
+            sweep_params_dto = SweepParamsDTO(**form.cleaned_data)
+            sweep_service = ServiceContainer.sweep_service()
+            try:
+                sweep_dto = sweep_service.start_sweep(request.user, sweep_params_dto)
+            except TrainingRejectedError as error:
+                form.add_error(None, _get_rejection_message(error))
+            else:
+                return redirect("classification:sweep", sweep_id=sweep_dto.id)
+    else:
+        form = SweepForm()
+
+    return render(request, "classification/create_sweep.html", {"form": form})
+
+
+@login_required
+def get_sweep(request, sweep_id):
+    """
+    View for displaying the models of a hyperparameter sweep ranked by validation accuracy.
+    """
+
+    sweep_service = ServiceContainer.sweep_service()
+
+    try:
+        sweep_dto = sweep_service.get_user_sweep(request.user, sweep_id)
+    except InstanceNotExistError:
+        return render(request, "not_found.html", {"message": "Дане дослідження гіперпараметрів не знайдено!"})
 
-    return render(request, "classification/user_models.html", {"models_dto": models_dto})
+    return render(request, "classification/sweep.html", {"sweep_dto": sweep_dto})
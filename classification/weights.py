@@ -0,0 +1,260 @@
+import gzip
+import hashlib
+import os
+import random
+import shutil
+import string
+import threading
+
+from django.conf import settings
+
+from core.exceptions import WeightsIntegrityError
+
+from .dto import WeightsDTO
+
+
+class WeightsStore:
+    """
+    File storage for the weights of the trained custom models.
+
+    Every weights file is tracked by its size and SHA-256, which are verified before the weights are served.
+    Cold weights are moved to a gzip compressed tier: the file then lives next to its original path with
+    a ".gz" suffix and is transparently decompressed into a local cache when it is loaded.
+    A verified file is remembered by the process until it changes, so it is hashed once rather than on
+    every prediction.
+
+    Methods:
+
+    - get_new_path(): Generate the path of a new weights file.
+    - save(model): Save the weights of a Keras model to a new file.
+    - describe(path): Compute the size and the hash of a weights file.
+    - open(weights_dto): Get a verified, uncompressed local file of the weights.
+    - compress(weights_dto): Write the compressed copy of the weights.
+    - remove_uncompressed(weights_dto): Remove the original file of compressed weights.
+    - delete(weights_dto): Remove the weights file and its cached copy.
+    - list_files(): List the stored weights files.
+    - list_cache_files(): List the cached uncompressed copies of compressed weights.
+    """
+
+    FILE_PREFIX = "custom_model_weights"
+    COMPRESSED_SUFFIX = ".gz"
+
+    _verified = {}
+    _verified_lock = threading.Lock()
+
+    def __init__(self, directory: str = None, cache_directory: str = None):
+        self.directory = directory or settings.WEIGHTS_DIR
+        self.cache_directory = cache_directory or settings.WEIGHTS_CACHE_DIR
+
+    def get_new_path(self) -> str:
+        """
+        Generate the path of a new weights file.
+
+        Returns:
+            str - A path in the weights directory with a random sequence of 10 characters.
+        """
+
+        random_chars = "".join(random.choice(string.ascii_letters + string.digits) for _ in range(10))
+        return os.path.join(self.directory, self.FILE_PREFIX + random_chars + ".h5")
+
+    def save(self, model) -> WeightsDTO:
+        """
+        Save the weights of a Keras model to a new file.
+
+        Args:
+            model: The trained Keras model.
+
+        Returns:
+            WeightsDTO - The path, the size and the hash of the saved file.
+        """
+
+        path = self.get_new_path()
+        model.save_weights(path)
+
+        return self.describe(path)
+
+    def describe(self, path: str) -> WeightsDTO:
+        """
+        Compute the size and the hash of an uncompressed weights file.
+
+        Args:
+            path (str): The path of the weights file.
+
+        Returns:
+            WeightsDTO - The path, the size and the SHA-256 of the file.
+        """
+
+        return WeightsDTO(path=path, size=os.path.getsize(path), sha256=self._hash_file(path))
+
+    def open(self, weights_dto: WeightsDTO) -> str:
+        """
+        Get an uncompressed local file of the weights, verified against their size and hash.
+
+        Args:
+            weights_dto (WeightsDTO): The tracked weights.
+
+        Returns:
+            str - The path of a file the weights can be loaded from.
+
+        Raises:
+            WeightsIntegrityError: If the file is missing or its content does not match the tracked hash.
+        """
+
+        path = weights_dto.path
+        # The original file is removed once the weights are recorded as compressed, a caller which read the
+        # record before that finds the compressed file only.
+        compressed = weights_dto.compressed or (
+            not os.path.exists(path) and os.path.exists(path + self.COMPRESSED_SUFFIX)
+        )
+        if compressed:
+            path = self._get_cache_path(weights_dto)
+            if os.path.exists(path):
+                try:
+                    self._verify(path, weights_dto)
+                    return path
+                except WeightsIntegrityError:
+                    os.remove(path)
+
+            self._decompress(weights_dto.path + self.COMPRESSED_SUFFIX, path)
+
+        self._verify(path, weights_dto)
+
+        return path
+
+    def compress(self, weights_dto: WeightsDTO) -> WeightsDTO:
+        """
+        Write the compressed copy of the weights, the first step of moving them to the compressed tier.
+
+        The original file is verified and compressed next to itself. It is kept until the weights are recorded
+        as compressed, then removed by remove_uncompressed(), so predictions never miss both files.
+
+        Args:
+            weights_dto (WeightsDTO): The tracked uncompressed weights.
+
+        Returns:
+            WeightsDTO - The tracked weights, marked as compressed.
+
+        Raises:
+            WeightsIntegrityError: If the file is missing or its content does not match the tracked hash.
+        """
+
+        self._verify(weights_dto.path, weights_dto)
+
+        compressed_path = weights_dto.path + self.COMPRESSED_SUFFIX
+        with open(weights_dto.path, "rb") as source, gzip.open(compressed_path + ".tmp", "wb") as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        os.replace(compressed_path + ".tmp", compressed_path)
+
+        return weights_dto.model_copy(update={"compressed": True})
+
+    def remove_uncompressed(self, weights_dto: WeightsDTO) -> None:
+        """
+        Remove the original file of weights recorded as compressed.
+
+        Args:
+            weights_dto (WeightsDTO): The tracked weights.
+        """
+
+        if os.path.exists(weights_dto.path + self.COMPRESSED_SUFFIX) and os.path.exists(weights_dto.path):
+            os.remove(weights_dto.path)
+
+    def delete(self, weights_dto: WeightsDTO) -> None:
+        """
+        Remove the weights file, in either tier, and its cached uncompressed copy.
+
+        Args:
+            weights_dto (WeightsDTO): The tracked weights.
+        """
+
+        paths = [weights_dto.path, weights_dto.path + self.COMPRESSED_SUFFIX]
+        if weights_dto.sha256:
+            paths.append(self._get_cache_path(weights_dto))
+
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def list_files(self) -> list[str]:
+        """
+        List the stored weights files, in both tiers.
+
+        Returns:
+            list[str] - Paths of the weights files, compressed ones with the ".gz" suffix.
+        """
+
+        if not os.path.isdir(self.directory):
+            return []
+
+        return [
+            os.path.join(self.directory, file_name)
+            for file_name in sorted(os.listdir(self.directory))
+            if file_name.startswith(self.FILE_PREFIX) and not file_name.endswith(".tmp")
+        ]
+
+    def list_cache_files(self) -> list[str]:
+        """
+        List the cached uncompressed copies of compressed weights.
+
+        Returns:
+            list[str] - Paths of the cached files, named by the hash of the weights.
+        """
+
+        if not os.path.isdir(self.cache_directory):
+            return []
+
+        return [os.path.join(self.cache_directory, file_name) for file_name in sorted(os.listdir(self.cache_directory))]
+
+    def _verify(self, path: str, weights_dto: WeightsDTO) -> None:
+        """
+        Verify the file against the tracked size and hash, once per version of the file and process.
+
+        Weights registered before they were tracked have no hash and are not verified.
+
+        Raises:
+            WeightsIntegrityError: If the file is missing or does not match.
+        """
+
+        if not weights_dto.sha256:
+            return
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise WeightsIntegrityError(f"Weights file {path} is missing")
+
+        version = (stat.st_size, stat.st_mtime_ns, weights_dto.sha256)
+        with self._verified_lock:
+            if self._verified.get(path) == version:
+                return
+
+        if stat.st_size != weights_dto.size or self._hash_file(path) != weights_dto.sha256:
+            raise WeightsIntegrityError(f"Weights file {path} does not match its hash")
+
+        with self._verified_lock:
+            self._verified[path] = version
+
+    def _decompress(self, compressed_path: str, path: str) -> None:
+        if not os.path.exists(compressed_path):
+            raise WeightsIntegrityError(f"Weights file {compressed_path} is missing")
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(compressed_path, "rb") as source, open(temporary_path, "wb") as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+        except (OSError, EOFError) as error:
+            os.remove(temporary_path)
+            raise WeightsIntegrityError(f"Weights file {compressed_path} cannot be decompressed: {error}")
+        os.replace(temporary_path, path)
+
+    def _get_cache_path(self, weights_dto: WeightsDTO) -> str:
+        return os.path.join(self.cache_directory, weights_dto.sha256 + ".h5")
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as weights_file:
+            for chunk in iter(lambda: weights_file.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    name = "core"
+
+    def ready(self):
+        from .db import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid="core.db.configure_connection")
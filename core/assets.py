@@ -0,0 +1,50 @@
+import functools
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+BOOTSTRAP = "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha3/dist"
+BOOTSTRAP_ICONS = "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.4/font"
+FONT_AWESOME = "https://maxcdn.bootstrapcdn.com/font-awesome/4.7.0"
+CHART_JS = "https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist"
+
+# Third-party assets copied into the static files by build_static, by their path in the static files.
+# The fonts keep their path relative to the stylesheets referencing them.
+VENDOR_ASSETS = {
+    "vendor/bootstrap/bootstrap.min.css": f"{BOOTSTRAP}/css/bootstrap.min.css",
+    "vendor/bootstrap/bootstrap.bundle.min.js": f"{BOOTSTRAP}/js/bootstrap.bundle.min.js",
+    "vendor/bootstrap-icons/bootstrap-icons.css": f"{BOOTSTRAP_ICONS}/bootstrap-icons.css",
+    "vendor/bootstrap-icons/fonts/bootstrap-icons.woff": f"{BOOTSTRAP_ICONS}/fonts/bootstrap-icons.woff",
+    "vendor/bootstrap-icons/fonts/bootstrap-icons.woff2": f"{BOOTSTRAP_ICONS}/fonts/bootstrap-icons.woff2",
+    "vendor/font-awesome/css/font-awesome.min.css": f"{FONT_AWESOME}/css/font-awesome.min.css",
+    "vendor/font-awesome/fonts/FontAwesome.otf": f"{FONT_AWESOME}/fonts/FontAwesome.otf",
+    "vendor/font-awesome/fonts/fontawesome-webfont.eot": f"{FONT_AWESOME}/fonts/fontawesome-webfont.eot",
+    "vendor/font-awesome/fonts/fontawesome-webfont.svg": f"{FONT_AWESOME}/fonts/fontawesome-webfont.svg",
+    "vendor/font-awesome/fonts/fontawesome-webfont.ttf": f"{FONT_AWESOME}/fonts/fontawesome-webfont.ttf",
+    "vendor/font-awesome/fonts/fontawesome-webfont.woff": f"{FONT_AWESOME}/fonts/fontawesome-webfont.woff",
+    "vendor/font-awesome/fonts/fontawesome-webfont.woff2": f"{FONT_AWESOME}/fonts/fontawesome-webfont.woff2",
+    "vendor/chart.js/chart.umd.js": f"{CHART_JS}/chart.umd.js",
+}
+
+
+def get_vendor_url(path: str) -> str:
+    """
+    Get the URL of a vendored asset, or of the CDN it is copied from when build_static did not vendor it yet.
+
+    Args:
+        path (str): The path of the asset in the static files, a key of VENDOR_ASSETS.
+
+    Returns:
+        str - The static URL, fingerprinted outside of development, or the CDN URL.
+    """
+
+    if settings.DEBUG:
+        return _get_vendor_url.__wrapped__(path)
+    return _get_vendor_url(path)
+
+
+@functools.lru_cache
+def _get_vendor_url(path: str) -> str:
+    vendored = finders.find(path) if settings.DEBUG else staticfiles_storage.exists(path)
+    return staticfiles_storage.url(path) if vendored else VENDOR_ASSETS[path]
@@ -0,0 +1,180 @@
+import fnmatch
+import os
+import threading
+import time
+
+import numpy as np
+
+_cases = {}
+
+
+class _BenchmarkCase:
+    """A registered benchmark: the factory preparing it and the number of items processed per call."""
+
+    def __init__(self, name: str, factory, items: int, repeats: int = None, memory: bool = False):
+        self.name = name
+        self.factory = factory
+        self.items = items
+        self.repeats = repeats
+        self.memory = memory
+
+
+def benchmark(name: str, items: int = 1, repeats: int = None, memory: bool = False):
+    """
+    Register a benchmark case.
+
+    The decorated function prepares the case and returns the callable to measure, or a tuple of the callable
+    and a cleanup function. Cases are registered by the "benchmarks" modules of the installed apps.
+
+    Args:
+        name (str): The unique name of the case, results are compared with the baseline by name.
+        items (int): Items processed by one call, for the throughput.
+        repeats (int): Measured calls, overrides the default of the run.
+        memory (bool): Whether to measure the peak memory of a call as well.
+    """
+
+    def decorator(factory):
+        register(name, factory, items=items, repeats=repeats, memory=memory)
+        return factory
+
+    return decorator
+
+
+def register(name: str, factory, items: int = 1, repeats: int = None, memory: bool = False) -> None:
+    """
+    Register a benchmark case, see benchmark().
+    """
+
+    if name in _cases:
+        raise ValueError(f"Benchmark {name} is already registered")
+    _cases[name] = _BenchmarkCase(name, factory, items, repeats, memory)
+
+
+def run(pattern: str = "*", repeats: int = 20, warmup: int = 3, report=None) -> dict:
+    """
+    Run the registered benchmark cases matching the pattern.
+
+    Cases that cannot be prepared because a file they need is missing, like the weights of a built-in model,
+    are reported as skipped.
+
+    Args:
+        pattern (str): A shell-style pattern of the case names.
+        repeats (int): Measured calls per case.
+        warmup (int): Calls per case before measuring.
+        report: Called with the name and the result of every case as soon as it finishes.
+
+    Returns:
+        dict - Case names mapped to the latency statistics in seconds and the throughput, or the skip reason.
+    """
+
+    results = {}
+    for name in sorted(_cases):
+        if not fnmatch.fnmatchcase(name, pattern):
+            continue
+
+        case = _cases[name]
+        try:
+            prepared = case.factory()
+        except OSError as error:
+            results[name] = {"skipped": str(error)}
+        else:
+            function, cleanup = prepared if isinstance(prepared, tuple) else (prepared, None)
+            try:
+                results[name] = _measure(function, case.repeats or repeats, warmup, case.items)
+                if case.memory:
+                    results[name]["peak_memory"] = _measure_memory(function)
+            finally:
+                if cleanup:
+                    cleanup()
+
+        if report:
+            report(name, results[name])
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """
+    Find the cases whose median latency regressed against a baseline.
+
+    Args:
+        results (dict): The results of the current run.
+        baseline (dict): The results of the baseline run.
+        tolerance (float): The allowed relative increase of the median, 0.1 allows 10%.
+
+    Returns:
+        list[dict] - The name, the baseline and the current median and their ratio of every regressed case.
+    """
+
+    regressions = []
+    for name, result in sorted(results.items()):
+        baseline_result = baseline.get(name, {})
+        if "p50" not in result or "p50" not in baseline_result:
+            continue
+
+        ratio = result["p50"] / baseline_result["p50"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {"name": name, "baseline_p50": baseline_result["p50"], "p50": result["p50"], "ratio": ratio}
+            )
+
+    return regressions
+
+
+def _measure(function, repeats: int, warmup: int, items: int) -> dict:
+    for _ in range(warmup):
+        function()
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+
+    mean = float(np.mean(timings))
+    return {
+        "repeats": repeats,
+        "mean": mean,
+        "min": float(np.min(timings)),
+        "p50": float(np.percentile(timings, 50)),
+        "p95": float(np.percentile(timings, 95)),
+        "items_per_second": items / mean if mean else None,
+    }
+
+
+def _measure_memory(function) -> int | None:
+    """
+    Measure the growth of the resident set size of the process during one call, sampled every millisecond.
+
+    Image decoders allocate their bitmaps outside of the Python allocator, so tracemalloc does not see them.
+
+    Returns:
+        int | None - The peak growth in bytes, None where /proc is not available.
+    """
+
+    if not os.path.exists("/proc/self/statm"):
+        return None
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def resident() -> int:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * page_size
+
+    baseline = peak = resident()
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(0.001):
+            peak = max(peak, resident())
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        function()
+    finally:
+        done.set()
+        sampler.join()
+
+    return max(peak, resident()) - baseline
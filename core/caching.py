@@ -0,0 +1,23 @@
+import functools
+
+from django.conf import settings
+from django.views.decorators.cache import cache_page
+
+
+def cache_page_for_anonymous(view):
+    """
+    Cache the pages of a view for anonymous users for INFO_PAGES_CACHE_TIMEOUT seconds.
+
+    The navbar shows the profile of a logged-in user, so their pages are always rendered. Responses
+    vary on the cookies, so anonymous visitors without a session share one cached page.
+    """
+
+    cached_view = cache_page(settings.INFO_PAGES_CACHE_TIMEOUT)(view)
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        return cached_view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,92 @@
+import functools
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+# Every page extends the base layout, so its templates are part of the version of every page.
+LAYOUT_TEMPLATES = ("_base.html", "navbar.html", "footer.html")
+
+
+def get_templates_modified(template_names: tuple) -> datetime:
+    """
+    Get the last modification time of the templates rendering a page.
+
+    Templates only change with a deployment outside of development, so the time is computed once per process.
+
+    Args:
+        template_names (tuple): The names of the templates.
+
+    Returns:
+        datetime - The modification time of the most recently modified template.
+    """
+
+    if settings.DEBUG:
+        return _get_templates_modified.__wrapped__(template_names)
+    return _get_templates_modified(template_names)
+
+
+@functools.lru_cache
+def _get_templates_modified(template_names: tuple) -> datetime:
+    modified = max(os.path.getmtime(get_template(name).origin.name) for name in template_names)
+    return datetime.fromtimestamp(int(modified), tz=timezone.utc)
+
+
+def make_etag(request, *parts) -> str:
+    """
+    Make a weak entity tag of a page from the versions of its content and the state of the user it was rendered for.
+
+    The navbar shows the profile of the user and forms embed the CSRF token, so the tag changes when the user
+    logs in or out, updates the profile or gets a new CSRF token.
+
+    Args:
+        request (HttpRequest): The request object.
+        parts: The versions of the content of the page.
+
+    Returns:
+        str - The weak entity tag.
+    """
+
+    user = request.user
+    user_parts = (user.pk, user.first_name, user.last_name, user.avatar) if user.is_authenticated else (None,)
+    csrf_token = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    digest = hashlib.sha256(repr((*parts, *user_parts, csrf_token)).encode()).hexdigest()[:32]
+
+    return f'W/"{digest}"'
+
+
+def template_page(template_name: str):
+    """
+    Answer conditional GET requests of a page rendered from a template without context by 304 Not Modified.
+
+    Pages of logged-in users are revalidated on every request, so the browser never shows a stale navbar.
+
+    Args:
+        template_name (str): The template of the page.
+    """
+
+    template_names = (template_name, *LAYOUT_TEMPLATES)
+
+    def last_modified(request, *args, **kwargs):
+        return get_templates_modified(template_names)
+
+    def etag(request, *args, **kwargs):
+        return make_etag(request, get_templates_modified(template_names).timestamp())
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
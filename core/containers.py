@@ -1,7 +1,16 @@
 from dependency_injector import containers, providers
 
-from classification.repositories import ClassificationModelRepository, ImageRepository
-from classification.services import ClassificationService
+from classification.checkpoints import TrainingCheckpointStore
+from classification.model_cache import ModelCache
+from classification.repositories import (
+    ClassificationModelRepository,
+    ImageRepository,
+    SweepRepository,
+    WeightsRepository,
+)
+from classification.scheduling import FairShareScheduler, TrainingAdmissionController
+from classification.services import ClassificationService, SweepService
+from classification.weights import WeightsStore
 from users.repositories import UserRepository
 from users.services import UserService
 
@@ -15,6 +24,10 @@ class RepositoryContainer(containers.DeclarativeContainer):
     image_repository = providers.Factory(ImageRepository)
     user_repository = providers.Factory(UserRepository)
     classification_model_repository = providers.Factory(ClassificationModelRepository)
+    checkpoint_store = providers.Factory(TrainingCheckpointStore)
+    sweep_repository = providers.Factory(SweepRepository)
+    weights_store = providers.Factory(WeightsStore)
+    weights_repository = providers.Factory(WeightsRepository)
 
 
 class ServiceContainer(containers.DeclarativeContainer):
@@ -23,9 +36,24 @@ class ServiceContainer(containers.DeclarativeContainer):
     Services are responsible for interaction with the data storage layer and business logic of the application.
     """
 
+    admission_controller = providers.Singleton(TrainingAdmissionController)
+    training_scheduler = providers.Singleton(FairShareScheduler, admission_controller=admission_controller)
+    model_cache = providers.Singleton(ModelCache)
     classification_service = providers.Factory(
         ClassificationService,
         image_repository=RepositoryContainer.image_repository,
         classification_model_repository=RepositoryContainer.classification_model_repository,
+        checkpoint_store=RepositoryContainer.checkpoint_store,
+        training_scheduler=training_scheduler,
+        weights_store=RepositoryContainer.weights_store,
+        weights_repository=RepositoryContainer.weights_repository,
+        model_cache=model_cache,
+    )
+    sweep_service = providers.Factory(
+        SweepService,
+        classification_model_repository=RepositoryContainer.classification_model_repository,
+        sweep_repository=RepositoryContainer.sweep_repository,
+        training_scheduler=training_scheduler,
+        weights_store=RepositoryContainer.weights_store,
     )
     user_service = providers.Factory(UserService, user_repository=RepositoryContainer.user_repository)
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.db import connection
+
+
+def configure_connection(sender, connection, **kwargs) -> None:
+    """
+    Apply SQLITE_PRAGMAS to every new SQLite connection, connected to the connection_created signal.
+
+    WAL lets readers run alongside the single writer instead of waiting for it, and synchronous=NORMAL
+    syncs the log on checkpoints only, which is safe in WAL mode. The pragmas are per connection, except
+    journal_mode which is stored in the database file.
+    """
+
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def create_test_db() -> str:
+    """
+    Create the test database for commands using it from several threads.
+
+    SQLite test databases are created in a temporary file rather than in memory, so the threads share
+    the database through the journal as in production.
+
+    Returns:
+        str - The name of the original database, to pass to destroy_test_db.
+    """
+
+    if connection.vendor == "sqlite":
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        test_settings["NAME"] = os.path.join(tempfile.gettempdir(), f"test_{uuid.uuid4().hex}.sqlite3")
+
+    return connection.creation.create_test_db(verbosity=0, autoclobber=True)
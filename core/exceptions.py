@@ -1,3 +1,14 @@
 class InstanceNotExistError(Exception):
     def __init__(self, message="Instance does not exists", *args):
         super().__init__(message, *args)
+
+
+class TrainingRejectedError(Exception):
+    def __init__(self, message="Training rejected", *args, retryable=False):
+        super().__init__(message, *args)
+        self.retryable = retryable
+
+
+class WeightsIntegrityError(Exception):
+    def __init__(self, message="Weights file is damaged", *args):
+        super().__init__(message, *args)
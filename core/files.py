@@ -0,0 +1,41 @@
+import hashlib
+import io
+import os
+import re
+
+from django.conf import settings
+from PIL import Image
+
+# Names with a hash of the content before the extension, as written by save_image and ManifestStaticFilesStorage.
+CONTENT_ADDRESSED_NAME = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+
+def save_image(image: Image, directory: str, name: str, **options) -> str:
+    """
+    Save an image to the media directory under a name ending with a hash of its content.
+
+    Files are never overwritten with another content, so their URLs can be cached by browsers forever,
+    and uploads of the same name by different users do not replace each other.
+
+    Args:
+        image (Image): The image to save, in the format given by the extension of the name.
+        directory (str): The directory of the image in the media directory.
+        name (str): The uploaded name of the image.
+        options: Options of the encoder, like the quality.
+
+    Returns:
+        str - The path of the saved image relative to the media directory.
+    """
+
+    stem, extension = os.path.splitext(os.path.basename(name))
+    encoded = io.BytesIO()
+    image.save(encoded, Image.registered_extensions().get(extension.lower()), **options)
+    content = encoded.getvalue()
+
+    path = f"{directory}/{stem}.{hashlib.sha256(content).hexdigest()[:12]}{extension}"
+    full_path = os.path.join(settings.MEDIA_ROOT, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "wb") as image_file:
+        image_file.write(content)
+
+    return path
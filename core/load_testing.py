@@ -0,0 +1,193 @@
+import asyncio
+import glob
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, Client
+
+DEFAULT_WEIGHTS = {
+    "login": 1,
+    "cats_or_dogs": 3,
+    "cats_or_dogs_pre_trained": 1,
+    "user_model": 3,
+    "user_models": 4,
+    "update_profile": 1,
+}
+FILE_PREFIX = "load_test_"
+
+
+class LoadTestUser:
+    """A synthetic user of the load test with the credentials and the model used by the scenarios."""
+
+    def __init__(self, user, password: str, model_id: int):
+        self.user = user
+        self.password = password
+        self.model_id = model_id
+
+
+def get_request(scenario: str, load_test_user: LoadTestUser, image_bytes: bytes) -> tuple[str, str, dict]:
+    """
+    Build the request of a scenario.
+
+    Args:
+        scenario (str): The name of the scenario.
+        load_test_user (LoadTestUser): The user sending the request.
+        image_bytes (bytes): The synthetic image uploaded by the scenario.
+
+    Returns:
+        tuple[str, str, dict] - The method, the path and the form data of the request.
+    """
+
+    if scenario == "login":
+        return "post", "/users/login/", {"email": load_test_user.user.email, "password": load_test_user.password}
+    if scenario == "user_models":
+        return "get", "/classifications/user_models", {}
+    if scenario == "update_profile":
+        return (
+            "post",
+            "/users/profile/update",
+            {"first_name": "Load", "last_name": "Test", "avatar": _upload(image_bytes)},
+        )
+
+    paths = {
+        "cats_or_dogs": "/classifications/cats_or_dogs",
+        "cats_or_dogs_pre_trained": "/classifications/cats_or_dogs_pre_trained",
+        "user_model": f"/classifications/user_model/{load_test_user.model_id}",
+    }
+    return "post", paths[scenario], {"title": "Load test", "image": _upload(image_bytes)}
+
+
+def run_threads(users: list, weights: dict, concurrency: int, duration: float, image_bytes: bytes, seed: int) -> list:
+    """
+    Replay the scenarios from threads, each with its own test client logged in as a synthetic user.
+
+    Returns:
+        list[tuple[str, float, int]] - The scenario, the latency in seconds and the status of every request,
+        status 0 for a request that raised an exception.
+    """
+
+    deadline = time.perf_counter() + duration
+    samples = []
+    samples_lock = threading.Lock()
+
+    def worker(index: int):
+        load_test_user = users[index % len(users)]
+        client = Client()
+        client.force_login(load_test_user.user)
+        rng = random.Random(seed + index)
+        worker_samples = []
+        try:
+            while time.perf_counter() < deadline:
+                scenario = rng.choices(list(weights), weights=list(weights.values()))[0]
+                method, path, data = get_request(scenario, load_test_user, image_bytes)
+                started = time.perf_counter()
+                try:
+                    status = getattr(client, method)(path, data).status_code
+                except Exception:
+                    status = 0
+                worker_samples.append((scenario, time.perf_counter() - started, status))
+        finally:
+            connection.close()
+
+        with samples_lock:
+            samples.extend(worker_samples)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+
+    return samples
+
+
+def run_asyncio(users: list, weights: dict, concurrency: int, duration: float, image_bytes: bytes, seed: int) -> list:
+    """
+    Replay the scenarios from coroutines of one event loop, each with its own async test client.
+
+    Synchronous views are run by the ASGI handler, so this measures the app as served by an ASGI server.
+
+    Returns:
+        list[tuple[str, float, int]] - The scenario, the latency in seconds and the status of every request,
+        status 0 for a request that raised an exception.
+    """
+
+    async def worker(index: int, deadline: float, samples: list):
+        load_test_user = users[index % len(users)]
+        client = AsyncClient()
+        await asyncio.to_thread(client.force_login, load_test_user.user)
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(list(weights), weights=list(weights.values()))[0]
+            method, path, data = get_request(scenario, load_test_user, image_bytes)
+            started = time.perf_counter()
+            try:
+                status = (await getattr(client, method)(path, data)).status_code
+            except Exception:
+                status = 0
+            samples.append((scenario, time.perf_counter() - started, status))
+
+    async def main():
+        samples = []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(index, deadline, samples) for index in range(concurrency)))
+        return samples
+
+    return asyncio.run(main())
+
+
+def summarize(samples: list, duration: float) -> dict:
+    """
+    Compute the throughput, the error rate and the latency percentiles, in total and per scenario.
+
+    Args:
+        samples (list): The scenario, the latency and the status of every request.
+        duration (float): The wall time of the load test in seconds.
+
+    Returns:
+        dict - The statistics of all requests and of every scenario, latencies in milliseconds.
+    """
+
+    def statistics(latencies: list, statuses: list) -> dict:
+        latencies_ms = np.array(latencies) * 1000
+        return {
+            "requests": len(latencies),
+            "errors": sum(1 for status in statuses if status == 0 or status >= 400),
+            "throughput": len(latencies) / duration,
+            "p50": float(np.percentile(latencies_ms, 50)),
+            "p95": float(np.percentile(latencies_ms, 95)),
+            "p99": float(np.percentile(latencies_ms, 99)),
+            "max": float(np.max(latencies_ms)),
+        }
+
+    if not samples:
+        return {"total": {"requests": 0}, "scenarios": {}}
+
+    scenarios = {}
+    for scenario in sorted({sample[0] for sample in samples}):
+        scenario_samples = [sample for sample in samples if sample[0] == scenario]
+        scenarios[scenario] = statistics([sample[1] for sample in scenario_samples], [s[2] for s in scenario_samples])
+
+    return {
+        "total": statistics([sample[1] for sample in samples], [sample[2] for sample in samples]),
+        "scenarios": scenarios,
+    }
+
+
+def remove_uploads() -> None:
+    """
+    Remove the images and avatars uploaded by the load test.
+    """
+
+    for directory in ("images", "avatars"):
+        for path in glob.glob(os.path.join(settings.MEDIA_ROOT, directory, FILE_PREFIX + "*")):
+            os.remove(path)
+
+
+def _upload(image_bytes: bytes) -> SimpleUploadedFile:
+    return SimpleUploadedFile(f"{FILE_PREFIX}{uuid.uuid4().hex}.jpg", image_bytes, content_type="image/jpeg")
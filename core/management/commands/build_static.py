@@ -0,0 +1,89 @@
+import gzip
+import os
+import re
+import urllib.request
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from core.assets import VENDOR_ASSETS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".eot", ".ttf", ".otf", ".html", ".xml")
+# Source maps are not vendored, ManifestStaticFilesStorage would fail on the references to them.
+SOURCE_MAP_COMMENT = re.compile(rb"\n?/[*/]# sourceMappingURL=[^\n]*")
+
+
+class Command(BaseCommand):
+    help = (
+        "Vendor the third-party CSS, fonts and scripts into the static files, collect the static files into "
+        "STATIC_ROOT under fingerprinted names and write their gzip and brotli variants."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--refresh", action="store_true", help="Download the vendored assets again.")
+
+    def handle(self, *args, **options):
+        vendor_dir = settings.STATICFILES_DIRS[0]
+        for path, url in VENDOR_ASSETS.items():
+            self._vendor(os.path.join(vendor_dir, path), url, options["refresh"])
+
+        if settings.DEBUG:
+            self.stdout.write("Vendored the assets, run with DEBUG=false to collect and compress the static files")
+            return
+
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+        if brotli is None:
+            self.stderr.write("brotli is not installed, only gzip variants are written")
+        compressed = 0
+        for directory, _, file_names in os.walk(settings.STATIC_ROOT):
+            for file_name in file_names:
+                if file_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                    compressed += self._compress(os.path.join(directory, file_name))
+
+        self.stdout.write(f"Collected the static files into {settings.STATIC_ROOT}, {compressed} variants written")
+
+    def _vendor(self, destination: str, url: str, refresh: bool) -> None:
+        if os.path.exists(destination) and not refresh:
+            return
+
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                content = response.read()
+        except OSError as error:
+            # The pages keep linking the asset from its CDN until it is vendored.
+            self.stderr.write(f"Could not download {url}: {error}")
+            return
+
+        if destination.endswith((".css", ".js")):
+            content = SOURCE_MAP_COMMENT.sub(b"", content)
+
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        with open(destination, "wb") as asset_file:
+            asset_file.write(content)
+        self.stdout.write(f"Vendored {url}")
+
+    @staticmethod
+    def _compress(path: str) -> int:
+        with open(path, "rb") as static_file:
+            content = static_file.read()
+
+        variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(content, quality=11)))
+
+        written = 0
+        for extension, compressed in variants:
+            # Variants saving nothing are not written, the file is then served as it is.
+            if len(compressed) < len(content):
+                with open(path + extension, "wb") as compressed_file:
+                    compressed_file.write(compressed)
+                written += 1
+
+        return written
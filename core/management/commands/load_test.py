@@ -0,0 +1,125 @@
+import json
+import os
+import time
+import uuid
+
+import keras
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from classification.benchmarks import BENCHMARK_HYPER_PARAMS, make_image
+from classification.runtime import INFERENCE, configure_runtime
+from classification.services import ClassificationService
+from core import db, load_testing
+from core.containers import RepositoryContainer
+from users.models import UserModel
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted mix of logins, predictions, model listings and profile updates from concurrent clients "
+        "against a fresh test database and report the throughput and the latency percentiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=("threads", "asyncio"), default="threads", help="Concurrency model.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients.")
+        parser.add_argument("--duration", type=float, default=30, help="Duration of the load test in seconds.")
+        parser.add_argument("--users", type=int, default=4, help="Synthetic users shared by the clients.")
+        parser.add_argument(
+            "--scenarios",
+            help="Comma-separated scenario weights, e.g. user_models=4,user_model=3. Defaults to "
+            + ",".join(f"{name}={weight}" for name, weight in load_testing.DEFAULT_WEIGHTS.items())
+            + ".",
+        )
+        parser.add_argument("--image-size", default="640x480", help="Size of the uploaded images.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the scenario choices.")
+        parser.add_argument("--output", help="File the results are written to as JSON.")
+
+    def handle(self, *args, **options):
+        weights = self._get_weights(options["scenarios"])
+        image_size = tuple(int(side) for side in options["image_size"].split("x"))
+        image_bytes = make_image(image_size, "JPEG")
+
+        configure_runtime(INFERENCE)
+        setup_test_environment()
+        old_database_name = db.create_test_db()
+        try:
+            users = self._create_users(options["users"])
+            run = load_testing.run_threads if options["mode"] == "threads" else load_testing.run_asyncio
+            started = time.perf_counter()
+            samples = run(users, weights, options["concurrency"], options["duration"], image_bytes, options["seed"])
+            duration = time.perf_counter() - started
+            for load_test_user in users:
+                load_test_user.user.delete()
+        finally:
+            load_testing.remove_uploads()
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+            teardown_test_environment()
+
+        summary = load_testing.summarize(samples, duration)
+        report = {"mode": options["mode"], "concurrency": options["concurrency"], "duration": duration, **summary}
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+
+        self._print_summary(summary)
+
+    def _get_weights(self, scenarios: str) -> dict:
+        weights = dict(load_testing.DEFAULT_WEIGHTS)
+        if scenarios:
+            weights = {}
+            for item in scenarios.split(","):
+                name, _, weight = item.partition("=")
+                if name not in load_testing.DEFAULT_WEIGHTS:
+                    raise CommandError(f"Unknown scenario {name}")
+                weights[name] = float(weight or 1)
+
+        built_in_scenarios = {
+            "cats_or_dogs": "cats_or_dogs_model",
+            "cats_or_dogs_pre_trained": "cats_or_dogs_transfer_learned_model",
+        }
+        for scenario, model_name in built_in_scenarios.items():
+            if scenario in weights and not os.path.exists(ClassificationService.BUILT_IN_WEIGHTS[model_name]):
+                self.stderr.write(f"{scenario}: skipped, missing {ClassificationService.BUILT_IN_WEIGHTS[model_name]}")
+                del weights[scenario]
+
+        weights = {name: weight for name, weight in weights.items() if weight > 0}
+        if not weights:
+            raise CommandError("No scenarios to run")
+
+        return weights
+
+    @staticmethod
+    def _create_users(count: int) -> list:
+        repository = RepositoryContainer.classification_model_repository()
+        weights_store = RepositoryContainer.weights_store()
+        model = ClassificationService._get_custom_user_model(BENCHMARK_HYPER_PARAMS)
+        history = keras.callbacks.History()
+        history.history = {name: [0.5] for name in ClassificationService.HISTORY_METRICS}
+
+        users = []
+        for _ in range(count):
+            password = uuid.uuid4().hex
+            user = UserModel.objects.create_user(email=f"load-test-{uuid.uuid4().hex}@example.com", password=password)
+            weights_dto = weights_store.save(model)
+            model_dto = repository.create_model(user, BENCHMARK_HYPER_PARAMS, weights_dto, history)
+            users.append(load_testing.LoadTestUser(user, password, model_dto.id))
+
+        return users
+
+    def _print_summary(self, summary: dict) -> None:
+        rows = [("total", summary["total"]), *summary["scenarios"].items()]
+        self.stdout.write(
+            f"{'scenario':<26}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'max ms':>10}"
+        )
+        for name, statistics in rows:
+            if not statistics["requests"]:
+                continue
+            self.stdout.write(
+                f"{name:<26}{statistics['requests']:>10}{statistics['errors']:>8}{statistics['throughput']:>9.2f}"
+                f"{statistics['p50']:>10.1f}{statistics['p95']:>10.1f}{statistics['p99']:>10.1f}"
+                f"{statistics['max']:>10.1f}"
+            )
@@ -0,0 +1,79 @@
+import json
+import platform
+
+import tensorflow as tf
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils.module_loading import autodiscover_modules
+
+from classification.runtime import INFERENCE, configure_runtime
+from core import benchmarks, db
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the benchmarks of the installed apps against a fresh test database and report the results as JSON, "
+        "optionally failing on regressions against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pattern", default="*", help="Shell-style pattern of the benchmark names.")
+        parser.add_argument("--repeats", type=int, default=20, help="Measured calls per benchmark.")
+        parser.add_argument("--warmup", type=int, default=3, help="Calls per benchmark before measuring.")
+        parser.add_argument("--output", help="File the results are written to.")
+        parser.add_argument("--baseline", help="Results of a previous run to compare with.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.1, help="Allowed relative increase of the median latency."
+        )
+
+    def handle(self, *args, **options):
+        configure_runtime(INFERENCE)
+        autodiscover_modules("benchmarks")
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)["results"]
+
+        setup_test_environment()
+        old_database_name = db.create_test_db()
+        try:
+            results = benchmarks.run(options["pattern"], options["repeats"], options["warmup"], report=self._report)
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "tensorflow": tf.__version__,
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if baseline is not None:
+            regressions = benchmarks.compare(results, baseline, options["tolerance"])
+            for regression in regressions:
+                self.stderr.write(
+                    f"{regression['name']}: p50 {regression['p50'] * 1000:.2f} ms, "
+                    f"baseline {regression['baseline_p50'] * 1000:.2f} ms ({regression['ratio']:.2f}x)"
+                )
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmarks regressed more than {options['tolerance']:.0%}")
+
+    def _report(self, name: str, result: dict) -> None:
+        if "skipped" in result:
+            self.stderr.write(f"{name}: skipped, {result['skipped']}")
+        else:
+            line = f"{name}: p50 {result['p50'] * 1000:.2f} ms, p95 {result['p95'] * 1000:.2f} ms"
+            if result.get("peak_memory") is not None:
+                line += f", peak memory {result['peak_memory'] / 2**20:.1f} MiB"
+            self.stderr.write(line)
@@ -0,0 +1,221 @@
+import bisect
+import math
+import threading
+import weakref
+
+
+class _Metric:
+    """
+    Base of the metrics aggregated per thread.
+
+    Every thread updates its own shard without locks, the shards are only summed when the metrics are collected.
+    Shards of finished threads are folded into a retired shard on collection, so short-lived threads do not
+    accumulate shards.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def collect(self) -> dict:
+        """
+        Sum the shards of all threads.
+
+        Returns:
+            dict - Label values mapped to the aggregated value of the metric.
+        """
+
+        with self._lock:
+            alive_shards = []
+            for thread_ref, shard in self._shards:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    self._merge(self._retired, shard.copy())
+                else:
+                    alive_shards.append((thread_ref, shard))
+            self._shards = alive_shards
+
+            values = {}
+            self._merge(values, self._retired)
+            for _, shard in alive_shards:
+                self._merge(values, shard.copy())
+
+        return values
+
+    def _get_shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+
+        return shard
+
+    def _get_key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _merge(self, target: dict, shard: dict) -> None:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing value, like the number of requests.
+    """
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        shard = self._get_shard()
+        key = self._get_key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def _merge(self, target: dict, shard: dict) -> None:
+        for key, value in shard.items():
+            target[key] = target.get(key, 0.0) + value
+
+
+class Histogram(_Metric):
+    """
+    Counts of observations in cumulative buckets, with their sum, like request latencies.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        shard = self._get_shard()
+        key = self._get_key(labels)
+        state = shard.get(key)
+        if state is None:
+            # Counts per bucket with a last bucket for +Inf, followed by the sum of the observations.
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _merge(self, target: dict, shard: dict) -> None:
+        for key, state in shard.items():
+            merged = target.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for index, value in enumerate(list(state)):
+                merged[index] += value
+
+
+class MetricsRegistry:
+    """
+    The metrics of the process, rendered in the Prometheus text exposition format.
+
+    Methods:
+
+    - counter(name, documentation, labelnames): Create and register a counter.
+    - histogram(name, documentation, labelnames, buckets): Create and register a histogram.
+    - render(): Render all metrics in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        Returns:
+            str - The HELP and TYPE lines and the samples of every metric.
+        """
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for key, value in sorted(metric.collect().items()):
+                labels = dict(zip(metric.labelnames, key))
+                if isinstance(metric, Histogram):
+                    lines.extend(self._render_histogram(metric, labels, value))
+                else:
+                    lines.append(f"{metric.name}{self._format_labels(labels)} {self._format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def _render_histogram(self, metric: Histogram, labels: dict, state: list) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*metric.buckets, math.inf), state[:-1]):
+            cumulative += count
+            bucket_labels = {**labels, "le": self._format_value(bound)}
+            lines.append(f"{metric.name}_bucket{self._format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{metric.name}_sum{self._format_labels(labels)} {self._format_value(state[-1])}")
+        lines.append(f"{metric.name}_count{self._format_labels(labels)} {cumulative}")
+
+        return lines
+
+    @staticmethod
+    def _format_labels(labels: dict) -> str:
+        if not labels:
+            return ""
+
+        escaped = (
+            name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+            for name, value in labels.items()
+        )
+        return "{" + ",".join(escaped) + "}"
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        if value == math.inf:
+            return "+Inf"
+        return repr(float(value))
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+registry = MetricsRegistry()
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Duration of the requests per view.", ("view", "method"), LATENCY_BUCKETS
+)
+requests_total = registry.counter("http_requests_total", "Responses per view and status.", ("view", "method", "status"))
+request_db_queries = registry.histogram(
+    "http_request_db_queries", "Database queries per request.", ("view",), (0, 1, 2, 5, 10, 20, 50, 100, 200)
+)
+request_db_duration = registry.histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in database queries per request.",
+    ("view",),
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+upload_bytes = registry.histogram(
+    "http_upload_bytes",
+    "Size of the uploaded files per view.",
+    ("view",),
+    (10_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000),
+)
+model_cache_hits = registry.counter("model_cache_hits_total", "Predictions served by a cached model.")
+model_cache_misses = registry.counter("model_cache_misses_total", "Models built and loaded for predictions.")
+inference_batch_size = registry.histogram(
+    "inference_batch_size", "Images per forward pass.", (), (1, 2, 4, 6, 8, 16, 32, 64)
+)
+training_epoch_duration = registry.histogram(
+    "training_epoch_duration_seconds",
+    "Duration of the training epochs run in web and training processes.",
+    (),
+    (1, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
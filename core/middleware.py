@@ -0,0 +1,151 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import metrics
+from .files import CONTENT_ADDRESSED_NAME
+from .profiling import StackSampler, enforce_retention, write_folded
+from .queries import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Record the duration, the status, the number of database queries and the uploaded bytes of every request.
+
+    Requests are labelled by the name of the resolved view, requests not matching any URL as "unmatched".
+    Requests running more than QUERY_BUDGET queries are logged with their duplicated SQL fingerprints.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(query_recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        view = request.resolver_match.view_name if request.resolver_match else "unmatched"
+        metrics.request_duration.observe(duration, view=view, method=request.method)
+        metrics.requests_total.inc(view=view, method=request.method, status=response.status_code)
+        metrics.request_db_queries.observe(query_recorder.queries, view=view)
+        metrics.request_db_duration.observe(query_recorder.duration, view=view)
+        if query_recorder.queries > settings.QUERY_BUDGET:
+            logger.warning(
+                "Query budget of %s exceeded by %s %s: %s",
+                settings.QUERY_BUDGET,
+                request.method,
+                view,
+                query_recorder.describe(),
+            )
+        # Only files already parsed by the view are counted, the body is never read here.
+        if request.method == "POST" and "_files" in request.__dict__:
+            for uploaded_file in request.FILES.values():
+                metrics.upload_bytes.observe(uploaded_file.size, view=view)
+
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile a fraction of the requests and keep the profiles of slow requests.
+
+    Views matching PROFILING_STATISTICAL_VIEWS are profiled by stack sampling, which is cheap enough to run
+    on every request, so any request slower than PROFILING_SLOW_THRESHOLD keeps its profile. Other views
+    are profiled with cProfile on a PROFILING_SAMPLE_RATE fraction of the requests only. At most
+    PROFILING_MAX_CONCURRENT cProfile sessions run at once, the other requests are not profiled.
+
+    Profiles are written to PROFILING_DIR, named by the time, the view, the model and the duration of
+    the request: ".prof" files are read by pstats and snakeviz, ".folded" files by flamegraph.pl and speedscope.
+    Only the newest PROFILING_MAX_FILES profiles are kept.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.sampler = StackSampler(settings.PROFILING_SAMPLING_INTERVAL)
+        self.cprofile_slots = threading.BoundedSemaphore(settings.PROFILING_MAX_CONCURRENT)
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        profiler = request.__dict__.pop("_profiler", None)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            self.cprofile_slots.release()
+            self._save(request, duration, ".prof", profiler.dump_stats)
+        elif profiler == "sampler":
+            stacks = self.sampler.stop(threading.get_ident())
+            keep = duration >= settings.PROFILING_SLOW_THRESHOLD or request.__dict__.pop("_profile_sampled", False)
+            if stacks and keep:
+                self._save(request, duration, ".folded", lambda path: write_folded(path, stacks))
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        view_name = request.resolver_match.view_name
+        if view_name.startswith(tuple(settings.PROFILING_STATISTICAL_VIEWS)):
+            self.sampler.start(threading.get_ident())
+            request._profiler = "sampler"
+            request._profile_sampled = sampled
+        elif sampled and self.cprofile_slots.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            profiler.enable()
+            request._profiler = profiler
+
+        return None
+
+    @staticmethod
+    def _save(request, duration: float, extension: str, write) -> None:
+        resolver_match = request.resolver_match
+        tags = [time.strftime("%Y%m%d-%H%M%S"), resolver_match.view_name.replace(":", "-")]
+        model_id = resolver_match.kwargs.get("model_id")
+        if model_id is not None:
+            tags.append(f"model-{model_id}")
+        tags.append(f"{int(duration * 1000)}ms")
+
+        write(os.path.join(settings.PROFILING_DIR, "_".join(tags) + f"_{uuid.uuid4().hex[:8]}{extension}"))
+        enforce_retention(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+
+
+class ImmutableAssetsMiddleware:
+    """
+    Let browsers cache static and media files named by a hash of their content for a year without revalidating.
+
+    A changed file gets a new name, and with it a new URL, so a cached copy can never be stale.
+    """
+
+    MAX_AGE = 365 * 24 * 60 * 60
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefixes = tuple("/" + url.lstrip("/") for url in (settings.STATIC_URL, settings.MEDIA_URL))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            response.status_code == 200
+            and request.path.startswith(self.prefixes)
+            and CONTENT_ADDRESSED_NAME.search(request.path)
+        ):
+            response["Cache-Control"] = f"public, max-age={self.MAX_AGE}, immutable"
+
+        return response
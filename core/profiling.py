@@ -0,0 +1,97 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+
+class StackSampler:
+    """
+    Statistical profiler sampling the stacks of the registered threads from one background thread.
+
+    The profiled code is not instrumented, so the overhead does not depend on the number of function calls,
+    which keeps it low for views dominated by TensorFlow. The stacks are counted in the folded format
+    of flame graphs: the frames from the root joined by semicolons.
+
+    Methods:
+
+    - start(thread_id): Start sampling a thread.
+    - stop(thread_id): Stop sampling a thread and get its stacks.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id: int) -> None:
+        with self._lock:
+            self._threads[thread_id] = collections.Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id: int) -> collections.Counter:
+        with self._lock:
+            return self._threads.pop(thread_id, collections.Counter())
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._threads:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[self._fold(frame)] += 1
+
+    @staticmethod
+    def _fold(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+
+        return ";".join(reversed(names))
+
+
+def write_folded(path: str, stacks: collections.Counter) -> None:
+    """
+    Write sampled stacks in the folded format read by flamegraph.pl and speedscope.
+
+    Args:
+        path (str): The file to write.
+        stacks (collections.Counter): Folded stacks mapped to their number of samples.
+    """
+
+    with open(path, "w") as profile_file:
+        for stack, samples in stacks.most_common():
+            profile_file.write(f"{stack} {samples}\n")
+
+
+def enforce_retention(directory: str, max_files: int) -> None:
+    """
+    Remove the oldest profiles beyond the limit.
+
+    Args:
+        directory (str): The directory of the profiles.
+        max_files (int): The number of profiles kept.
+    """
+
+    profiles = []
+    for entry in os.scandir(directory):
+        try:
+            profiles.append((entry.stat().st_mtime, entry.path))
+        except FileNotFoundError:
+            continue
+
+    profiles.sort(reverse=True)
+    for _, path in profiles[max_files:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
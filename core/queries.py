@@ -0,0 +1,105 @@
+import collections
+import contextlib
+import re
+import time
+
+from django.db import connection
+
+_IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a SQL statement so the queries differing only in their parameters are grouped together.
+
+    Args:
+        sql (str): The executed SQL statement with placeholders or inlined literals.
+
+    Returns:
+        str - The statement with literals and parameter lists replaced by placeholders.
+    """
+
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class QueryRecorder:
+    """
+    Execute wrapper accounting the database queries run while it is installed.
+
+    Usage:
+
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            ...
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.fingerprints = collections.Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def get_duplicates(self) -> list[tuple[str, int]]:
+        """
+        Get the fingerprints executed more than once, which usually come from queries run in a loop.
+
+        Returns:
+            list[tuple[str, int]] - The fingerprints with their number of executions, the most executed first.
+        """
+
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+    def describe(self) -> str:
+        """
+        Describe the recorded queries for logs and assertion messages.
+
+        Returns:
+            str - The number of queries, their total duration and the duplicated fingerprints.
+        """
+
+        lines = [f"{self.queries} queries in {self.duration * 1000:.1f} ms"]
+        lines.extend(f"  {count}x {sql}" for sql, count in self.get_duplicates())
+
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def assert_max_queries(max_queries: int, using=connection):
+    """
+    Assert that the block runs at most the given number of queries, for tests of the query budget of views.
+
+    Unlike assertNumQueries, the failure lists the duplicated fingerprints, which point to the loop to fix.
+
+    Usage:
+
+        with assert_max_queries(5):
+            client.get("/classifications/user_models")
+
+    Args:
+        max_queries (int): The query budget of the block.
+        using: The database connection to account, the default one if not given.
+
+    Raises:
+        AssertionError: If the block ran more queries than the budget.
+    """
+
+    recorder = QueryRecorder()
+    with using.execute_wrapper(recorder):
+        yield recorder
+
+    if recorder.queries > max_queries:
+        raise AssertionError(f"Expected at most {max_queries} queries, got {recorder.describe()}")
@@ -17,6 +17,21 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def env_int(name, default=None):
+    """Read an optional integer setting from the environment."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_bool(name, default=False):
+    """Read a boolean setting from the environment, accepting "true"/"1"/"yes" in any case."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("true", "1", "yes")
+
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -28,7 +43,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ.get("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool("DEBUG", True)
 
 ALLOWED_HOSTS = []
 
@@ -43,12 +58,16 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     # apps
+    "core",
     "info_pages",
     "users",
     "classification",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ProfilingMiddleware",
+    "core.middleware.ImmutableAssetsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -60,12 +79,18 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "core.urls"
 
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": ["templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Compiled templates are kept in memory outside of development.
+            "loaders": TEMPLATE_LOADERS if DEBUG else [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -82,13 +107,59 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite by default, DATABASE_ENGINE=postgresql switches to the Postgres server given by the DATABASE_* variables.
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds and checked before being reused by a request.
+
+DATABASE_ENGINE = os.environ.get("DATABASE_ENGINE") or "sqlite3"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": f"django.db.backends.{DATABASE_ENGINE}",
+        "NAME": os.environ.get("DATABASE_NAME") or BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": env_int("DATABASE_CONN_MAX_AGE", 60),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+if DATABASE_ENGINE == "postgresql":
+    DATABASES["default"].update(
+        {
+            "NAME": os.environ.get("DATABASE_NAME") or "web_with_ml",
+            "USER": os.environ.get("DATABASE_USER") or "",
+            "PASSWORD": os.environ.get("DATABASE_PASSWORD") or "",
+            "HOST": os.environ.get("DATABASE_HOST") or "localhost",
+            "PORT": os.environ.get("DATABASE_PORT") or "5432",
+        }
+    )
+
+# Applied to every SQLite connection when it is opened, see core.db.configure_connection.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    "busy_timeout": env_int("SQLITE_BUSY_TIMEOUT", 5000),
+}
+
+
+# Cache
+# CACHE_BACKEND is "locmem", kept per process, or "file", shared by the processes of a host in CACHE_LOCATION.
+# Info pages are cached for anonymous users, model blocks per user until the model is saved or deleted.
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND") or "locmem"
+
+CACHES = {
+    "default": {
+        "BACKEND": {
+            "locmem": "django.core.cache.backends.locmem.LocMemCache",
+            "file": "django.core.cache.backends.filebased.FileBasedCache",
+        }[CACHE_BACKEND],
+        "LOCATION": os.environ.get("CACHE_LOCATION") or (BASE_DIR / "cache" if CACHE_BACKEND == "file" else ""),
+    }
+}
+
+INFO_PAGES_CACHE_TIMEOUT = env_int("INFO_PAGES_CACHE_TIMEOUT", 600)
+FRAGMENT_CACHE_TIMEOUT = env_int("FRAGMENT_CACHE_TIMEOUT", 24 * 60 * 60)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -130,6 +201,20 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]
 
+# build_static collects the static files into STATIC_ROOT under names fingerprinted by their content,
+# which the pages link to outside of development. SERVE_STATIC lets Django serve them without a web server.
+STATIC_ROOT = os.environ.get("STATIC_ROOT") or BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage."
+        + ("StaticFilesStorage" if DEBUG else "ManifestStaticFilesStorage")
+    },
+}
+
+SERVE_STATIC = env_bool("SERVE_STATIC")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -141,3 +226,149 @@ LOGIN_URL = "/users/login/"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+
+# Uploads
+# Images and avatars are streamed into files kept in memory up to FILE_UPLOAD_MAX_MEMORY_SIZE bytes. Their headers
+# are parsed while they are received: requests uploading more than IMAGE_UPLOAD_MAX_SIZE bytes of files and images
+# with more than IMAGE_UPLOAD_MAX_PIXELS pixels are rejected without storing the rest of the file.
+
+FILE_UPLOAD_MAX_MEMORY_SIZE = env_int("FILE_UPLOAD_MAX_MEMORY_SIZE", 2621440)
+IMAGE_UPLOAD_MAX_SIZE = env_int("IMAGE_UPLOAD_MAX_SIZE", 20 * 2**20)
+IMAGE_UPLOAD_MAX_PIXELS = env_int("IMAGE_UPLOAD_MAX_PIXELS", 40_000_000)
+
+
+# Logging
+# Every prediction is logged by classification.views as JSON with its probability, model and stage timings.
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "classification": {"handlers": ["console"], "level": os.environ.get("CLASSIFICATION_LOG_LEVEL") or "INFO"},
+        "core": {"handlers": ["console"], "level": os.environ.get("CORE_LOG_LEVEL") or "INFO"},
+    },
+}
+
+
+# Metrics
+# Counters and latency histograms of the process are served at /metrics to these addresses only.
+
+METRICS_ALLOWED_IPS = (os.environ.get("METRICS_ALLOWED_IPS") or "127.0.0.1,::1").split(",")
+
+# Requests running more database queries are logged with their duplicated SQL fingerprints.
+QUERY_BUDGET = env_int("QUERY_BUDGET", 20)
+
+
+# Profiling
+# Views matching PROFILING_STATISTICAL_VIEWS are sampled on every request and keep the profile when slower
+# than PROFILING_SLOW_THRESHOLD seconds, other views are profiled with cProfile on a PROFILING_SAMPLE_RATE
+# fraction of the requests.
+
+PROFILING_ENABLED = env_bool("PROFILING_ENABLED")
+PROFILING_DIR = os.environ.get("PROFILING_DIR") or "profiles"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE") or 0.01)
+PROFILING_SLOW_THRESHOLD = float(os.environ.get("PROFILING_SLOW_THRESHOLD") or 2.0)
+PROFILING_STATISTICAL_VIEWS = (os.environ.get("PROFILING_STATISTICAL_VIEWS") or "classification:").split(",")
+PROFILING_SAMPLING_INTERVAL = float(os.environ.get("PROFILING_SAMPLING_INTERVAL") or 0.01)
+PROFILING_MAX_CONCURRENT = env_int("PROFILING_MAX_CONCURRENT", 1)
+PROFILING_MAX_FILES = env_int("PROFILING_MAX_FILES", 200)
+
+
+# TensorFlow runtime
+# Every process applies the profile of its role on startup: web workers run "inference",
+# dedicated training workers are started with TF_RUNTIME_ROLE=training.
+# Thread counts left empty are derived from the CPUs available to the process.
+
+TF_RUNTIME_ROLE = os.environ.get("TF_RUNTIME_ROLE") or "inference"
+
+TF_RUNTIME = {
+    "web_workers": env_int("WEB_CONCURRENCY", 1),
+    "training_cpu_share": float(os.environ.get("TF_TRAINING_CPU_SHARE") or 0.5),
+    "cpu_pinning": env_bool("TF_CPU_PINNING"),
+    "inference": {
+        "intra_op_threads": env_int("TF_INFERENCE_INTRA_OP_THREADS"),
+        "inter_op_threads": env_int("TF_INFERENCE_INTER_OP_THREADS"),
+    },
+    "training": {
+        "intra_op_threads": env_int("TF_TRAINING_INTRA_OP_THREADS"),
+        "inter_op_threads": env_int("TF_TRAINING_INTER_OP_THREADS"),
+    },
+}
+
+
+# Weights storage
+# Weights of the custom models are tracked by size and hash. Weights not used for WEIGHTS_COLD_DAYS days
+# are compressed by the compress_weights command and decompressed into WEIGHTS_CACHE_DIR when they are loaded.
+
+WEIGHTS_DIR = os.environ.get("WEIGHTS_DIR") or "weights"
+WEIGHTS_CACHE_DIR = os.environ.get("WEIGHTS_CACHE_DIR") or os.path.join(WEIGHTS_DIR, "cache")
+WEIGHTS_COLD_DAYS = env_int("WEIGHTS_COLD_DAYS", 30)
+
+
+# Predictions
+# Loaded models are cached per process, comparisons predict with up to PREDICTION_COMPARE_WORKERS models at once.
+
+PREDICTION_MODEL_CACHE_SIZE = env_int("PREDICTION_MODEL_CACHE_SIZE", 8)
+PREDICTION_COMPARE_WORKERS = env_int("PREDICTION_COMPARE_WORKERS", 4)
+
+# A probability of a dog above the threshold classifies the image as a dog.
+
+PREDICTION_THRESHOLD = float(os.environ.get("PREDICTION_THRESHOLD") or 0.5)
+
+# Test-time augmentation averages the prediction over the image, its mirror and the image shifted
+# by PREDICTION_TTA_SHIFT pixels in each direction.
+
+PREDICTION_TTA_SHIFT = env_int("PREDICTION_TTA_SHIFT", 15)
+
+
+# Training progress
+# Running training metrics are streamed every N steps in addition to the per-epoch metrics, 0 disables them.
+
+TRAINING_PROGRESS_STEPS = env_int("TRAINING_PROGRESS_STEPS", 10)
+
+
+# Training checkpoints
+# Unfinished trainings keep their per-epoch checkpoints here until the model is stored.
+
+TRAINING_CHECKPOINT_DIR = os.environ.get("TRAINING_CHECKPOINT_DIR") or os.path.join("weights", "checkpoints")
+
+
+# Training results are reused for identical hyperparameters on the same dataset version.
+# Without an explicit version the SHA-256 of the dataset archive is used.
+
+TRAINING_DATASET_VERSION = os.environ.get("TRAINING_DATASET_VERSION", "")
+
+
+# Hyperparameter sweeps
+# Configurations are trained by SWEEP_WORKERS processes, and after every rung of successive halving
+# only 1/SWEEP_REDUCTION_FACTOR of them keep training.
+
+SWEEP_DIR = os.environ.get("SWEEP_DIR") or os.path.join("weights", "sweeps")
+SWEEP_WORKERS = env_int("SWEEP_WORKERS", 2)
+SWEEP_REDUCTION_FACTOR = env_int("SWEEP_REDUCTION_FACTOR", 2)
+SWEEP_MAX_CONFIGURATIONS = env_int("SWEEP_MAX_CONFIGURATIONS", 16)
+
+
+# Training admission
+# Trainings are admitted against per-host budgets of CPU cores and memory, shared by all processes through
+# the ledger file. A training that does not fit next to the running ones waits up to TRAINING_QUEUE_TIMEOUT
+# seconds, one that cannot fit at all, or whose estimated CPU time exceeds TRAINING_MAX_CPU_SECONDS, is rejected.
+# CPU time is estimated from the FLOPs of the model at TRAINING_CORE_GFLOPS per core.
+
+TRAINING_LEDGER_PATH = os.environ.get("TRAINING_LEDGER_PATH") or os.path.join("weights", "training_ledger.json")
+TRAINING_CPU_BUDGET = env_int("TRAINING_CPU_BUDGET") or os.cpu_count() or 1
+TRAINING_MEMORY_BUDGET_MB = env_int("TRAINING_MEMORY_BUDGET_MB", 4096)
+TRAINING_MAX_CPU_SECONDS = env_int("TRAINING_MAX_CPU_SECONDS", 4 * 3600)
+TRAINING_QUEUE_TIMEOUT = env_int("TRAINING_QUEUE_TIMEOUT", 300)
+TRAINING_CORE_GFLOPS = float(os.environ.get("TRAINING_CORE_GFLOPS") or 20)
+
+
+# Training scheduler
+# Waiting trainings are shared fairly between users. Every user may run TRAINING_USER_MAX_CONCURRENT trainings
+# at a time and start TRAINING_USER_CPU_SECONDS of estimated CPU time per TRAINING_USER_QUOTA_WINDOW seconds.
+
+TRAINING_USER_MAX_CONCURRENT = env_int("TRAINING_USER_MAX_CONCURRENT", 1)
+TRAINING_USER_CPU_SECONDS = env_int("TRAINING_USER_CPU_SECONDS", 24 * 3600)
+TRAINING_USER_QUOTA_WINDOW = env_int("TRAINING_USER_QUOTA_WINDOW", 24 * 3600)
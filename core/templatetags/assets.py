@@ -0,0 +1,18 @@
+from django import template
+
+from core.assets import get_vendor_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_static(path: str) -> str:
+    """
+    Link a third-party asset from the static files, falling back to its CDN until build_static vendors it.
+
+    Usage:
+
+        {% vendor_static "vendor/chart.js/chart.umd.js" %}
+    """
+
+    return get_vendor_url(path)
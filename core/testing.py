@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+
+import keras
+from django.test import override_settings
+
+from classification.dto import HyperParamsDTO
+from classification.services import ClassificationService
+from core.containers import RepositoryContainer, ServiceContainer
+
+# The smallest network of the form, so the tests build, save and load it quickly.
+TEST_HYPER_PARAMS = HyperParamsDTO(filters_1_layer=1, filters_2_layer=1, filters_3_layer=1, dense_neurons=1, epochs=1)
+
+
+class IsolatedFilesMixin:
+    """
+    Mixin of test cases writing the uploaded images, the avatars, the weights and the training state to a temporary
+    directory.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        files_settings = override_settings(
+            MEDIA_ROOT=os.path.join(directory, "media"),
+            WEIGHTS_DIR=os.path.join(directory, "weights"),
+            WEIGHTS_CACHE_DIR=os.path.join(directory, "weights", "cache"),
+            TRAINING_CHECKPOINT_DIR=os.path.join(directory, "weights", "checkpoints"),
+            TRAINING_LEDGER_PATH=os.path.join(directory, "weights", "training_ledger.json"),
+            SWEEP_DIR=os.path.join(directory, "weights", "sweeps"),
+        )
+        files_settings.enable()
+        cls.addClassCleanup(files_settings.disable)
+        os.makedirs(os.path.join(directory, "weights"))
+
+        # The scheduler reads the ledger path when it is created, so it is recreated with the temporary one.
+        for provider in (ServiceContainer.admission_controller, ServiceContainer.training_scheduler):
+            provider.reset()
+            cls.addClassCleanup(provider.reset)
+
+        super().setUpClass()
+
+
+def create_user_model(user, training_key: str = None):
+    """
+    Create a model of the user with real weights of TEST_HYPER_PARAMS and a one-epoch history, without training it.
+
+    Args:
+        user: The owner of the model.
+        training_key (str): The key the weights are reused with, None if they are never reused.
+
+    Returns:
+        ModelDTO - The created model.
+    """
+
+    model = ClassificationService._get_custom_user_model(TEST_HYPER_PARAMS)
+    weights_dto = RepositoryContainer.weights_store().save(model)
+    history = keras.callbacks.History()
+    history.history = {name: [0.5] for name in ClassificationService.HISTORY_METRICS}
+
+    return RepositoryContainer.classification_model_repository().create_model(
+        user, TEST_HYPER_PARAMS, weights_dto, history, training_key=training_key
+    )
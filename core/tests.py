@@ -0,0 +1,144 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from users.models import UserModel
+
+from .queries import assert_max_queries, fingerprint
+from .testing import IsolatedFilesMixin
+from .uploads import NOT_AN_IMAGE_MESSAGE, TOO_LARGE_MESSAGE, TOO_MANY_PIXELS_MESSAGE, ImageUploadHandler
+
+
+def _upload(content: bytes, chunk_size: int = 64 * 1024):
+    handler = ImageUploadHandler()
+    handler.new_file("image", "image.jpg", "image/jpeg", len(content))
+    for start in range(0, len(content), chunk_size):
+        handler.receive_data_chunk(content[start : start + chunk_size], start)
+
+    return handler.file_complete(len(content))
+
+
+def _encode(size: tuple, image_format: str) -> bytes:
+    encoded = io.BytesIO()
+    Image.new("RGB", size).save(encoded, image_format)
+    return encoded.getvalue()
+
+
+class ImageUploadHandlerTests(SimpleTestCase):
+    def test_image_is_identified_from_a_header_split_into_chunks(self):
+        uploaded_image = _upload(_encode((64, 48), "JPEG"), chunk_size=16)
+
+        self.assertIsNone(uploaded_image.error)
+        self.assertEqual(uploaded_image.image_format, "JPEG")
+        self.assertEqual(uploaded_image.image_size, (64, 48))
+
+    def test_garbage_raising_value_error_in_a_plugin_is_not_an_image(self):
+        uploaded_image = _upload(b"P6 hello world\n")
+
+        self.assertEqual(uploaded_image.error, NOT_AN_IMAGE_MESSAGE)
+
+    def test_text_is_not_an_image(self):
+        uploaded_image = _upload(b"hello" * 1000)
+
+        self.assertEqual(uploaded_image.error, NOT_AN_IMAGE_MESSAGE)
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1000)
+    def test_image_with_too_many_pixels_is_rejected(self):
+        uploaded_image = _upload(_encode((64, 48), "PNG"))
+
+        self.assertEqual(uploaded_image.error, TOO_MANY_PIXELS_MESSAGE.format(max_pixels=0))
+        self.assertEqual(uploaded_image.read(), b"")
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=1000)
+    def test_size_limit_counts_all_files_of_the_request(self):
+        handler = ImageUploadHandler()
+        content = _encode((8, 8), "PNG")
+        uploaded_images = []
+        for _ in range(1000 // len(content) + 1):
+            handler.new_file("image", "image.png", "image/png", len(content))
+            handler.receive_data_chunk(content, 0)
+            uploaded_images.append(handler.file_complete(len(content)))
+
+        self.assertIsNone(uploaded_images[0].error)
+        self.assertEqual(uploaded_images[-1].error, TOO_LARGE_MESSAGE.format(max_size=0))
+
+
+class QueryBudgetTests(TestCase):
+    def test_fingerprint_replaces_literals_and_parameter_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT *  FROM t\nWHERE id IN (%s, %s, %s) AND name = 'O''Brien' AND n > 10"),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? AND n > ?",
+        )
+        self.assertEqual(fingerprint("SELECT * FROM t WHERE id = 1"), fingerprint("SELECT * FROM t WHERE id = 2"))
+
+    def test_assert_max_queries_lists_duplicated_queries(self):
+        with self.assertRaisesMessage(AssertionError, "Expected at most 1 queries, got 3 queries"):
+            with assert_max_queries(1):
+                for user_id in range(3):
+                    UserModel.objects.filter(pk=user_id).exists()
+
+        with assert_max_queries(1) as recorder:
+            UserModel.objects.exists()
+        self.assertEqual(recorder.queries, 1)
+
+    def test_assert_max_queries_counts_the_given_connection(self):
+        with assert_max_queries(0, using=connection):
+            pass
+
+    @override_settings(QUERY_BUDGET=1)
+    def test_request_over_budget_is_logged(self):
+        self.client.force_login(UserModel.objects.create_user(email="user@example.com", password="password"))
+
+        with self.assertLogs("core.middleware", "WARNING") as logs:
+            self.client.get("/users/profile/")
+
+        self.assertIn("Query budget of 1 exceeded by GET", logs.output[0])
+
+
+class ImageUploadViewTests(IsolatedFilesMixin, TestCase):
+    UPLOADS = (
+        ("classification:cats_or_dogs", {"title": "Photo"}, "image"),
+        ("users:update_profile", {"first_name": "First", "last_name": "Last"}, "avatar"),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user(email="user@example.com", password="password")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _post_images(self, client: Client, size: tuple, image_format: str = "PNG"):
+        content = _encode(size, image_format)
+        for url_name, data, field in self.UPLOADS:
+            image = SimpleUploadedFile(
+                f"image.{image_format.lower()}", content, content_type=f"image/{image_format.lower()}"
+            )
+            yield field, client.post(reverse(url_name), {**data, field: image})
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=2 * 2**20)
+    def test_image_over_the_request_size_limit_is_rejected(self):
+        # Uncompressed, so the file is larger than the limit: 1000 x 1000 x 3 bytes.
+        for field, response in self._post_images(self.client, (1000, 1000), "BMP"):
+            with self.subTest(field=field):
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context["form"].errors[field], [TOO_LARGE_MESSAGE.format(max_size=2)])
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=2 * 10**6)
+    def test_image_over_the_pixel_limit_is_rejected(self):
+        for field, response in self._post_images(self.client, (2000, 1001)):
+            with self.subTest(field=field):
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context["form"].errors[field], [TOO_MANY_PIXELS_MESSAGE.format(max_pixels=2)])
+
+    def test_upload_without_csrf_token_is_forbidden(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+
+        for field, response in self._post_images(client, (64, 48)):
+            with self.subTest(field=field):
+                self.assertEqual(response.status_code, 403)
@@ -0,0 +1,161 @@
+import functools
+import io
+import tempfile
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+# The header of every supported format fits in the first bytes, JPEG files with large EXIF blocks included.
+HEADER_SIZE = 512 * 1024
+
+TOO_LARGE_MESSAGE = "Файл завеликий, максимальний розмір {max_size} МБ."
+TOO_MANY_PIXELS_MESSAGE = "Зображення завелике, максимум {max_pixels} мегапікселів."
+NOT_AN_IMAGE_MESSAGE = "Файл не є зображенням."
+
+
+class UploadedImage(UploadedFile):
+    """
+    An uploaded image kept in a spooled temporary file, with the format and the size read from its header.
+
+    A rejected upload keeps no content, only the reason of the rejection shown by ImageUploadField.
+    """
+
+    def __init__(self, file, name, content_type, size, charset, image_format=None, image_size=None, error=None):
+        super().__init__(file, name, content_type, size, charset)
+        self.image_format = image_format
+        self.image_size = image_size
+        self.error = error
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    Stream the uploaded images of a request into spooled temporary files within the limits of the settings.
+
+    Files stay in memory up to FILE_UPLOAD_MAX_MEMORY_SIZE bytes and roll over to disk above it. The header of
+    every file is parsed while it is received, so files which are not images or have more than
+    IMAGE_UPLOAD_MAX_PIXELS pixels are rejected before the rest of them is stored, as are the files beyond
+    IMAGE_UPLOAD_MAX_SIZE bytes uploaded by the request in total.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.received = 0
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        self.header = bytearray()
+        self.image_format = None
+        self.image_size = None
+        self.error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.error:
+            return None
+        if self.received > settings.IMAGE_UPLOAD_MAX_SIZE:
+            return self._reject(TOO_LARGE_MESSAGE.format(max_size=settings.IMAGE_UPLOAD_MAX_SIZE // 2**20))
+
+        if self.image_format is None:
+            self.header += raw_data
+            self._parse_header()
+            if self.error:
+                return None
+
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.image_format is None and not self.error:
+            # The whole file is shorter than HEADER_SIZE and still not an image.
+            self._reject(NOT_AN_IMAGE_MESSAGE)
+
+        self.file.seek(0)
+        return UploadedImage(
+            file=self.file,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            image_format=self.image_format,
+            image_size=self.image_size,
+            error=self.error,
+        )
+
+    def _parse_header(self) -> None:
+        try:
+            with Image.open(io.BytesIO(self.header)) as image:
+                self.image_format, self.image_size = image.format, image.size
+        except Image.DecompressionBombError:
+            self._reject(TOO_MANY_PIXELS_MESSAGE.format(max_pixels=settings.IMAGE_UPLOAD_MAX_PIXELS // 10**6))
+            return
+        except Exception:
+            # The header is incomplete so far, or the file is not an image. Plugins raise all kinds of errors on
+            # garbage, like ValueError from PPM, so everything is caught as ImageField.to_python does.
+            if len(self.header) >= HEADER_SIZE:
+                self._reject(NOT_AN_IMAGE_MESSAGE)
+            return
+
+        self.header = None
+        width, height = self.image_size
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self._reject(TOO_MANY_PIXELS_MESSAGE.format(max_pixels=settings.IMAGE_UPLOAD_MAX_PIXELS // 10**6))
+
+    def _reject(self, error: str) -> None:
+        self.error = error
+        self.header = None
+        self.file.close()
+        self.file = io.BytesIO()
+
+
+class ImageUploadField(forms.ImageField):
+    """
+    Image field of the forms of views decorated by image_uploads.
+
+    The image was identified by ImageUploadHandler while it was received, so it is verified from its spooled file
+    instead of being copied into memory.
+    """
+
+    def to_python(self, data):
+        if isinstance(data, UploadedImage) and data.error:
+            raise forms.ValidationError(data.error, code="invalid_image")
+        if not isinstance(data, UploadedImage):
+            return super().to_python(data)
+
+        uploaded_file = forms.FileField.to_python(self, data)
+        if uploaded_file is None:
+            return None
+
+        try:
+            with Image.open(uploaded_file) as image:
+                image.verify()
+        except Exception as exc:
+            raise forms.ValidationError(self.error_messages["invalid_image"], code="invalid_image") from exc
+
+        uploaded_file.image = image
+        uploaded_file.content_type = Image.MIME.get(data.image_format)
+        uploaded_file.seek(0)
+        return uploaded_file
+
+
+def image_uploads(view):
+    """
+    Parse the uploads of a view with ImageUploadHandler.
+
+    Upload handlers have to be set before the body is parsed, which CsrfViewMiddleware does for POST requests,
+    so the CSRF token is checked by the view instead.
+    """
+
+    protected_view = csrf_protect(view)
+
+    @csrf_exempt
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return protected_view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,49 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from .metrics import registry
+
+
+def metrics(request):
+    """
+    Expose the metrics of the process in the Prometheus text format.
+
+    The endpoint is only served to the addresses in METRICS_ALLOWED_IPS, other clients get a 404.
+    """
+
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def static(request, path):
+    """
+    Serve the collected static files for deployments without a web server in front of Django.
+
+    The gzip or brotli variant written by build_static is sent to clients accepting it.
+    """
+
+    full_path = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    accepted = {encoding.split(";")[0].strip() for encoding in request.headers.get("Accept-Encoding", "").split(",")}
+
+    response = None
+    for encoding, extension in (("br", ".br"), ("gzip", ".gz")):
+        if encoding in accepted and os.path.isfile(full_path + extension):
+            response = FileResponse(open(full_path + extension, "rb"), content_type=content_type)
+            response["Content-Encoding"] = encoding
+            break
+    if response is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
@@ -1,30 +1,43 @@
 from django.shortcuts import render
 
+from core.caching import cache_page_for_anonymous
+from core.conditional import template_page
 
+
+@template_page("info_pages/home.html")
+@cache_page_for_anonymous
 def home(request):
     """"""
 
     return render(request, "info_pages/home.html")
 
 
+@template_page("info_pages/ml.html")
+@cache_page_for_anonymous
 def ml_page(request):
     """"""
 
     return render(request, "info_pages/ml.html")
 
 
+@template_page("info_pages/ml_types.html")
+@cache_page_for_anonymous
 def ml_types_page(request):
     """"""
 
     return render(request, "info_pages/ml_types.html")
 
 
+@template_page("info_pages/neural_networks.html")
+@cache_page_for_anonymous
 def neural_networks_page(request):
     """"""
 
     return render(request, "info_pages/neural_networks.html")
 
 
+@template_page("info_pages/deep_learning.html")
+@cache_page_for_anonymous
 def deep_learning_page(request):
     """"""
 
@@ -1,24 +1,21 @@
 document.addEventListener('DOMContentLoaded', function () {
-    var data1 = JSON.parse(document.getElementById('loss').getAttribute('data-data1'));
-    var data2 = JSON.parse(document.getElementById('loss').getAttribute('data-data2'));
-    var data3 = JSON.parse(document.getElementById('loss').getAttribute('data-data3'));
-
-    var ctx = document.getElementById('loss').getContext('2d');
+    var canvas = document.getElementById('loss');
+    var ctx = canvas.getContext('2d');
     var myChart = new Chart(ctx, {
         type: 'line',
         data: {
-            labels: data3,
+            labels: [],
             datasets: [
                 {
                     label: 'Loss',
-                    data: data1,
+                    data: [],
                     borderColor: 'rgba(75, 192, 192, 1)',
                     borderWidth: 1,
                     fill: false
                 },
                 {
                     label: 'Val loss',
-                    data: data2,
+                    data: [],
                     borderColor: 'rgba(255, 99, 132, 1)',
                     borderWidth: 1,
                     fill: false
@@ -42,4 +39,21 @@ document.addEventListener('DOMContentLoaded', function () {
             }
         }
     });
-});
\ No newline at end of file
+
+    window.trainingCharts = window.trainingCharts || {};
+    window.trainingCharts.loss = myChart;
+
+    var url = canvas.getAttribute('data-url');
+    if (url) {
+        fetch(url + '&points=' + canvas.width)
+            .then(function (response) {
+                return response.json();
+            })
+            .then(function (data) {
+                myChart.data.labels = data.epochs;
+                myChart.data.datasets[0].data = data.series.loss;
+                myChart.data.datasets[1].data = data.series.val_loss;
+                myChart.update();
+            });
+    }
+});
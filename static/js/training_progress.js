@@ -0,0 +1,49 @@
+document.addEventListener('DOMContentLoaded', function () {
+    var form = document.getElementById('create-model-form');
+    if (!form || !form.getAttribute('data-events-url')) {
+        return;
+    }
+
+    function appendEpoch(chart, epoch, values) {
+        chart.data.labels.push(epoch);
+        values.forEach(function (value, index) {
+            chart.data.datasets[index].data.push(value);
+        });
+        chart.update('none');
+    }
+
+    form.addEventListener('submit', function () {
+        var status = document.getElementById('training-status');
+        document.getElementById('training-progress').hidden = false;
+
+        var source = new EventSource(form.getAttribute('data-events-url'));
+
+        source.addEventListener('step', function (event) {
+            var data = JSON.parse(event.data);
+            status.textContent = 'Епоха ' + data.epoch + ', крок ' + data.step
+                + ': точність ' + data.accuracy.toFixed(4) + ', похибка ' + data.loss.toFixed(4);
+        });
+
+        source.addEventListener('epoch', function (event) {
+            var data = JSON.parse(event.data);
+            status.textContent = 'Епоха ' + data.epoch + ' завершена';
+            appendEpoch(window.trainingCharts.accuracy, data.epoch, [data.accuracy, data.val_accuracy]);
+            appendEpoch(window.trainingCharts.loss, data.epoch, [data.loss, data.val_loss]);
+        });
+
+        source.addEventListener('completed', function () {
+            status.textContent = 'Навчання завершено';
+            source.close();
+        });
+
+        source.addEventListener('rejected', function () {
+            status.textContent = 'Навчання відхилено';
+            source.close();
+        });
+
+        source.addEventListener('failed', function () {
+            status.textContent = 'Під час навчання сталася помилка';
+            source.close();
+        });
+    });
+});
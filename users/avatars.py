@@ -0,0 +1,63 @@
+import os
+
+from PIL import Image, ImageOps, features
+
+from core.files import save_image
+
+# Square sizes of the avatar in pixels: the profile pages show the largest, the navbar the smallest.
+AVATAR_SIZES = (200, 40)
+AVATAR_FORMAT, AVATAR_EXTENSION = ("WEBP", ".webp") if features.check("webp") else ("JPEG", ".jpg")
+# Quality settings keeping the 200px avatar around 10 KB without visible artifacts.
+SAVE_OPTIONS = {
+    "WEBP": {"quality": 80, "method": 4},
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+}
+
+
+def process_avatar(avatar, name: str) -> dict[int, str]:
+    """
+    Crop an uploaded avatar to a square, scale it to every size of AVATAR_SIZES and save the sizes.
+
+    JPEG uploads are decoded at the smallest power-of-two reduction still covering the largest size, so the full
+    resolution bitmap of a photo is never allocated. The files are named by the hash of their content.
+
+    Args:
+        avatar: The uploaded avatar file.
+        name (str): The uploaded name of the avatar.
+
+    Returns:
+        dict[int, str] - The sizes mapped to the paths of the saved avatars relative to the media directory.
+    """
+
+    largest = max(AVATAR_SIZES)
+    with Image.open(avatar) as image:
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+
+        side = min(image.size)
+        left, top = (image.width - side) // 2, (image.height - side) // 2
+        square = image.crop((left, top, left + side, top + side))
+
+    square = _convert(square)
+    stem = os.path.splitext(os.path.basename(name))[0]
+    paths = {}
+    # Every size is scaled down from the previous one, the smaller sizes never touch the decoded upload.
+    for size in sorted(AVATAR_SIZES, reverse=True):
+        square.thumbnail((size, size), Image.LANCZOS, reducing_gap=2.0)
+        paths[size] = save_image(square, "avatars", f"{stem}_{size}{AVATAR_EXTENSION}", **SAVE_OPTIONS[AVATAR_FORMAT])
+
+    return paths
+
+
+def _convert(image: Image) -> Image:
+    if image.mode not in ("RGBA", "LA", "PA") and "transparency" not in image.info:
+        return image.convert("RGB")
+
+    image = image.convert("RGBA")
+    if AVATAR_FORMAT == "WEBP":
+        return image
+
+    # JPEG has no transparency, transparent pixels are shown on white like the background of the pages.
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image, mask=image.getchannel("A"))
+    return background
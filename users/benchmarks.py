@@ -0,0 +1,57 @@
+import io
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from classification.benchmarks import IMAGE_SIZES, make_image
+from core.benchmarks import benchmark, register
+from core.containers import ServiceContainer
+
+from .avatars import process_avatar
+from .dto import UpdateUserDTO
+from .models import UserModel
+
+# A photo of a 20-megapixel camera.
+CAMERA_PHOTO_SIZE = (5472, 3648)
+
+
+def _update_profile_case(size: tuple):
+    def factory():
+        user_service = ServiceContainer.user_service()
+        user = UserModel.objects.create_user(email=f"benchmark-{uuid.uuid4().hex}@example.com", password=None)
+        avatar_bytes = make_image(size, "JPEG")
+        avatar_name = f"benchmark_{user.pk}.jpg"
+
+        def update_profile():
+            avatar = SimpleUploadedFile(avatar_name, avatar_bytes, content_type="image/jpeg")
+            user_service.update_profile(UpdateUserDTO(id=user.pk, first_name="Bench", last_name="Mark", avatar=avatar))
+
+        def cleanup():
+            # The avatar is saved under a name with the hash of its content, the user removes it on delete.
+            user.refresh_from_db()
+            user.delete()
+
+        return update_profile, cleanup
+
+    return factory
+
+
+for _size in IMAGE_SIZES:
+    register(f"users.update_profile.avatar.{_size[0]}x{_size[1]}", _update_profile_case(_size))
+
+
+@benchmark(f"users.avatar.process.{CAMERA_PHOTO_SIZE[0]}x{CAMERA_PHOTO_SIZE[1]}", repeats=5, memory=True)
+def _process_avatar_case():
+    photo_bytes = make_image(CAMERA_PHOTO_SIZE, "JPEG")
+    paths = []
+
+    def process():
+        paths.extend(process_avatar(io.BytesIO(photo_bytes), "benchmark.jpg").values())
+
+    def cleanup():
+        for path in set(paths):
+            os.remove(os.path.join(settings.MEDIA_ROOT, path))
+
+    return process, cleanup
@@ -11,6 +11,7 @@ class UserDTO(BaseModel):
     first_name: str
     last_name: str
     avatar: Optional[str] = None
+    avatar_thumbnail: Optional[str] = None
     date_joined: datetime
 
 
@@ -19,6 +20,7 @@ class UpdateUserDTO(BaseModel):
     first_name: str
     last_name: str
     avatar: Optional[UploadedFile | str] = None
+    avatar_thumbnail: Optional[str] = None
 
     class Config:
         arbitrary_types_allowed = True
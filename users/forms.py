@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 
+from core.uploads import ImageUploadField
+
 from .models import UserModel
 
 
@@ -76,7 +78,7 @@ class UserUpdateForm(forms.Form):
         disabled=True,
         widget=forms.TextInput(attrs={"class": "form-control"}),
     )
-    avatar = forms.ImageField(
+    avatar = ImageUploadField(
         label="Завантажте фото:",
         required=False,
         widget=forms.FileInput(attrs={"class": "form-control"}),
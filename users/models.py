@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
 
 from .managers import UserManager
 
@@ -10,6 +11,7 @@ class UserModel(AbstractUser):
     username = None
     email = models.EmailField(unique=True)
     avatar = models.ImageField(upload_to="avatars/", null=True, blank=True)
+    avatar_thumbnail = models.ImageField(upload_to="avatars/", null=True, blank=True)
 
     objects = UserManager()
 
@@ -17,8 +19,21 @@ class UserModel(AbstractUser):
     REQUIRED_FIELDS = []
 
     def delete(self, *args, **kwargs):
-        if self.avatar:
-            storage, path = self.avatar.storage, self.avatar.path
-            storage.delete(path)
+        self.delete_avatar_files([avatar.name for avatar in (self.avatar, self.avatar_thumbnail) if avatar])
 
         super().delete(*args, **kwargs)
+
+    def delete_avatar_files(self, names: list[str]) -> None:
+        """
+        Delete the avatar files of the user which no other user refers to.
+
+        Avatars are named by the uploaded name and the hash of their content, so users uploading the same photo
+        under the same name share the files.
+
+        Args:
+            names (list[str]): The names of the files relative to the media directory.
+        """
+
+        for name in names:
+            if not UserModel.objects.filter(Q(avatar=name) | Q(avatar_thumbnail=name)).exclude(pk=self.pk).exists():
+                self.avatar.storage.delete(name)
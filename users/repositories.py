@@ -53,10 +53,23 @@ class UserRepository(UserRepositoryInterface):
 
         user.first_name = update_user_dto.first_name
         user.last_name = update_user_dto.last_name
+        replaced_avatars = []
         if update_user_dto.avatar:
+            replaced_avatars = [
+                avatar.name
+                for avatar, path in (
+                    (user.avatar, update_user_dto.avatar),
+                    (user.avatar_thumbnail, update_user_dto.avatar_thumbnail),
+                )
+                if avatar and avatar.name != path
+            ]
             user.avatar = update_user_dto.avatar
+            user.avatar_thumbnail = update_user_dto.avatar_thumbnail
         user.save()
 
+        # Avatars are saved under new names, the previous files are removed unless another user shares them.
+        user.delete_avatar_files(replaced_avatars)
+
         return self._user_to_dto(user)
 
     def delete_profile(self, user_id: int) -> None:
@@ -103,5 +116,6 @@ class UserRepository(UserRepositoryInterface):
             first_name=user.first_name,
             last_name=user.last_name,
             avatar=user.avatar.url if user.avatar else None,
+            avatar_thumbnail=user.avatar_thumbnail.url if user.avatar_thumbnail else None,
             date_joined=user.date_joined,
         )
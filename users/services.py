@@ -1,5 +1,4 @@
-from PIL import Image
-
+from .avatars import process_avatar
 from .interfaces import UserRepositoryInterface
 
 
@@ -40,10 +39,10 @@ class UserService:
         """
 
         if update_user_dto.avatar:
-            resized_avatar = self._resize_avatar(avatar=update_user_dto.avatar)
-            avatar_url = self._save_avatar(avatar=resized_avatar, avatar_name=update_user_dto.avatar.name)
+            avatar_paths = self._save_avatar(avatar=update_user_dto.avatar)
 
-            update_user_dto.avatar = avatar_url
+            update_user_dto.avatar = avatar_paths[max(avatar_paths)]
+            update_user_dto.avatar_thumbnail = avatar_paths[min(avatar_paths)]
 
         return self.user_repository.update_profile(update_user_dto)
 
@@ -51,37 +50,16 @@ class UserService:
         return self.user_repository.delete_profile(user_id=user_id)
 
     @staticmethod
-    def _resize_avatar(avatar):
+    def _save_avatar(avatar):
         """
-        Resize the given avatar.
+        Save the avatar in every size.
 
         Args:
             avatar: The avatar file.
 
         Returns:
-            Image - The resized avatar.
-        """
-
-        resized_avatar = Image.open(avatar)
-        resized_avatar = resized_avatar.resize((200, 200))
-
-        return resized_avatar
+            dict[int, str]: Avatar paths by size.
 
-    @staticmethod
-    def _save_avatar(avatar, avatar_name):
         """
-        Save the avatar.
-
-        Args:
-            avatar: The avatar file.
-            avatar_name (str): The name of the avatar file.
-
-        Returns:
-            str: Avatar path.
-
-        """
-
-        avatar_path = "avatars/" + avatar_name
-        avatar.save("media/" + avatar_path)
 
-        return avatar_path
+        return process_avatar(avatar, avatar.name)
@@ -1,3 +1,98 @@
-from django.test import TestCase  # NOQA
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
 
-# Create your tests here.
+from classification.benchmarks import make_image
+from core.queries import assert_max_queries
+from core.testing import IsolatedFilesMixin
+
+from .models import UserModel
+
+
+class ViewQueryBudgetTests(IsolatedFilesMixin, TestCase):
+    """
+    Pin the number of database queries of every view, so a query added in a loop fails a test.
+
+    The budgets include the queries of the session and the user.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserModel.objects.create_user(email="user@example.com", password="password")
+
+    def test_registration(self):
+        with assert_max_queries(0):
+            response = self.client.get("/users/registration/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_registration_post(self):
+        data = {"email": "new@example.com", "password1": "Secret-password-1", "password2": "Secret-password-1"}
+        with assert_max_queries(11):
+            response = self.client.post("/users/registration/", data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(UserModel.objects.filter(email="new@example.com").exists())
+
+    def test_login(self):
+        with assert_max_queries(0):
+            response = self.client.get("/users/login/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_post(self):
+        with assert_max_queries(9):
+            response = self.client.post("/users/login/", {"email": self.user.email, "password": "password"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout(self):
+        self.client.force_login(self.user)
+        with assert_max_queries(2):
+            response = self.client.get("/users/logout/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout_post(self):
+        self.client.force_login(self.user)
+        with assert_max_queries(4):
+            response = self.client.post("/users/logout/")
+        self.assertEqual(response.status_code, 302)
+
+    def test_profile(self):
+        self.client.force_login(self.user)
+        with assert_max_queries(3):
+            response = self.client.get("/users/profile/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_profile(self):
+        self.client.force_login(self.user)
+        with assert_max_queries(3):
+            response = self.client.get("/users/profile/update")
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_profile_post(self):
+        self.client.force_login(self.user)
+        avatar = SimpleUploadedFile("avatar.jpg", make_image((640, 480), "JPEG"), content_type="image/jpeg")
+        with assert_max_queries(4):
+            response = self.client.post(
+                "/users/profile/update", {"first_name": "First", "last_name": "Last", "avatar": avatar}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.context["user_dto"].avatar_thumbnail)
+
+    def test_update_profile_post_not_an_image(self):
+        self.client.force_login(self.user)
+        image = SimpleUploadedFile("avatar.jpg", b"P6 hello world\n", content_type="image/jpeg")
+        with assert_max_queries(2):
+            response = self.client.post(
+                "/users/profile/update", {"first_name": "First", "last_name": "Last", "avatar": image}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors["avatar"])
+
+    def test_delete_profile(self):
+        self.client.force_login(self.user)
+        with assert_max_queries(2):
+            response = self.client.get("/users/profile/delete")
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_profile_post(self):
+        self.client.force_login(self.user)
+        with assert_max_queries(10):
+            response = self.client.post("/users/profile/delete")
+        self.assertEqual(response.status_code, 302)
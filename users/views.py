@@ -4,6 +4,7 @@ from django.shortcuts import redirect, render
 
 from core.containers import ServiceContainer
 from core.exceptions import InstanceNotExistError
+from core.uploads import image_uploads
 
 from .dto import UpdateUserDTO
 from .forms import LoginForm, RegisterForm, UserUpdateForm
@@ -70,6 +71,7 @@ def get_profile(request):
 
 
 @login_required
+@image_uploads
 def update_profile(request):
     user_service = ServiceContainer.user_service()
 